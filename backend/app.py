@@ -1,6 +1,6 @@
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_jwt_extended import JWTManager
 from config import Config
 from utils.db import Base, engine
@@ -9,6 +9,21 @@ from routes.ingest import bp as ingest_bp
 from routes.media import bp as media_bp
 from routes.auth import bp as auth_bp, check_if_token_revoked
 from routes.stats import bp as stats_bp
+from routes.alerts import bp as alerts_bp
+from routes.webhooks import bp as webhooks_bp
+from utils.cache import response_cache
+from utils.ratelimit import rate_limiter
+from services.analytics import get_snapshot
+from services.hotspots import hotspot_detector
+from services.geofence import geofence_index
+from services.webhooks import webhook_dispatcher
+from services.media_processing import media_processor
+from services.image_resizer import image_resizer
+from services.revocation import token_revocations
+from services.passwords import password_hasher
+from services.realtime import init_realtime
+from services.incident_events import room_name, ALL_INCIDENTS_ROOM, incident_broadcaster, start_incident_relay
+from cli import register_commands
 import os
 
 def create_app():
@@ -22,13 +37,18 @@ def create_app():
     # Initialize CORS
     CORS(app, 
          origins=["http://localhost:8080", "http://localhost:8081"], 
-         allow_headers=["Content-Type", "Authorization"],
-         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+         allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+         expose_headers=["ETag", "Retry-After"],
+         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
     
     # Initialize JWT
     jwt = JWTManager(app)
     jwt.token_in_blocklist_loader(check_if_token_revoked)
 
+    # Per-client token buckets on expensive endpoints (runs before any other hook)
+    if rate_limiter.enabled:
+        app.before_request(rate_limiter.before_request)
+
     # ensure tables exist (alembic will manage migrations after first create)
     Base.metadata.create_all(bind=engine)
 
@@ -40,28 +60,64 @@ def create_app():
     def health():
         return {"status": "healthy"}
 
+    @app.route("/metrics")
+    def metrics():
+        snapshot = get_snapshot()
+        return {
+            "cache": response_cache.stats(),
+            "analytics": snapshot.stats() if snapshot is not None else None,
+            "hotspots": hotspot_detector.stats(),
+            "broadcast": incident_broadcaster.stats(),
+            "geofences": geofence_index.stats(),
+            "webhooks": webhook_dispatcher.stats(),
+            "media": media_processor.stats(),
+            "resized_images": image_resizer.stats(),
+            "revocations": token_revocations.stats(),
+            "passwords": password_hasher.stats(),
+            "rate_limits": rate_limiter.stats(),
+        }
+
     app.register_blueprint(incidents_bp)
     app.register_blueprint(ingest_bp)
     app.register_blueprint(media_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(stats_bp)
+    app.register_blueprint(alerts_bp)
+    app.register_blueprint(webhooks_bp)
+    register_commands(app)
+
+    if app.config['WEBHOOK_DISPATCH'] == 'inline':
+        # deliver webhooks from the serving process, starting with its first request
+        app.before_request(webhook_dispatcher.ensure_started)
+    if app.config['MEDIA_PROCESSING'] == 'queue':
+        # also picks up media left pending by a previous run
+        app.before_request(media_processor.ensure_started)
     return app
 
 app = create_app()
 
-# Configure Socket.IO with proper settings
+# Configure Socket.IO with proper settings. With SOCKETIO_MESSAGE_QUEUE set,
+# several server processes share clients' rooms through Redis.
+queue_options = {}
+if Config.SOCKETIO_MESSAGE_QUEUE:
+    queue_options = {"message_queue": Config.SOCKETIO_MESSAGE_QUEUE, "channel": Config.SOCKETIO_CHANNEL}
 socketio = SocketIO(
     app,
     cors_allowed_origins="*",
-    async_mode='threading',
+    async_mode=Config.SOCKETIO_ASYNC_MODE,
     logger=False,
-    engineio_logger=False
+    engineio_logger=False,
+    **queue_options
 )
+# hotspot alerts and other service events are emitted through this server
+init_realtime(socketio)
 
 # Socket.IO event handlers
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    # this process serves sockets: start receiving incident events for its clients
+    start_incident_relay(socketio.start_background_task)
     emit('status', {'message': 'Connected to Inci-Alert WebSocket'})
 
 @socketio.on('disconnect')
@@ -72,9 +128,57 @@ def handle_disconnect():
 def handle_ping():
     emit('pong', {'timestamp': 'pong'})
 
-# Function to emit incident updates
-def emit_incident_update(incident_data):
-    socketio.emit('incident_update', incident_data)
+# Incident events are only sent to the rooms a client subscribed to:
+# {"all": true} or any of {"categories": [...], "sources": [...], "statuses": [...]}
+SUBSCRIPTION_KEYS = {'categories': 'category', 'sources': 'source', 'statuses': 'status'}
+MAX_SUBSCRIPTION_ROOMS = 50
+
+def _subscription_rooms(data):
+    if not isinstance(data, dict):
+        return None
+    rooms = [ALL_INCIDENTS_ROOM] if data.get('all') else []
+    for key, field in SUBSCRIPTION_KEYS.items():
+        values = data.get(key) or []
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            return None
+        rooms.extend(room_name(field, value) for value in values)
+    return rooms if len(rooms) <= MAX_SUBSCRIPTION_ROOMS else None
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    rooms = _subscription_rooms(data)
+    if rooms is None:
+        emit('error', {'message': 'Invalid subscription'})
+        return
+    for room in rooms:
+        join_room(room)
+    emit('subscribed', {'rooms': rooms, **incident_broadcaster.position()})
+
+# A reconnecting client sends its subscription plus the last {"epoch", "seq"} it
+# saw and gets the missed events replayed, or a 'resync' if they are gone.
+@socketio.on('resume')
+def handle_resume(data):
+    rooms = _subscription_rooms(data)
+    seq = data.get('seq') if isinstance(data, dict) else None
+    if rooms is None or not isinstance(seq, int) or isinstance(seq, bool) or seq < 0:
+        emit('error', {'message': 'Invalid resume request'})
+        return
+
+    def join():
+        for room in rooms:
+            join_room(room)
+
+    incident_broadcaster.resume(request.sid, rooms, data.get('epoch'), seq, join)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    rooms = _subscription_rooms(data)
+    if rooms is None:
+        emit('error', {'message': 'Invalid subscription'})
+        return
+    for room in rooms:
+        leave_room(room)
+    emit('unsubscribed', {'rooms': rooms})
 
 if __name__ == "__main__":
     socketio.run(app, host="0.0.0.0", port=5000, debug=False)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+NumPy analytics snapshot: load and incremental refresh cost, memory per
+million rows, and stats latency against the SQL path, with every result
+checked for an exact match.
+"""
+import os
+import random
+from benchmarks.common import print_header, seed_incidents, timed, latency_summary, incident_payload
+
+from app import app
+from config import Config
+from utils.db import SessionLocal
+from utils.cache import response_cache, NullBackend
+from models.incident import Incident
+from services.analytics import get_snapshot
+
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+WRITES = int(os.getenv("BENCH_WRITES", "1000"))
+
+URLS = [
+    "/stats/overview",
+    "/stats/category?days=7",
+    "/stats/category?days=365",
+    "/stats/timeline?period=day",
+    "/stats/timeline?period=month&bucket=hour",
+    "/stats/timeline?period=year&bucket=day",
+    "/stats/timeline?period=year&bucket=week",
+    "/stats/timeline?period=year",
+    "/stats/timeline?period=year&category=fire",
+]
+
+def normalized(payload):
+    """Order-independent form of a stats payload."""
+    for key in ("status_breakdown", "category_breakdown", "categories"):
+        if key in payload:
+            payload[key] = sorted(payload[key], key=lambda entry: str(entry.get("status", entry.get("category"))))
+    return payload
+
+def fetch_all(client, snapshot: bool):
+    Config.ANALYTICS_SNAPSHOT = snapshot
+    return {url: normalized(client.get(url).json) for url in URLS}
+
+def check(client, label: str):
+    sql = fetch_all(client, False)
+    numpy = fetch_all(client, True)
+    mismatches = [url for url in URLS if sql[url] != numpy[url]]
+    status = "✓" if not mismatches else "✗"
+    print(f"{status} {label}: snapshot matches SQL on {len(URLS) - len(mismatches)}/{len(URLS)} endpoints")
+    for url in mismatches:
+        print(f"    mismatch: {url}")
+
+def write_some(count: int, rng: random.Random):
+    """Create, update and delete incidents through the ORM."""
+    session = SessionLocal()
+    try:
+        for i in range(count):
+            session.add(Incident(source="user", **incident_payload(i, rng)))
+        ids = [row[0] for row in session.query(Incident.id).order_by(Incident.id.desc()).limit(count * 3)]
+        for incident in session.query(Incident).filter(Incident.id.in_(ids[count:count * 2])):
+            incident.status = rng.choice(["confirmed", "resolved"])
+        for incident in session.query(Incident).filter(Incident.id.in_(ids[count * 2:])):
+            session.delete(incident)
+        session.commit()
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    seed_incidents(ROWS)
+    response_cache.backend = NullBackend()  # measure the computation, not the cache
+    client = app.test_client()
+    Config.ANALYTICS_SNAPSHOT = True
+    snapshot = get_snapshot()
+
+    print_header("LOAD")
+    session = SessionLocal()
+    _, elapsed = timed(snapshot.refresh, session)
+    stats = snapshot.stats()
+    print(f"full load:            {elapsed:.2f}s ({stats['rows']:,} rows)")
+    print(f"memory:               {stats['allocated_bytes'] / 1e6:.1f} MB allocated, "
+          f"{stats['bytes_per_million_rows'] / 1e6:.0f} MB per million rows")
+    _, elapsed = timed(snapshot.refresh, session)
+    print(f"no-op refresh:        {elapsed * 1000:.2f}ms")
+    session.close()
+
+    print_header("CORRECTNESS")
+    check(client, "after load")
+    write_some(WRITES, random.Random(7))
+    session = SessionLocal()
+    _, elapsed = timed(snapshot.refresh, session)
+    session.close()
+    print(f"  incremental refresh after {WRITES} creates/updates/deletes: {elapsed * 1000:.1f}ms")
+    check(client, "after writes")
+
+    print_header(f"LATENCY ({REPEAT} runs)")
+    for url in URLS:
+        Config.ANALYTICS_SNAPSHOT = False
+        sql = [timed(client.get, url)[1] for _ in range(REPEAT)]
+        Config.ANALYTICS_SNAPSHOT = True
+        numpy = [timed(client.get, url)[1] for _ in range(REPEAT)]
+        print(url)
+        print(f"  sql:      {latency_summary(sql)}")
+        print(f"  snapshot: {latency_summary(numpy)}")
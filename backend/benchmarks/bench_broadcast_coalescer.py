@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Socket.IO broadcast coalescing under an ingest burst: one packet per
+incident event versus batched ``incident_batch`` messages, for thousands of
+simulated clients of which a few are slow readers.
+
+The burst is a news ingest that creates a few hundred incidents and then
+updates many of them again. Packets are counted at the Engine.IO send call
+(see bench_socket_fanout); slow clients report a full send queue so the
+backpressure path is exercised.
+"""
+import os
+import random
+import time
+from benchmarks.common import print_header, CATEGORIES, SOURCES, STATUSES
+from benchmarks.bench_socket_fanout import CountingServer, build_server
+
+from services.broadcast import BroadcastCoalescer
+from services.incident_events import merge_events, event_rooms, event_payload, BATCH_EVENT
+from services.realtime import init_realtime, room_subscribers
+
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "5000"))
+INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "500"))
+UPDATES = int(os.getenv("BENCH_UPDATES", "1000"))
+SLOW_FRACTION = float(os.getenv("BENCH_SLOW_FRACTION", "0.02"))
+MAX_BATCH = int(os.getenv("BENCH_MAX_BATCH", "200"))
+
+def burst(rng: random.Random):
+    """Creates followed by status/title updates to the same incidents."""
+    events, current = [], {}
+    for i in range(INCIDENTS):
+        values = {"category": rng.choice(CATEGORIES), "source": rng.choice(SOURCES), "status": "reported"}
+        current[i] = values
+        events.append({"op": "created", "id": i, "data": {**values, "title": f"Incident {i}"},
+                       "rooms": {field: {value} for field, value in values.items()}})
+    for _ in range(UPDATES):
+        i = rng.randrange(INCIDENTS)
+        old = current[i]["status"]
+        new = rng.choice(STATUSES)
+        current[i]["status"] = new
+        rooms = {field: {value} for field, value in current[i].items()}
+        rooms["status"].add(old)
+        events.append({"op": "updated", "id": i, "changes": {"status": new}, "rooms": rooms})
+    return events
+
+def coalescer(server: CountingServer, slow: set, window_seconds: float, max_batch: int) -> BroadcastCoalescer:
+    return BroadcastCoalescer(
+        BATCH_EVENT, merge=merge_events, rooms=event_rooms, payload=event_payload,
+        window_seconds=window_seconds, max_batch=max_batch,
+        emit=lambda event, data, room=None: server.emit(event, data, to=room),
+        subscribers=room_subscribers,
+        client_queued=lambda eio_sid: 1000 if eio_sid in slow else 0,
+    )
+
+if __name__ == "__main__":
+    rng = random.Random(9)
+    events = burst(rng)
+    server = build_server(CLIENTS, rng)
+    # the realtime helpers read rooms from ``socketio.server`` like Flask-SocketIO's wrapper
+    server.server = server
+    init_realtime(server)
+    eio_sids = [f"eio-{i}" for i in range(CLIENTS)]
+    slow = set(rng.sample(eio_sids, int(CLIENTS * SLOW_FRACTION)))
+
+    print_header(f"{CLIENTS:,} CLIENTS ({len(slow)} slow), BURST OF {len(events):,} EVENTS")
+
+    # one message per event, as without coalescing
+    per_event = coalescer(server, set(), window_seconds=0, max_batch=1)
+    server.sent = 0
+    started = time.perf_counter()
+    for incident_event in events:
+        per_event.submit([incident_event])
+    per_event_time = time.perf_counter() - started
+    per_event_sent = server.sent
+
+    # the whole burst lands within one window
+    batched = coalescer(server, slow, window_seconds=60, max_batch=MAX_BATCH)
+    server.sent = 0
+    started = time.perf_counter()
+    batched.submit(events)
+    submit_time = time.perf_counter() - started
+    batched.flush()
+    batched_time = time.perf_counter() - started
+    batched_sent = server.sent
+    stats = batched.stats()
+
+    # slow clients catch up
+    slow.clear()
+    server.sent = 0
+    batched.flush()
+    drained_sent = server.sent
+
+    print(f"per-event emit:   {per_event_time * 1000:8.1f} ms  {per_event_sent:9,} packets")
+    print(f"coalesced:        {batched_time * 1000:8.1f} ms  {batched_sent:9,} packets"
+          f"  (submit {submit_time * 1000:.1f} ms)")
+    print(f"merged events:    {stats['merged']:,} of {stats['submitted']:,} "
+          f"({stats['submitted'] - stats['merged']:,} left to send)")
+    print(f"flush latency:    {stats['flush_ms']['max']:.1f} ms  batches {stats['batches']}")
+    print(f"slow clients:     {stats['slow_clients']} held, {stats['held_events']:,} events held, "
+          f"{stats['resyncs']} resyncs; {drained_sent:,} packets once drained")
+    print(f"speedup:          {per_event_time / batched_time:.1f}x, "
+          f"{per_event_sent / max(batched_sent + drained_sent, 1):.1f}x fewer packets")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Throughput of POST/PATCH /incidents/bulk against the single-item endpoints.
+"""
+from benchmarks.common import print_header, incident_payload, timed
+
+from app import app
+
+ITEMS = 500
+
+def run_single(client, payloads):
+    for payload in payloads:
+        assert client.post("/incidents", json=payload).status_code == 201
+
+def run_single_updates(client, ids):
+    for incident_id in ids:
+        assert client.put(f"/incidents/{incident_id}", json={"status": "confirmed"}).status_code == 200
+
+if __name__ == "__main__":
+    app.config['BULK_MAX_ITEMS'] = ITEMS
+    client = app.test_client()
+    payloads = [incident_payload(i) for i in range(ITEMS)]
+
+    print_header(f"CREATE {ITEMS} INCIDENTS")
+    _, single = timed(run_single, client, payloads)
+    response, bulk = timed(client.post, "/incidents/bulk", json={"incidents": payloads})
+    assert response.status_code == 201, response.json
+    ids = response.json["ids"]
+    print(f"single POST /incidents:     {single:.3f}s  ({ITEMS / single:,.0f} items/s)")
+    print(f"POST /incidents/bulk:       {bulk:.3f}s  ({ITEMS / bulk:,.0f} items/s)")
+    print(f"speedup: {single / bulk:.1f}x")
+
+    print_header(f"UPDATE {ITEMS} INCIDENTS")
+    _, single = timed(run_single_updates, client, ids)
+    response, bulk = timed(client.patch, "/incidents/bulk",
+                           json={"incidents": [{"id": i, "status": "resolved"} for i in ids]})
+    assert response.status_code == 200, response.json
+    print(f"single PUT /incidents/<id>: {single:.3f}s  ({ITEMS / single:,.0f} items/s)")
+    print(f"PATCH /incidents/bulk:      {bulk:.3f}s  ({ITEMS / bulk:,.0f} items/s)")
+    print(f"speedup: {single / bulk:.1f}x")
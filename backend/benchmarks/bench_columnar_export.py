@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Columnar export: Parquet / Arrow IPC throughput and size against NDJSON.
+"""
+import os
+import resource
+from benchmarks.common import print_header, seed_incidents, timed, WORK_DIR
+
+from app import app
+from utils.db import SessionLocal
+from services.export import iter_incident_rows, write_columnar, ndjson_lines
+
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+
+def export_ndjson(path):
+    session = SessionLocal()
+    try:
+        with open(path, "w") as f:
+            for chunk in ndjson_lines(iter_incident_rows(session, batch_size=app.config['EXPORT_BATCH_SIZE'])):
+                f.write(chunk)
+    finally:
+        session.close()
+
+def export_columnar(path, fmt):
+    session = SessionLocal()
+    try:
+        rows = iter_incident_rows(session, batch_size=app.config['EXPORT_BATCH_SIZE'])
+        return write_columnar(rows, path, fmt, app.config['EXPORT_COLUMNAR_BATCH_SIZE'])
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    _, elapsed = timed(seed_incidents, ROWS)
+    print(f"seeded in {elapsed:.1f}s")
+
+    print_header("EXPORT")
+    path = os.path.join(WORK_DIR, "incidents.ndjson")
+    _, elapsed = timed(export_ndjson, path)
+    print(f"ndjson:  {elapsed:6.2f}s  {ROWS / elapsed:>10,.0f} rows/s  {os.path.getsize(path) / 1e6:8.1f} MB")
+
+    for fmt, ext in (("parquet", "parquet"), ("arrow", "arrow")):
+        path = os.path.join(WORK_DIR, f"incidents.{ext}")
+        written, elapsed = timed(export_columnar, path, fmt)
+        assert written == ROWS
+        print(f"{fmt + ':':8} {elapsed:6.2f}s  {ROWS / elapsed:>10,.0f} rows/s  {os.path.getsize(path) / 1e6:8.1f} MB")
+
+    print(f"\npeak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
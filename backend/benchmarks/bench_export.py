@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Streaming export: time to first byte, throughput and peak Python heap.
+"""
+import os
+import time
+import tracemalloc
+from benchmarks.common import print_header, seed_incidents
+
+from app import app
+
+ROWS = int(os.getenv("BENCH_ROWS", "200000"))
+
+def measure(client, url):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(url)
+    chunks = iter(response.response)
+    first = next(chunks)
+    first_byte = time.perf_counter() - started
+    size = len(first)
+    for chunk in chunks:
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return first_byte, elapsed, size, peak
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    seed_incidents(ROWS)
+    client = app.test_client()
+
+    for fmt in ("ndjson", "csv"):
+        print_header(f"EXPORT format={fmt}")
+        first_byte, elapsed, size, peak = measure(client, f"/incidents/export?format={fmt}")
+        print(f"first byte: {first_byte * 1000:.1f}ms")
+        print(f"total:      {elapsed:.2f}s  ({ROWS / elapsed:,.0f} rows/s, {size / 1e6:.1f} MB)")
+        print(f"peak heap:  {peak / 1e6:.1f} MB")
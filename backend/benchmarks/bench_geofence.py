@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Geofence matching: 100k watched areas around one metro region and a burst
+of incidents. Compares the grid index with checking every subscription,
+verifies both return the same matches, then times an ORM commit burst that
+writes the notification outbox in the same flush.
+"""
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from benchmarks.common import print_header, incident_payload, CATEGORIES
+from utils.db import SessionLocal, Base, engine
+from utils.geo import circle_bbox, polygon_bbox
+import models  # noqa: F401  (register every table)
+import models.media  # noqa: F401
+from models.user import User
+from models.incident import Incident
+from models.alert_subscription import AlertSubscription
+from models.alert_notification import AlertNotification
+from services.geofence import geofence_index, Geofence, GeofenceIndex
+
+SUBSCRIPTIONS = int(os.getenv("BENCH_SUBSCRIPTIONS", "100000"))
+INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "5000"))
+SCAN_SAMPLE = int(os.getenv("BENCH_SCAN_SAMPLE", "200"))
+COMMITS = int(os.getenv("BENCH_COMMITS", "1000"))
+POLYGON_SHARE = 0.1
+# a ~110 km square metro area
+REGION = (12.5, 79.7)
+REGION_DEGREES = 1.0
+
+def make_subscription(i: int, rng: random.Random) -> dict:
+    lat = REGION[0] + rng.random() * REGION_DEGREES
+    lon = REGION[1] + rng.random() * REGION_DEGREES
+    categories = rng.sample(CATEGORIES, 3) if rng.random() < 0.3 else None
+    if rng.random() < POLYGON_SHARE:
+        size = 0.005 + rng.random() * 0.03
+        polygon = [[lat + size * math.sin(a), lon + size * math.cos(a)]
+                   for a in (k * 2 * math.pi / 6 + rng.random() * 0.5 for k in range(6))]
+        bbox = polygon_bbox(polygon)
+        return {"user_id": 1 + i % 5000, "polygon": polygon, "categories": categories,
+                "latitude": None, "longitude": None, "radius_m": None,
+                "min_lat": bbox[0], "min_lon": bbox[1], "max_lat": bbox[2], "max_lon": bbox[3]}
+    radius = 500 + rng.random() * 4500
+    if rng.random() < 0.01:
+        radius = 20000 + rng.random() * 30000  # a few region-wide watchers
+    bbox = circle_bbox(lat, lon, radius)
+    return {"user_id": 1 + i % 5000, "latitude": lat, "longitude": lon, "radius_m": radius,
+            "polygon": None, "categories": categories,
+            "min_lat": bbox[0], "min_lon": bbox[1], "max_lat": bbox[2], "max_lon": bbox[3]}
+
+def linear_match(fences, latitude, longitude, category):
+    return [fence for fence in fences
+            if (fence.categories is None or category in fence.categories)
+            and fence.contains(latitude, longitude)]
+
+if __name__ == "__main__":
+    rng = random.Random(11)
+    Base.metadata.create_all(bind=engine)
+    print_header(f"SEEDING {SUBSCRIPTIONS:,} SUBSCRIPTIONS")
+    # created over the last day, so the incremental refresh below only sees the new changes
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = []
+    for i in range(SUBSCRIPTIONS):
+        created_at = now - timedelta(seconds=86400 * (SUBSCRIPTIONS - i) / SUBSCRIPTIONS)
+        rows.append({**make_subscription(i, rng), "created_at": created_at, "updated_at": created_at})
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"username": f"watcher{i}", "email": f"watcher{i}@example.com", "password_hash": "x"}
+            for i in range(1, 5001)
+        ])
+        for start in range(0, len(rows), 5000):
+            conn.execute(AlertSubscription.__table__.insert(), rows[start:start + 5000])
+
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        geofence_index.refresh(conn, force=True)
+        build = time.perf_counter() - started
+    print(f"index load: {build * 1000:.0f} ms  {geofence_index.stats()}", flush=True)
+
+    points = []
+    for i in range(INCIDENTS):
+        payload = incident_payload(i, rng)
+        payload["latitude"] = REGION[0] + rng.random() * REGION_DEGREES
+        payload["longitude"] = REGION[1] + rng.random() * REGION_DEGREES
+        points.append(payload)
+    print_header(f"MATCHING {INCIDENTS:,} INCIDENTS")
+    started = time.perf_counter()
+    indexed = [geofence_index.match(p["latitude"], p["longitude"], p["category"]) for p in points]
+    index_us = (time.perf_counter() - started) / INCIDENTS * 1e6
+
+    fences = list(geofence_index._fences.values())
+    sample = points[:SCAN_SAMPLE]
+    started = time.perf_counter()
+    scanned = [linear_match(fences, p["latitude"], p["longitude"], p["category"]) for p in sample]
+    scan_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    for got, expected in zip(indexed, scanned):
+        assert sorted(f.id for f in got) == sorted(f.id for f in expected), "index and scan disagree"
+    matches = sum(len(m) for m in indexed)
+    print(f"grid index:  {index_us:10.1f} us/incident  ({matches / INCIDENTS:.1f} matches/incident)")
+    print(f"linear scan: {scan_us:10.1f} us/incident  (sample of {len(sample)}, identical matches)")
+    print(f"speedup:     {scan_us / index_us:10.1f}x")
+
+    # a second process's index catches up on only the changed rows
+    other = GeofenceIndex(cell_degrees=geofence_index.cell_sizes[0])
+    with engine.connect() as conn:
+        other.refresh(conn, force=True)
+        session = SessionLocal()
+        for subscription in session.query(AlertSubscription).limit(100):
+            subscription.is_active = False
+        session.commit()
+        session.close()
+        started = time.perf_counter()
+        other.refresh(conn, force=True)
+        print(f"incremental refresh after 100 deletes: {(time.perf_counter() - started) * 1000:.1f} ms, "
+              f"{len(other):,} active")
+
+    print_header(f"COMMITTING {COMMITS:,} INCIDENTS IN BATCHES OF 100")
+    session = SessionLocal()
+    started = time.perf_counter()
+    for start in range(0, COMMITS, 100):
+        for p in points[start:start + 100]:
+            session.add(Incident(source="user", **p))
+        session.commit()
+    elapsed = time.perf_counter() - started
+    written = session.query(AlertNotification).count()
+    session.close()
+    print(f"{elapsed / COMMITS * 1000:.3f} ms/incident including outbox writes, {written:,} notifications")
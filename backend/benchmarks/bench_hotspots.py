@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Hotspot detector: per-event update cost as the number of tracked cells and
+the time gaps between events grow (it should stay flat), plus detection of
+an injected burst.
+"""
+import os
+import random
+import time
+from benchmarks.common import print_header, CATEGORIES
+
+from services.hotspots import HotspotDetector
+
+EVENTS = int(os.getenv("BENCH_EVENTS", "200000"))
+
+def run(cells: int, events: int, span_hours: float, seed: int = 1):
+    rng = random.Random(seed)
+    points = [(13.0 + rng.random() * 2, 80.0 + rng.random() * 2) for _ in range(cells)]
+    detector = HotspotDetector(max_cells=cells * len(CATEGORIES))
+    step = span_hours * 3600 / events
+    stream = [(*rng.choice(points), rng.choice(CATEGORIES), i * step) for i in range(events)]
+
+    started = time.perf_counter()
+    for latitude, longitude, category, timestamp in stream:
+        detector.record(latitude, longitude, category, timestamp)
+    elapsed = time.perf_counter() - started
+    return elapsed / events * 1e6, detector
+
+if __name__ == "__main__":
+    print_header(f"PER-EVENT COST ({EVENTS:,} events)")
+    for cells in (100, 1000, 10000):
+        for span_hours in (1, 24, 24 * 30):
+            per_event, detector = run(cells, EVENTS, span_hours)
+            stats = detector.stats()
+            print(f"cells={cells:>6} span={span_hours:>4}h  {per_event:6.2f} µs/event  "
+                  f"tracked={stats['cells']:>6} active={stats['active']}")
+
+    print_header("BURST DETECTION")
+    detector = HotspotDetector()
+    rng = random.Random(2)
+    # a day of background noise over a city, then 10 fires in one block within 20 minutes
+    for i in range(5000):
+        detector.record(13.0 + rng.random(), 80.0 + rng.random(), rng.choice(CATEGORIES), i * 17.28)
+    fired = None
+    for i in range(10):
+        fired = detector.record(13.0827, 80.2707, "fire", 86400 + i * 120) or fired
+    status = "✓" if fired and fired["geohash"] == "tf346t" else "✗"
+    print(f"{status} burst detected: {fired}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+GET /media/images/<filename>?w=&h=&fmt= against a threaded server.
+
+1. Bytes and latency of the original vs a 320px card image: first request
+   (rendered) and later requests (from the disk cache).
+2. A burst of concurrent requests for one copy that is not cached yet:
+   how many renders it costs.
+3. A cache budget smaller than the working set: bytes on disk stay bounded.
+"""
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from benchmarks.common import print_header, latency_summary
+
+os.environ.setdefault("MEDIA_RESIZE_CACHE_BYTES", str(1024 * 1024))  # small, to show eviction
+import requests
+from werkzeug.serving import make_server
+from app import app
+from config import Config
+from services.image_resizer import image_resizer
+from benchmarks.bench_thumbnails import photo
+
+PHOTOS = int(os.getenv("BENCH_PHOTOS", "8"))
+BURST = int(os.getenv("BENCH_BURST", "16"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "200"))
+
+def fetch(http, url: str):
+    started = time.perf_counter()
+    response = http.get(url)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, (url, response.status_code)
+    return elapsed, len(response.content)
+
+if __name__ == "__main__":
+    images = Path(Config.UPLOAD_FOLDER) / "images"
+    images.mkdir(parents=True, exist_ok=True)
+    names = []
+    for i in range(PHOTOS):
+        names.append(f"photo{i}.jpg")
+        photo(i, (4032, 3024)).save(images / names[-1], "JPEG", quality=90)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/media/images"
+    http = requests.Session()
+
+    print_header(f"RESIZED IMAGES, {PHOTOS} photos 4032x3024, {os.cpu_count()} CPUs")
+    original = [fetch(http, f"{url}/{name}") for name in names]
+    first = [fetch(http, f"{url}/{name}?w=320&fmt=webp") for name in names]
+    cached = [fetch(http, f"{url}/{names[i % PHOTOS]}?w=320&fmt=webp") for i in range(REQUESTS)]
+    for label, samples in (("original", original), ("w=320 first request", first), ("w=320 cached", cached)):
+        print(f"{label:<20} {sum(size for _, size in samples) / len(samples) / 1024:8.1f} KB  "
+              f"{latency_summary([elapsed for elapsed, _ in samples])}")
+
+    renders = image_resizer.renders
+    results = []
+    def request_copy():
+        results.append(fetch(requests.Session(), f"{url}/{names[0]}?w=960&h=960&fmt=jpeg"))
+    burst = [threading.Thread(target=request_copy) for _ in range(BURST)]
+    for thread in burst:
+        thread.start()
+    for thread in burst:
+        thread.join()
+    stats = image_resizer.cache.stats()
+    print(f"burst of {BURST} concurrent requests for one new copy: {image_resizer.renders - renders} render(s), "
+          f"{stats['collapsed']} waited for it; {latency_summary([elapsed for elapsed, _ in results])}")
+
+    sizes = [size for size in sorted(image_resizer.sizes) if size >= 160]
+    for name in names:
+        for size in sizes:
+            fetch(http, f"{url}/{name}?w={size}&fmt=jpeg")
+    on_disk = sum(path.stat().st_size for path in image_resizer.cache.directory.iterdir())
+    stats = image_resizer.cache.stats()
+    print(f"{PHOTOS * len(sizes)} more copies with a {stats['max_bytes'] / 2**20:.0f} MB budget: "
+          f"{stats['entries']} cached, {on_disk / 2**20:.1f} MB on disk, {stats['evictions']} evicted")
+    render_ms = image_resizer.stats()["render_ms"]
+    print(f"render p50 {render_ms['p50']} ms, p99 {render_ms['p99']} ms")
+    server.shutdown()
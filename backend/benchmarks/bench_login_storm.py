@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+GET /incidents latency while a storm of POST /auth/login requests hits the
+same threaded server.
+
+1. No logins (baseline).
+2. bcrypt on the request threads, unbounded (how logins used to run).
+3. bcrypt in the worker pool (PASSWORD_HASH_WORKERS processes at lowered
+   priority, at most PASSWORD_HASH_MAX_PENDING queued; the rest get 503).
+"""
+import os
+import threading
+import time
+import logging
+from benchmarks.common import print_header, latency_summary, seed_incidents
+
+os.environ.setdefault("CACHE_BACKEND", "none")  # every read goes to the database
+import requests
+from werkzeug.serving import make_server
+from app import app
+from utils.db import SessionLocal
+import models.user  # the routes hash through models.user.password_hasher
+from models.user import User
+from services.passwords import PasswordHasher, password_hasher
+
+SECONDS = float(os.getenv("BENCH_SECONDS", "10"))
+LOGIN_CLIENTS = int(os.getenv("BENCH_LOGIN_CLIENTS", "16"))
+INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "5000"))
+
+def storm(url: str, stop: threading.Event, results: dict, lock: threading.Lock):
+    http = requests.Session()
+    while not stop.is_set():
+        status = http.post(f"{url}/auth/login", json={"username": "storm", "password": "storm-password"}).status_code
+        with lock:
+            results[status] = results.get(status, 0) + 1
+
+def run(url: str, hasher: PasswordHasher, login_clients: int):
+    models.user.password_hasher = hasher
+    stop = threading.Event()
+    results, lock = {}, threading.Lock()
+    clients = [threading.Thread(target=storm, args=(url, stop, results, lock), daemon=True)
+               for _ in range(login_clients)]
+    for client in clients:
+        client.start()
+    time.sleep(0.5 if login_clients else 0)
+
+    http = requests.Session()
+    samples = []
+    deadline = time.monotonic() + SECONDS
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = http.get(f"{url}/incidents?per_page=20")
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        time.sleep(0.02)
+    stop.set()
+    for client in clients:
+        client.join()
+    logins = ", ".join(f"{count} x {status}" for status, count in sorted(results.items()))
+    return samples, logins
+
+if __name__ == "__main__":
+    seed_incidents(INCIDENTS)
+    session = SessionLocal()
+    user = User(username="storm", email="storm@example.com")
+    user.set_password("storm-password")
+    session.add(user)
+    session.commit()
+    session.close()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    print_header(f"GET /incidents DURING A LOGIN STORM ({LOGIN_CLIENTS} clients, {SECONDS:.0f}s, "
+                 f"cost {password_hasher.rounds}, {os.cpu_count()} CPUs)")
+    inline = PasswordHasher(rounds=password_hasher.rounds, workers=0, max_pending=10_000)
+    samples, _ = run(url, inline, 0)
+    print(f"no logins:                {latency_summary(samples)}")
+    samples, logins = run(url, inline, LOGIN_CLIENTS)
+    print(f"bcrypt on request thread: {latency_summary(samples)}")
+    print(f"  logins: {logins}")
+    samples, logins = run(url, password_hasher, LOGIN_CLIENTS)
+    print(f"bcrypt in worker pool:    {latency_summary(samples)}")
+    print(f"  logins: {logins}")
+    stats = password_hasher.stats()
+    print(f"  pool: {stats['workers']} workers, {stats['rejected']} rejected at {stats['max_pending']} pending, "
+          f"hash p50 {stats['hash_ms']['p50']} ms p99 {stats['hash_ms']['p99']} ms")
+    server.shutdown()
+    password_hasher.shutdown()
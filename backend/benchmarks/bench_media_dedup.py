@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Content-addressed uploads: reports where several people send the same photo.
+
+Reports disk use against bytes uploaded, how many images were processed vs
+reused from an identical upload, and the cost of hashing while saving
+(FileHandler.save_file vs a plain FileStorage.save).
+"""
+import io
+import os
+import random
+import time
+from pathlib import Path
+from benchmarks.common import print_header, incident_payload, latency_summary
+
+os.environ["MEDIA_PROCESSING"] = "sync"
+from werkzeug.datastructures import FileStorage
+from app import app
+from config import Config
+from utils.file_handler import FileHandler
+from services.media_processing import media_processor
+from benchmarks.bench_thumbnails import photo
+
+REPORTS = int(os.getenv("BENCH_REPORTS", "40"))
+DISTINCT = int(os.getenv("BENCH_DISTINCT_PHOTOS", "10"))
+
+def folder_bytes(folder: Path) -> int:
+    return sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+
+if __name__ == "__main__":
+    corpus = []
+    for seed in range(DISTINCT):
+        out = io.BytesIO()
+        photo(seed, (4032, 3024)).save(out, "JPEG", quality=90)
+        corpus.append(out.getvalue())
+    upload_folder = Path(Config.UPLOAD_FOLDER)
+    handler = FileHandler()
+    print_header(f"{REPORTS} REPORTS SHARING {DISTINCT} DISTINCT PHOTOS "
+                 f"(~{sum(map(len, corpus)) / len(corpus) / 1e6:.1f} MB each)")
+
+    plain, hashed = [], []
+    for i, data in enumerate(corpus * 3):
+        target = upload_folder / "tmp" / f"plain{i}.jpg"
+        started = time.perf_counter()
+        FileStorage(io.BytesIO(data), "photo.jpg").save(str(target))
+        plain.append(time.perf_counter() - started)
+        target.unlink()
+        started = time.perf_counter()
+        info = handler.save_file(FileStorage(io.BytesIO(data), "photo.jpg"), "image")
+        hashed.append(time.perf_counter() - started)
+        handler.discard_upload(info)
+    print(f"FileStorage.save:     {latency_summary(plain)}")
+    print(f"save_file (sha256):   {latency_summary(hashed)}")
+
+    rng = random.Random(7)
+    client = app.test_client()
+    uploaded = 0
+    samples = []
+    for i in range(REPORTS):
+        data = rng.choice(corpus)
+        uploaded += len(data)
+        form = {key: str(value) for key, value in incident_payload(i).items()}
+        form["media"] = (io.BytesIO(data), f"IMG_{i:04d}.jpg")
+        started = time.perf_counter()
+        response = client.post("/incidents", data=form, content_type="multipart/form-data")
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 201, response.get_json()
+    stats = media_processor.stats()
+    print(f"POST /incidents:      {latency_summary(samples)}")
+    print(f"uploaded {uploaded / 1e6:.1f} MB; originals on disk {folder_bytes(upload_folder / 'images') / 1e6:.1f} MB "
+          f"({len(list((upload_folder / 'images').iterdir()))} files), thumbnails and variants "
+          f"{(folder_bytes(upload_folder / 'thumbnails') + folder_bytes(upload_folder / 'variants')) / 1e6:.2f} MB")
+    print(f"images processed {stats['processed'] - stats['reused']}, reused from an identical upload {stats['reused']}")
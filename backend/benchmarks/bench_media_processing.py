@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Report submission (POST /incidents with one phone-sized photo) with image
+processing inside the request (MEDIA_PROCESSING=sync) and on the background
+queue (MEDIA_PROCESSING=queue), plus how long queued photos take to become
+ready.
+"""
+import io
+import os
+import random
+import time
+from datetime import datetime, timezone
+from benchmarks.common import print_header, incident_payload, latency_summary
+
+os.environ["MEDIA_PROCESSING"] = "queue"
+from PIL import Image, ImageDraw, ExifTags
+from sqlalchemy import func
+from app import app
+from utils.db import SessionLocal
+from models.media import Media
+from services.media_processing import media_processor
+
+REPORTS = int(os.getenv("BENCH_REPORTS", "20"))
+WIDTH, HEIGHT = (int(v) for v in os.getenv("BENCH_PHOTO_SIZE", "4032x3024").split("x"))
+TIMEOUT = float(os.getenv("BENCH_TIMEOUT", "300"))
+
+def photo(seed: int) -> bytes:
+    """A JPEG roughly like a phone photo: smooth areas, edges, sensor noise and EXIF."""
+    rng = random.Random(seed)
+    img = Image.linear_gradient("L").resize((WIDTH, HEIGHT)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        draw.rectangle((x, y, x + rng.randrange(50, 800), y + rng.randrange(50, 600)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise((WIDTH, HEIGHT), 12).convert("RGB")
+    img = Image.blend(img, noise, 0.15)
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "BenchPhone"
+    exif[ExifTags.Base.Model] = "12 MP"
+    exif[ExifTags.Base.DateTime] = "2026:10:19 08:30:00"
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90, exif=exif)
+    return out.getvalue()
+
+def submit(client, corpus, count: int, offset: int):
+    samples = []
+    for i in range(count):
+        data = {key: str(value) for key, value in incident_payload(offset + i).items()}
+        data["media"] = (io.BytesIO(corpus[i % len(corpus)]), f"photo{offset + i}.jpg")
+        started = time.perf_counter()
+        response = client.post("/incidents", data=data, content_type="multipart/form-data")
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 201, response.get_json()
+    return samples
+
+def pending() -> int:
+    session = SessionLocal()
+    try:
+        return session.query(func.count(Media.id)).filter(Media.processing_status.in_(("pending", "processing"))).scalar()
+    finally:
+        session.close()
+
+def ready_lag(after_id: int):
+    """Seconds from upload to ready for the media rows after ``after_id``."""
+    session = SessionLocal()
+    try:
+        rows = session.query(Media.created_at, Media.processed_at).filter(Media.id > after_id).all()
+    finally:
+        session.close()
+    aware = lambda value: value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return [(aware(done) - aware(created)).total_seconds() for created, done in rows if done]
+
+if __name__ == "__main__":
+    corpus = [photo(seed) for seed in range(4)]
+    client = app.test_client()
+    print_header(f"POST /incidents WITH ONE {WIDTH}x{HEIGHT} PHOTO "
+                 f"(~{sum(map(len, corpus)) / len(corpus) / 1e6:.1f} MB), x{REPORTS}, {os.cpu_count()} CPUs")
+    submit(client, corpus, 2, 0)  # warm up
+    media_processor.stop()
+    deadline = time.monotonic() + TIMEOUT
+    while pending() and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    app.config["MEDIA_PROCESSING"] = "sync"
+    sync = submit(client, corpus, REPORTS, 100)
+    print(f"processed in the request: {latency_summary(sync)}")
+
+    app.config["MEDIA_PROCESSING"] = "queue"
+    session = SessionLocal()
+    last_id = session.query(func.max(Media.id)).scalar()
+    session.close()
+    started = time.perf_counter()
+    queued = submit(client, corpus, REPORTS, 200)
+    print(f"queued:                   {latency_summary(queued)}")
+    while pending() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    drained = time.perf_counter() - started
+    lag = ready_lag(last_id)
+    print(f"queue drained {drained:.1f}s after the first submission; upload to ready "
+          f"p50={sorted(lag)[len(lag) // 2]:.1f}s max={max(lag):.1f}s")
+    stats = media_processor.stats()
+    print(f"processor: {stats['processed']} ready, {stats['failed']} failed, "
+          f"{stats['process_ms']['p50']} ms per photo (p50)")
+    media_processor.stop()
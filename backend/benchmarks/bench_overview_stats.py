@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+/stats/overview: query count and latency of the rollup implementation,
+checked against the original per-day COUNT implementation.
+"""
+import os
+import threading
+from datetime import timedelta
+from sqlalchemy import event, func, and_
+from benchmarks.common import print_header, seed_incidents, timed, latency_summary
+
+from app import app
+from utils.db import engine, SessionLocal
+from utils.cache import response_cache, NullBackend
+from models.incident import Incident
+from routes.stats import _overview_payload, _stats_now
+
+ROWS = int(os.getenv("BENCH_ROWS", "500000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+def _label(entry):
+    return str(entry.get("status", entry.get("category")))
+
+def legacy_overview(session, now):
+    """The original implementation: 11 separate aggregates."""
+    total = session.query(func.count(Incident.id)).scalar()
+    status = session.query(Incident.status, func.count(Incident.id)).group_by(Incident.status).all()
+    category = session.query(Incident.category, func.count(Incident.id)).group_by(Incident.category).all()
+    recent = session.query(func.count(Incident.id)).filter(
+        Incident.created_at >= now - timedelta(hours=24)).scalar()
+    weekly = []
+    for i in range(7):
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=i)
+        count = session.query(func.count(Incident.id)).filter(
+            and_(Incident.created_at >= day_start, Incident.created_at < day_start + timedelta(days=1))).scalar()
+        weekly.append({"date": day_start.strftime("%Y-%m-%d"), "count": count})
+    return {
+        "total_incidents": total,
+        "recent_incidents_24h": recent,
+        "status_breakdown": sorted([{"status": s, "count": c} for s, c in status], key=_label),
+        "category_breakdown": sorted([{"category": k, "count": c} for k, c in category], key=_label),
+        "weekly_trend": list(reversed(weekly)),
+    }
+
+class QueryCounter:
+    """Counts statements run by this thread (the test client serves requests inline).
+
+    Background threads started with the app (webhook dispatcher, media sweeper)
+    share the engine; their polling queries are not the endpoint's.
+    """
+    def __init__(self):
+        self.count = 0
+        self.thread = threading.get_ident()
+
+    def __call__(self, *args):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    seed_incidents(ROWS, days=30)
+    response_cache.backend = NullBackend()  # measure the database path
+    client = app.test_client()
+
+    print_header("QUERY COUNT")
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    payload = client.get("/stats/overview").json
+    event.remove(engine, "before_cursor_execute", counter)
+    # 1 ETag validator + 2 rollup queries + the 24h range count
+    status = "✓" if counter.count <= 4 else "✗"
+    print(f"{status} /stats/overview issued {counter.count} queries (validator included)")
+
+    session = SessionLocal()
+    now = _stats_now()
+    expected = legacy_overview(session, now)
+    payload["status_breakdown"] = sorted(payload["status_breakdown"], key=_label)
+    payload["category_breakdown"] = sorted(payload["category_breakdown"], key=_label)
+    status = "✓" if payload == expected else "✗"
+    print(f"{status} results match the original implementation")
+
+    print_header(f"LATENCY ({REPEAT} runs)")
+    legacy = [timed(legacy_overview, session, now)[1] for _ in range(REPEAT)]
+    rollup = [timed(_overview_payload, session, now)[1] for _ in range(REPEAT)]
+    endpoint = [timed(client.get, "/stats/overview")[1] for _ in range(REPEAT)]
+    session.close()
+    print(f"original (11 queries):   {latency_summary(legacy)}")
+    print(f"rollups (3 queries):     {latency_summary(rollup)}")
+    print(f"endpoint (+ validator):  {latency_summary(endpoint)}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cost of the rate limiter's before_request hook, per request:
+
+1. an endpoint without a rule,
+2. a limited endpoint, anonymous (bucket per client IP),
+3. a limited endpoint with a JWT (bucket per subject, token seen before),
+4. the same through the Redis backend (fakeredis unless BENCH_REDIS_URL is
+   set; a real server adds a network round trip instead).
+
+Then a burst of logins from one client, which should be cut off at the
+configured limit with 429 and Retry-After.
+"""
+import os
+import time
+
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ.setdefault("RATE_LIMITS", "auth.login=10/60,stats.*=300/60")
+from benchmarks.common import print_header
+from flask_jwt_extended import create_access_token
+from app import app
+from utils.ratelimit import RateLimiter, RedisBackend, parse_rate_limits, rate_limiter
+
+CHECKS = int(os.getenv("BENCH_CHECKS", "100000"))
+LIMITS = parse_rate_limits("stats.*=1000000000/1")  # never runs out, so every check takes a token
+
+def per_request_us(limiter: RateLimiter, path: str, headers=None, remote_addr="10.0.0.1") -> float:
+    with app.test_request_context(path, headers=headers, environ_base={"REMOTE_ADDR": remote_addr}):
+        hook = limiter.before_request
+        assert hook() is None
+        started = time.perf_counter()
+        for _ in range(CHECKS):
+            hook()
+        return (time.perf_counter() - started) / CHECKS * 1e6
+
+def many_clients_us(limiter: RateLimiter, path: str, clients: int) -> float:
+    # pushing a request context costs far more than the check: time both and subtract
+    contexts = [app.test_request_context(path, environ_base={"REMOTE_ADDR": f"10.{i >> 16}.{i >> 8 & 255}.{i & 255}"})
+                for i in range(clients)]
+    def run(hook):
+        started = time.perf_counter()
+        for ctx in contexts:
+            with ctx:
+                hook()
+        return time.perf_counter() - started
+    run(lambda: None)
+    with_check = run(limiter.before_request)
+    without = run(lambda: None)
+    return (with_check - without) / clients * 1e6
+
+if __name__ == "__main__":
+    memory = RateLimiter(rate_limiter.backend, LIMITS)
+    with app.app_context():
+        token = create_access_token(identity="42", additional_claims={"role": "user"})
+    bearer = {"Authorization": f"Bearer {token}"}
+
+    print_header(f"RATE LIMIT CHECK ({CHECKS:,} requests each)")
+    print(f"no rule (/incidents):             {per_request_us(memory, '/incidents'):6.2f} us/request")
+    print(f"memory, per IP (/stats/overview): {per_request_us(memory, '/stats/overview'):6.2f} us/request")
+    print(f"memory, per JWT subject:          {per_request_us(memory, '/stats/overview', bearer):6.2f} us/request")
+    print(f"memory, 50,000 distinct IPs:      {many_clients_us(memory, '/stats/overview', 50_000):6.2f} us/request")
+
+    redis_url = os.getenv("BENCH_REDIS_URL")
+    if redis_url:
+        shared = RedisBackend.from_url(redis_url)
+    else:
+        import fakeredis
+        shared = RedisBackend(fakeredis.FakeRedis())
+    CHECKS //= 20
+    label = "redis" if redis_url else "fakeredis"
+    print(f"{label}, per JWT subject:{' ' * (16 - len(label))}"
+          f"{per_request_us(RateLimiter(shared, LIMITS), '/stats/overview', bearer):8.2f} us/request")
+
+    print_header("LOGIN BURST FROM ONE CLIENT (auth.login=10/60)")
+    client = app.test_client()
+    statuses = {}
+    for i in range(25):
+        response = client.post("/auth/login", json={"username": "nobody", "password": "wrong-password"})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    print(f"25 logins: {', '.join(f'{count} x {status}' for status, count in sorted(statuses.items()))}; "
+          f"last Retry-After: {response.headers.get('Retry-After')}s")
+    other = app.test_client().post("/auth/login", json={"username": "nobody", "password": "wrong-password"},
+                                   environ_base={"REMOTE_ADDR": "10.9.9.9"})
+    print(f"another client meanwhile: {other.status_code}")
+    print(f"limiter: {rate_limiter.stats()}")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+/stats/resolution-time: t-digest accuracy against exact percentiles, and the
+cost of the first load versus incremental refreshes.
+"""
+import os
+import random
+from benchmarks.common import print_header, timed, latency_summary, CATEGORIES
+
+from app import app
+from utils.db import engine, SessionLocal
+from utils.cache import response_cache, NullBackend
+from models.incident_status_transition import IncidentStatusTransition
+from services.resolution import resolution_sketches, RESOLUTION_METRICS
+
+TRANSITIONS = int(os.getenv("BENCH_TRANSITIONS", "500000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+def seed_transitions(count: int, start_id: int = 1, seed: int = 3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "incident_id": start_id + i,
+            "category": rng.choice(CATEGORIES),
+            "from_status": "reported",
+            "to_status": rng.choice(list(RESOLUTION_METRICS)),
+            # minutes to days, heavy-tailed
+            "seconds_since_created": rng.lognormvariate(8, 1.5),
+        })
+    with engine.begin() as conn:
+        for offset in range(0, len(rows), 10000):
+            conn.execute(IncidentStatusTransition.__table__.insert(), rows[offset:offset + 10000])
+
+def exact_percentiles(session, status: str):
+    values = sorted(v for (v,) in session.query(IncidentStatusTransition.seconds_since_created)
+                    .filter(IncidentStatusTransition.to_status == status))
+    return {f"p{int(q * 100)}": values[min(len(values) - 1, int(q * len(values)))] for q in (0.5, 0.9, 0.99)}
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {TRANSITIONS:,} TRANSITIONS")
+    seed_transitions(TRANSITIONS)
+    response_cache.backend = NullBackend()
+    client = app.test_client()
+
+    print_header("REFRESH")
+    session = SessionLocal()
+    _, elapsed = timed(resolution_sketches.refresh, session)
+    print(f"first load:                 {elapsed:.2f}s")
+    _, elapsed = timed(resolution_sketches.refresh, session)
+    print(f"no-op refresh:              {elapsed * 1000:.2f}ms")
+    seed_transitions(1000, start_id=TRANSITIONS + 1, seed=4)
+    _, elapsed = timed(resolution_sketches.refresh, session)
+    print(f"refresh after 1,000 new:    {elapsed * 1000:.2f}ms")
+
+    print_header("ACCURACY (overall, seconds)")
+    overall = resolution_sketches.summary()["overall"]
+    for status, metric in RESOLUTION_METRICS.items():
+        exact = exact_percentiles(session, status)
+        for name, value in exact.items():
+            estimate = overall[metric][name]
+            error = abs(estimate - value) / value * 100
+            status_mark = "✓" if error < 5 else "✗"
+            print(f"{status_mark} {metric} {name}: sketch={estimate:,.1f} exact={value:,.1f} ({error:.2f}% off)")
+
+    print_header(f"LATENCY ({REPEAT} runs)")
+    endpoint = [timed(client.get, "/stats/resolution-time")[1] for _ in range(REPEAT)]
+    scan = [timed(exact_percentiles, session, "resolved")[1] for _ in range(max(1, REPEAT // 4))]
+    session.close()
+    print(f"endpoint (sketches):        {latency_summary(endpoint)}")
+    print(f"exact scan, one metric:     {latency_summary(scan)}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Reconnect storm: clients that dropped off for a while come back at once.
+Compares re-fetching /incidents (what clients did before the resume
+handshake, with the response cache cold as it is after writes) with
+resuming from the last sequence number out of the replay buffer.
+"""
+import os
+import random
+import time
+from sqlalchemy import event
+from benchmarks.common import print_header, seed_incidents, CATEGORIES, SOURCES, STATUSES
+
+os.environ["BROADCAST_WINDOW_MS"] = "0"
+from app import app, socketio
+from utils.db import engine
+from utils.cache import response_cache, NullBackend
+from services.incident_events import incident_broadcaster
+
+ROWS = int(os.getenv("BENCH_ROWS", "50000"))
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "300"))
+MISSED = int(os.getenv("BENCH_MISSED", "500"))
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+def missed_events(count: int, rng: random.Random):
+    events = []
+    for i in range(count):
+        values = {"category": rng.choice(CATEGORIES), "source": rng.choice(SOURCES), "status": rng.choice(STATUSES)}
+        events.append({"op": "updated", "id": ROWS + i, "changes": {"status": values["status"]},
+                       "rooms": {field: {value} for field, value in values.items()}})
+    return events
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    seed_incidents(ROWS, days=30)
+    response_cache.backend = NullBackend()  # writes just invalidated everything
+    rng = random.Random(3)
+    client = app.test_client()
+
+    position = incident_broadcaster.position()
+    incident_broadcaster.submit(missed_events(MISSED, rng))
+    incident_broadcaster.flush()
+
+    print_header(f"{CLIENTS} CLIENTS RECONNECT, {MISSED} EVENTS MISSED")
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    started = time.perf_counter()
+    for _ in range(CLIENTS):
+        client.get("/incidents")
+    refetch = time.perf_counter() - started
+    refetch_queries, counter.count = counter.count, 0
+
+    sockets = [socketio.test_client(app) for _ in range(CLIENTS)]
+    replayed = 0
+    started = time.perf_counter()
+    for sock in sockets:
+        sock.emit("resume", {"categories": rng.sample(CATEGORIES, 2), **position})
+    resume = time.perf_counter() - started
+    resume_queries = counter.count
+    event.remove(engine, "before_cursor_execute", counter)
+    for sock in sockets:
+        for message in sock.get_received():
+            if message["name"] == "resumed":
+                replayed += message["args"][0]["replayed"]
+        sock.disconnect()
+
+    print(f"GET /incidents:  {refetch / CLIENTS * 1000:7.2f} ms/client  {refetch_queries / CLIENTS:5.1f} queries/client")
+    print(f"resume:          {resume / CLIENTS * 1000:7.2f} ms/client  {resume_queries / CLIENTS:5.1f} queries/client"
+          f"  ({replayed / CLIENTS:.0f} events replayed per client)")
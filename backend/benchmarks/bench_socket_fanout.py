@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Socket.IO fan-out: cost of delivering one incident event to thousands of
+simulated clients, broadcasting to everyone versus sending only to the
+subscribed category/source/status rooms.
+
+Clients are registered directly with the server's manager and packets are
+counted at the Engine.IO send call, so the numbers cover room lookup and
+packet encoding but not network I/O.
+"""
+import os
+import random
+import time
+from benchmarks.common import print_header, CATEGORIES, SOURCES, STATUSES
+
+import socketio
+from services.incident_events import room_name, event_rooms, event_payload, BATCH_EVENT
+
+CLIENTS = [int(n) for n in os.getenv("BENCH_CLIENTS", "1000,5000,20000").split(",")]
+EVENTS = int(os.getenv("BENCH_EVENTS", "200"))
+
+class CountingServer(socketio.Server):
+    def __init__(self):
+        super().__init__(async_mode="threading")
+        self.sent = 0
+
+    def _send_eio_packet(self, eio_sid, eio_pkt):
+        eio_pkt.encode()
+        self.sent += 1
+
+def build_server(clients: int, rng: random.Random) -> CountingServer:
+    server = CountingServer()
+    manager = server.manager
+    manager.set_server(server)
+    manager.initialize()
+    for i in range(clients):
+        eio_sid = f"eio-{i}"
+        sid = manager.connect(eio_sid, "/")
+        # typical dashboard: one or two categories, sometimes a source filter
+        for category in rng.sample(CATEGORIES, rng.choice((1, 2))):
+            manager.basic_enter_room(sid, "/", room_name("category", category), eio_sid)
+        if rng.random() < 0.2:
+            manager.basic_enter_room(sid, "/", room_name("source", rng.choice(SOURCES)), eio_sid)
+    return server
+
+def sample_events(count: int, rng: random.Random):
+    events = []
+    for i in range(count):
+        values = {"category": rng.choice(CATEGORIES), "source": rng.choice(SOURCES), "status": rng.choice(STATUSES)}
+        events.append({
+            "op": "updated", "id": i, "changes": {"status": values["status"]},
+            "rooms": {field: {value} for field, value in values.items()},
+        })
+    return events
+
+if __name__ == "__main__":
+    rng = random.Random(5)
+    events = sample_events(EVENTS, rng)
+    for clients in CLIENTS:
+        print_header(f"{clients:,} CLIENTS, {EVENTS} EVENTS")
+        server = build_server(clients, rng)
+
+        started = time.perf_counter()
+        for incident_event in events:
+            server.emit(BATCH_EVENT, {"events": [event_payload(incident_event)]})
+        broadcast = time.perf_counter() - started
+        broadcast_sent, server.sent = server.sent, 0
+
+        started = time.perf_counter()
+        for incident_event in events:
+            server.emit(BATCH_EVENT, {"events": [event_payload(incident_event)]}, to=event_rooms(incident_event))
+        rooms = time.perf_counter() - started
+        rooms_sent = server.sent
+
+        print(f"broadcast to all: {broadcast / EVENTS * 1000:7.2f} ms/event  {broadcast_sent / EVENTS:8.0f} packets/event")
+        print(f"room fan-out:     {rooms / EVENTS * 1000:7.2f} ms/event  {rooms_sent / EVENTS:8.0f} packets/event")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Multi-process Socket.IO load test: incident events committed by an ingest
+process (which serves no sockets) reach clients spread over 1, 2 and 4
+server processes sharing a Redis message queue.
+
+A fakeredis TCP server stands in for Redis unless BENCH_REDIS_URL is set.
+Each client subscribes to every incident; the run ends when all clients
+have received every created incident. Throughput is client deliveries per
+second, so with enough cores it should grow with the number of workers.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from benchmarks.common import print_header, incident_payload, BACKEND_DIR
+
+WORKERS = [int(n) for n in os.getenv("BENCH_WORKERS", "1,2,4").split(",")]
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "40"))
+INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "300"))
+COMMIT_SIZE = int(os.getenv("BENCH_COMMIT_SIZE", "10"))
+BASE_PORT = int(os.getenv("BENCH_PORT", "5600"))
+TIMEOUT = float(os.getenv("BENCH_TIMEOUT", "120"))
+
+def run_redis_standin(port: int):
+    import fakeredis
+    server = fakeredis.TcpFakeServer(("127.0.0.1", port))
+    server.daemon_threads = True
+    server.serve_forever()
+
+def run_worker(port: int):
+    from app import app, socketio
+    socketio.run(app, host="127.0.0.1", port=port, allow_unsafe_werkzeug=True)
+
+def spawn(*args, env=None):
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.bench_socket_workers", *map(str, args)],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_until(check, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"timed out waiting for {what}")
+
+def run(workers: int, env: dict, redis_url: str) -> float:
+    import requests
+    import socketio
+    from sqlalchemy import delete
+    from utils.db import SessionLocal
+    from models.incident import Incident
+
+    ports = [BASE_PORT + i for i in range(workers)]
+    procs = [spawn("worker", port, env=env) for port in ports]
+    clients = []
+    try:
+        for port in ports:
+            wait_until(lambda: requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok, 30, f"worker :{port}")
+
+        received = [0] * CLIENTS
+        done = threading.Event()
+        lock = threading.Lock()
+        finished = [0]
+
+        def make_handler(index):
+            def on_batch(data):
+                created = sum(1 for item in data["events"] if item["op"] == "created")
+                with lock:
+                    before = received[index]
+                    received[index] += created
+                    if before < INCIDENTS <= received[index]:
+                        finished[0] += 1
+                        if finished[0] == CLIENTS:
+                            done.set()
+            return on_batch
+
+        for i in range(CLIENTS):
+            client = socketio.Client()
+            client.on("incident_batch", make_handler(i))
+            client.connect(f"http://127.0.0.1:{ports[i % workers]}")
+            client.emit("subscribe", {"all": True})
+            clients.append(client)
+        time.sleep(1.0)  # let subscriptions and the workers' relays settle
+
+        # this process is the ingest worker: it commits and publishes, serving no sockets
+        session = SessionLocal()
+        started = time.perf_counter()
+        try:
+            for start in range(0, INCIDENTS, COMMIT_SIZE):
+                for i in range(start, min(INCIDENTS, start + COMMIT_SIZE)):
+                    session.add(Incident(source="news", **incident_payload(i)))
+                session.commit()
+            committed = time.perf_counter() - started
+            if not done.wait(TIMEOUT):
+                raise RuntimeError(f"only {finished[0]}/{CLIENTS} clients got every event")
+            elapsed = time.perf_counter() - started
+            session.execute(delete(Incident))
+            session.commit()
+        finally:
+            session.close()
+        print(f"{workers} worker(s): {elapsed * 1000:8.1f} ms to deliver {INCIDENTS} incidents to "
+              f"{CLIENTS} clients (commits {committed * 1000:.0f} ms, "
+              f"last delivery +{(elapsed - committed) * 1000:.0f} ms), "
+              f"{CLIENTS * INCIDENTS / elapsed:,.0f} deliveries/s")
+        return elapsed
+    finally:
+        for client in clients:
+            client.disconnect()
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        role, port = sys.argv[1], int(sys.argv[2])
+        (run_redis_standin if role == "redis" else run_worker)(port)
+        sys.exit(0)
+
+    redis_url = os.getenv("BENCH_REDIS_URL")
+    standin = None
+    if not redis_url:
+        standin_port = BASE_PORT - 1
+        standin = spawn("redis", standin_port)
+        redis_url = f"redis://127.0.0.1:{standin_port}/0"
+    os.environ["SOCKETIO_MESSAGE_QUEUE"] = redis_url
+    os.environ["BROADCAST_WINDOW_MS"] = os.getenv("BROADCAST_WINDOW_MS", "50")
+    # workers share this process's database and message queue
+    env = {**os.environ, "BENCH_DATABASE_URL": os.environ["DATABASE_URL"]}
+
+    try:
+        import redis
+        wait_until(lambda: redis.Redis.from_url(redis_url).ping(), 30, "redis")
+        from utils.db import Base, engine
+        import models  # noqa: F401  (register every table)
+        import models.media  # noqa: F401
+        import services.incident_events  # noqa: F401  (publishes incident events on commit)
+        Base.metadata.create_all(bind=engine)
+
+        print_header(f"{CLIENTS} CLIENTS, {INCIDENTS} INCIDENTS, {os.cpu_count()} CPU(S)")
+        results = {workers: run(workers, env, redis_url) for workers in WORKERS}
+        first = WORKERS[0]
+        for workers, elapsed in results.items():
+            print(f"{workers} worker(s): {results[first] / elapsed:.2f}x the {first}-worker throughput")
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
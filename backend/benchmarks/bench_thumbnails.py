@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Milliseconds per image and peak RSS of image processing over a generated
+corpus of phone-sized photos (landscape and portrait JPEGs, some rotated
+through EXIF orientation, plus PNG screenshots).
+
+1. Full decode: how thumbnails and variants used to be made (decode every
+   pixel, resize, save JPEG).
+2. FileHandler.process_image with decode-time downscaling, as JPEG and as WebP.
+
+Thumbnail-only runs (no variants) show the best case for draft mode. Each
+run is a separate process so its peak RSS is its own.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from benchmarks.common import print_header, latency_summary, WORK_DIR
+
+from PIL import Image, ImageDraw, ExifTags
+
+PHOTOS = int(os.getenv("BENCH_PHOTOS", "24"))
+WIDTH, HEIGHT = (int(v) for v in os.getenv("BENCH_PHOTO_SIZE", "4032x3024").split("x"))
+
+def photo(seed: int, size, orientation: int = 1) -> Image.Image:
+    """Smooth areas, edges and sensor noise, roughly like a phone photo."""
+    rng = random.Random(seed)
+    width, height = size
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.rectangle((x, y, x + rng.randrange(50, 800), y + rng.randrange(50, 600)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    return Image.blend(img, Image.effect_noise(size, 12).convert("RGB"), 0.15)
+
+def build_corpus(folder: Path):
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(PHOTOS):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Make] = "BenchPhone"
+        if i % 6 == 5:
+            # a screenshot: PNG, no EXIF
+            photo(i, (1170, 2532)).save(folder / f"shot{i}.png", optimize=False)
+            continue
+        # every third photo is stored sideways with orientation 6, like a portrait shot
+        if i % 3 == 2:
+            exif[ExifTags.Base.Orientation] = 6
+        size = (WIDTH, HEIGHT) if i % 2 == 0 else (WIDTH * 3 // 4, HEIGHT * 3 // 4)
+        photo(i, size).save(folder / f"photo{i}.jpg", "JPEG", quality=90, exif=exif)
+
+def full_decode(handler, path: Path, widths, thumbnail_only: bool):
+    # the previous pipeline: every pixel decoded, variants chained, JPEG out
+    stem = path.stem
+    with Image.open(path) as img:
+        handler.extract_metadata(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        source = img
+        for target in ([] if thumbnail_only else widths):
+            if target >= source.width:
+                continue
+            source = source.resize((target, max(1, round(source.height * target / source.width))),
+                                   Image.Resampling.LANCZOS)
+            source.save(handler.upload_folder / "variants" / f"{stem}_w{target}.jpg", "JPEG", quality=85)
+        thumbnail = source.copy()
+        thumbnail.thumbnail((300, 300), Image.Resampling.LANCZOS)
+        thumbnail.save(handler.upload_folder / "thumbnails" / f"thumb_{stem}.jpg", "JPEG", quality=85)
+
+def memory_kb(field: str) -> int:
+    # /proc rather than getrusage: ru_maxrss survives exec, so a child would
+    # report the parent's peak from before it was spawned
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+def child(mode: str, corpus: Path, thumbnail_only: bool):
+    from config import Config
+    from utils.file_handler import FileHandler
+    if thumbnail_only:
+        Config.MEDIA_VARIANT_WIDTHS = []
+    Config.MEDIA_IMAGE_FORMAT = "webp" if mode == "webp" else "jpeg"
+    handler = FileHandler()
+    paths = sorted(corpus.iterdir())
+    baseline = memory_kb("VmRSS")
+    samples = []
+    for path in paths:
+        started = time.perf_counter()
+        if mode == "full":
+            full_decode(handler, path, sorted(set(Config.MEDIA_VARIANT_WIDTHS), reverse=True), thumbnail_only)
+        else:
+            handler.process_image(path, path.name)
+        samples.append(time.perf_counter() - started)
+    peak = memory_kb("VmHWM")
+    output = sum(f.stat().st_size for sub in ("thumbnails", "variants")
+                 for f in (handler.upload_folder / sub).iterdir())
+    print(json.dumps({"samples": samples, "baseline_kb": baseline, "peak_kb": peak, "output_bytes": output}))
+
+def run(mode: str, corpus: Path, thumbnail_only: bool) -> dict:
+    args = [sys.executable, "-m", "benchmarks.bench_thumbnails", "--child", mode, str(corpus)]
+    if thumbnail_only:
+        args.append("--thumbnail-only")
+    result = subprocess.run(args, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def report(label: str, result: dict, images: int):
+    samples = result["samples"]
+    print(f"{label:<30} {sum(samples) / len(samples) * 1000:7.1f} ms/image  "
+          f"peak RSS {result['peak_kb'] / 1024:6.1f} MB (+{(result['peak_kb'] - result['baseline_kb']) / 1024:.1f} "
+          f"over startup)  output {result['output_bytes'] / images / 1024:.0f} KB/image")
+    print(f"{'':<30} {latency_summary(samples)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], Path(sys.argv[3]), "--thumbnail-only" in sys.argv)
+        sys.exit(0)
+
+    from config import Config
+    corpus = Path(WORK_DIR) / "corpus"
+    build_corpus(corpus)
+    images = len(list(corpus.iterdir()))
+    print_header(f"IMAGE PROCESSING, {images} images (up to {WIDTH}x{HEIGHT}, "
+                 f"{sum(f.stat().st_size for f in corpus.iterdir()) / images / 1e6:.1f} MB average)")
+    print(f"thumbnail 300x300 + variants {Config.MEDIA_VARIANT_WIDTHS}:")
+    report("  full decode, JPEG", run("full", corpus, False), images)
+    report("  draft decode, JPEG", run("jpeg", corpus, False), images)
+    report("  draft decode, WebP", run("webp", corpus, False), images)
+    print("thumbnail only:")
+    report("  full decode, JPEG", run("full", corpus, True), images)
+    report("  draft decode, JPEG", run("jpeg", corpus, True), images)
+    report("  draft decode, WebP", run("webp", corpus, True), images)
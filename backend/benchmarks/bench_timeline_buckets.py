@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+/stats/timeline: latency and row count for every bucket granularity, with the
+zero-filled results checked against counts computed in Python from the raw rows.
+"""
+import os
+from collections import Counter
+from benchmarks.common import print_header, seed_incidents, timed, latency_summary
+
+from app import app
+from utils.db import SessionLocal
+from utils.cache import response_cache, NullBackend
+from utils.buckets import bucket_start, BUCKET_GRANULARITIES
+from models.incident import Incident
+from routes.stats import BUCKET_LABELS
+
+ROWS = int(os.getenv("BENCH_ROWS", "500000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+# (period, bucket) pairs covering every granularity
+CASES = [
+    ("day", "hour"),
+    ("month", "hour"),
+    ("week", "day"),
+    ("year", "day"),
+    ("month", "week"),
+    ("year", "week"),
+    ("year", "month"),
+]
+
+def expected_counts(created, bucket):
+    return Counter(bucket_start(value, bucket).strftime(BUCKET_LABELS[bucket]) for value in created)
+
+if __name__ == "__main__":
+    print_header(f"SEEDING {ROWS:,} INCIDENTS")
+    seed_incidents(ROWS, days=400)
+    response_cache.backend = NullBackend()  # measure the database path
+    client = app.test_client()
+
+    session = SessionLocal()
+    created = [value.replace(tzinfo=None) for (value,) in session.query(Incident.created_at)]
+    session.close()
+    expected = {bucket: expected_counts(created, bucket) for bucket in BUCKET_GRANULARITIES}
+
+    print_header(f"LATENCY ({REPEAT} runs)")
+    for period, bucket in CASES:
+        url = f"/stats/timeline?period={period}&bucket={bucket}"
+        payload = client.get(url).json
+        timeline = payload["timeline"]
+        matches = all(point["count"] == expected[bucket].get(point["date"], 0) for point in timeline)
+        samples = [timed(client.get, url)[1] for _ in range(REPEAT)]
+        status = "✓" if matches else "✗"
+        print(f"{status} period={period:<5} bucket={bucket:<5} {len(timeline):>4} buckets  {latency_summary(samples)}")
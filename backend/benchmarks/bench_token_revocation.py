@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Token revocation checks, the work check_if_token_revoked does on every
+authenticated request. Compares the old in-process set, asking the store
+on every request, and the Bloom filter in front of the store, for the
+database and a Redis-compatible store (fakeredis unless BENCH_REDIS_URL is
+set). Also measures how long a revocation takes to reach another worker.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from benchmarks.common import print_header
+from utils.db import Base, engine
+import models.user, models.media  # noqa: F401  (tables the foreign keys point at)
+from models.revoked_token import RevokedToken
+from services.revocation import DatabaseRevocationStore, RedisRevocationStore, TokenRevocationList
+
+REVOKED = int(os.getenv("BENCH_REVOKED", "50000"))
+CHECKS = int(os.getenv("BENCH_CHECKS", "20000"))
+SYNC_SECONDS = float(os.getenv("BENCH_SYNC_SECONDS", "0.2"))
+
+def per_check_us(check, jtis) -> float:
+    started = time.perf_counter()
+    for jti in jtis:
+        check(jti)
+    return (time.perf_counter() - started) / len(jtis) * 1e6
+
+def propagation_ms(writer: TokenRevocationList, reader: TokenRevocationList, expires_at) -> float:
+    jti = uuid.uuid4().hex
+    reader.is_revoked(jti)
+    writer.revoke(jti, expires_at)
+    started = time.perf_counter()
+    while not reader.is_revoked(jti):
+        time.sleep(0.001)
+    return (time.perf_counter() - started) * 1000
+
+def run(name: str, store, revoked, expires_at):
+    fresh = [uuid.uuid4().hex for _ in range(CHECKS)]
+    hits = revoked[:CHECKS // 10]
+    front = TokenRevocationList(store, capacity=REVOKED * 2, sync_seconds=SYNC_SECONDS)
+    started = time.perf_counter()
+    front.is_revoked("warm-up")
+    load = time.perf_counter() - started
+
+    print(f"{name}: filter load of {REVOKED:,} ids {load * 1000:.0f} ms "
+          f"({front.stats()['filter']['bytes'] / 1024:.0f} KiB)")
+    print(f"  store lookup, not revoked:    {per_check_us(store.is_revoked, fresh[:2000]):8.2f} us/check")
+    print(f"  bloom + store, not revoked:   {per_check_us(front.is_revoked, fresh):8.2f} us/check")
+    print(f"  bloom + store, revoked:       {per_check_us(front.is_revoked, hits):8.2f} us/check")
+    assert all(front.is_revoked(jti) for jti in hits[:100])
+    stats = front.stats()
+    print(f"  store lookups for {len(fresh):,} unrevoked ids: {stats['false_positives']} (false positives)")
+
+    other = TokenRevocationList(store, capacity=REVOKED * 2, sync_seconds=SYNC_SECONDS)
+    delays = sorted(propagation_ms(front, other, expires_at) for _ in range(10))
+    print(f"  revocation seen by another worker after {delays[len(delays) // 2]:.0f} ms "
+          f"(max {delays[-1]:.0f}, sync every {SYNC_SECONDS * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    revoked = [uuid.uuid4().hex for _ in range(REVOKED)]
+
+    print_header(f"{REVOKED:,} REVOKED TOKENS, {CHECKS:,} CHECKS")
+    blacklisted = set(revoked)
+    fresh = [uuid.uuid4().hex for _ in range(CHECKS)]
+    print(f"old in-process set:             {per_check_us(blacklisted.__contains__, fresh):8.2f} us/check "
+          f"(not shared, never expires)")
+
+    with engine.begin() as conn:
+        conn.execute(RevokedToken.__table__.insert(),
+                     [{"jti": jti, "expires_at": expires_at} for jti in revoked])
+    run("database", DatabaseRevocationStore(), revoked, expires_at)
+
+    redis_url = os.getenv("BENCH_REDIS_URL")
+    if redis_url:
+        store = RedisRevocationStore.from_url(redis_url)
+    else:
+        import fakeredis
+        store = RedisRevocationStore(fakeredis.FakeRedis())
+    for start in range(0, REVOKED, 1000):
+        pipe = store.client.pipeline()
+        for jti in revoked[start:start + 1000]:
+            pipe.set(store.prefix + jti, 1, exat=int(expires_at.timestamp()))
+        pipe.execute()
+    run("redis" if redis_url else "fakeredis", store, revoked, expires_at)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Webhook delivery against a local HTTP sink.
+
+1. POST /incidents latency with no endpoints and with five registered
+   endpoints (the outbox rows are written in the incident's transaction).
+2. The dispatcher drains the outbox while the sink fails a share of requests:
+   every event must arrive with a valid signature, batched per endpoint,
+   and events for an unreachable endpoint must end up dead-lettered.
+3. POST /incidents latency while the dispatcher is delivering.
+"""
+import os
+import socket
+import time
+from benchmarks.common import print_header, incident_payload, latency_summary
+
+os.environ["WEBHOOK_DISPATCH"] = "external"  # started by hand below
+os.environ.setdefault("WEBHOOK_BACKOFF_SECONDS", "0.05")
+os.environ.setdefault("WEBHOOK_MAX_ATTEMPTS", "4")
+os.environ.setdefault("WEBHOOK_POLL_SECONDS", "0.2")
+os.environ["BROADCAST_WINDOW_MS"] = "0"
+from flask_jwt_extended import create_access_token
+from app import app
+from utils.db import SessionLocal
+from models.user import User
+from models.webhook_delivery import WebhookDelivery
+from services.webhooks import webhook_dispatcher
+from benchmarks.webhook_sink import WebhookSink
+
+INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "500"))
+FAIL_RATE = float(os.getenv("BENCH_FAIL_RATE", "0.2"))
+TIMEOUT = float(os.getenv("BENCH_TIMEOUT", "120"))
+
+ENDPOINTS = [
+    {"name": "everything", "path": "/all"},
+    {"name": "fires", "path": "/fire", "categories": ["fire"]},
+    {"name": "new incidents", "path": "/created", "events": ["created"]},
+    {"name": "user reports", "path": "/user", "sources": ["user"]},
+]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def post_incidents(client, count: int, offset: int):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        response = client.post("/incidents", json=incident_payload(offset + i))
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 201, response.get_json()
+    return samples
+
+def count_deliveries(**criteria) -> int:
+    session = SessionLocal()
+    try:
+        return session.query(WebhookDelivery).filter_by(**criteria).count()
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    client = app.test_client()
+    session = SessionLocal()
+    admin = User(username="bench-admin", email="bench-admin@example.com", role="admin")
+    admin.set_password("bench-password")
+    session.add(admin)
+    session.commit()
+    with app.app_context():
+        token = create_access_token(identity=str(admin.id), additional_claims={"role": "admin"})
+    session.close()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print_header(f"POST /incidents x{INCIDENTS}")
+    post_incidents(client, 20, 0)  # warm up
+    baseline = post_incidents(client, INCIDENTS, 20)
+    print(f"no endpoints:   {latency_summary(baseline)}")
+
+    sink = WebhookSink(fail_rate=FAIL_RATE).start()
+    for spec in ENDPOINTS:
+        body = {key: value for key, value in spec.items() if key != "path"}
+        response = client.post("/webhooks/endpoints", headers=headers, json={**body, "url": sink.url(spec["path"])})
+        sink.secrets[spec["path"]] = response.get_json()["endpoint"]["secret"]
+    # nothing listens here: these events should be dead-lettered
+    dead = client.post("/webhooks/endpoints", headers=headers,
+                       json={"name": "offline", "url": f"http://127.0.0.1:{free_port()}/"}).get_json()["endpoint"]
+
+    with_outbox = post_incidents(client, INCIDENTS, 10_000)
+    print(f"5 endpoints:    {latency_summary(with_outbox)}")
+    live = count_deliveries(status="pending") - count_deliveries(status="pending", endpoint_id=dead["id"])
+    print(f"outbox: {live:,} deliveries for live endpoints, "
+          f"{count_deliveries(endpoint_id=dead['id']):,} for the offline one")
+
+    print_header(f"DELIVERY (sink fails {FAIL_RATE:.0%} of requests)")
+    started = time.perf_counter()
+    webhook_dispatcher.ensure_started()
+    during = post_incidents(client, INCIDENTS // 5, 20_000)
+    delivered = sink.wait_for(count_deliveries() - count_deliveries(endpoint_id=dead["id"]), TIMEOUT)
+    elapsed = time.perf_counter() - started
+    deadline = time.monotonic() + TIMEOUT
+    while count_deliveries(endpoint_id=dead["id"], status="pending") and time.monotonic() < deadline:
+        time.sleep(0.1)
+    webhook_dispatcher.stop()
+    sink.stop()
+
+    stats = webhook_dispatcher.stats()
+    duplicates = sum(times - 1 for times in sink.received.values())
+    print(f"POST while delivering: {latency_summary(during)}")
+    print(f"{'all' if delivered else 'NOT all'} {len(sink.received):,} events delivered in {elapsed:.2f}s "
+          f"({len(sink.received) / elapsed:,.0f} events/s)")
+    print(f"sink: {sink.requests:,} requests ({len(sink.received) / max(sink.requests - sink.failed, 1):.1f} "
+          f"events per successful request), {sink.failed} failed on purpose, "
+          f"{sink.bad_signatures} bad signatures, {duplicates} duplicates")
+    print(f"dispatcher: request {stats['request_ms']} ms, delivery lag {stats['delivery_lag_ms']} ms")
+    print(f"offline endpoint: {count_deliveries(endpoint_id=dead['id'], status='dead'):,} dead-lettered "
+          f"after {webhook_dispatcher.max_attempts} attempts")
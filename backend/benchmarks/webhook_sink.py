@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local HTTP sink for webhook deliveries: verifies each request's signature,
+records the delivery ids it received and can fail a share of requests to
+exercise retries. Used by bench_webhooks; run it on its own to point a
+development endpoint at it:
+
+    python -m benchmarks.webhook_sink --port 9000 --secret <endpoint secret>
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SIGNATURE_HEADER = "X-Inci-Signature"
+TIMESTAMP_HEADER = "X-Inci-Timestamp"
+
+
+class WebhookSink:
+    """Threaded HTTP server that checks and records webhook batches."""
+
+    def __init__(self, secrets=None, port: int = 0, fail_rate: float = 0.0, seed: int = 0, verbose: bool = False):
+        from services.webhooks import verify_signature
+
+        self.secrets = dict(secrets or {})  # path -> secret; "/" applies to every path
+        self.fail_rate = fail_rate
+        self.verbose = verbose
+        self.received = {}  # delivery id -> times received
+        self.requests = 0
+        self.failed = 0
+        self.bad_signatures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                secret = sink.secrets.get(self.path, sink.secrets.get("/"))
+                valid = secret is None or verify_signature(
+                    secret, self.headers.get(TIMESTAMP_HEADER), body, self.headers.get(SIGNATURE_HEADER))
+                with sink._lock:
+                    sink.requests += 1
+                    if not valid:
+                        sink.bad_signatures += 1
+                        status = 401
+                    elif sink._rng.random() < sink.fail_rate:
+                        sink.failed += 1
+                        status = 503
+                    else:
+                        status = 204
+                        deliveries = json.loads(body)["deliveries"]
+                        for delivery in deliveries:
+                            sink.received[delivery["id"]] = sink.received.get(delivery["id"], 0) + 1
+                        if sink.verbose:
+                            for delivery in deliveries:
+                                print(f"{self.path} #{delivery['id']} {delivery['event']} "
+                                      f"incident={delivery['incident_id']} attempt={delivery['attempt']}")
+                        sink._changed.notify_all()
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> "WebhookSink":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for(self, count: int, timeout: float) -> bool:
+        """Wait until ``count`` distinct deliveries have been received."""
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.received) >= count, timeout)
+
+
+if __name__ == "__main__":
+    import benchmarks.common  # noqa: F401  (puts the backend on sys.path)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--secret", help="Endpoint secret; signatures are not checked without it.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    args = parser.parse_args()
+    sink = WebhookSink({"/": args.secret} if args.secret else None, args.port, args.fail_rate, verbose=True)
+    print(f"Listening on {sink.url()}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,233 @@
+import os
+import glob
+import shutil
+import time
+from pathlib import Path
+import click
+from sqlalchemy import func
+from utils.db import SessionLocal
+from models.incident import Incident
+from models.incident_rollup import rebuild_rollups
+from services.ingest import ingest_news, ingest_weather
+from services.webhooks import webhook_dispatcher
+from services.media_processing import media_processor
+from models.media import Media
+from utils.file_handler import FileHandler
+from services.export import (iter_incident_rows, write_columnar, partition_ranges, time_range_criteria,
+                             truncate_datetime, next_boundary, COLUMNAR_FORMATS, PARTITION_GRANULARITIES)
+
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+
+def register_commands(app):
+    """Attach the backend's management commands to ``flask``."""
+
+    @app.cli.command("export-incidents")
+    @click.option("--format", "fmt", type=click.Choice(COLUMNAR_FORMATS), default="parquet", show_default=True)
+    @click.option("--output", required=True, type=click.Path(),
+                  help="Output file, or output directory when --partition is given.")
+    @click.option("--start", type=click.DateTime(), help="Only incidents created at or after this time.")
+    @click.option("--end", type=click.DateTime(), help="Only incidents created before this time.")
+    @click.option("--partition", type=click.Choice(PARTITION_GRANULARITIES),
+                  help="Write one file per created_at day/month/year (Hive-style directories).")
+    @click.option("--source", help="Filter by source.")
+    @click.option("--category", help="Filter by category.")
+    def export_incidents_command(fmt, output, start, end, partition, source, category):
+        """Export incidents as Parquet or Arrow IPC for analytics."""
+        criteria = []
+        if source:
+            criteria.append(Incident.source == source)
+        if category:
+            criteria.append(Incident.category == category)
+
+        batch_size = app.config['EXPORT_BATCH_SIZE']
+        columnar_batch_size = app.config['EXPORT_COLUMNAR_BATCH_SIZE']
+        session = SessionLocal()
+        try:
+            if not partition:
+                os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                rows = iter_incident_rows(session, criteria + time_range_criteria(start, end), batch_size)
+                written = write_columnar(rows, output, fmt, columnar_batch_size)
+                click.echo(f"Exported {written} incidents to {output}")
+                return
+
+            # Resolve open ends of the window from the data itself
+            if start is None or end is None:
+                first, last = session.query(
+                    func.min(Incident.created_at), func.max(Incident.created_at)
+                ).filter(*criteria).one()
+                if first is None:
+                    click.echo("No incidents to export")
+                    return
+                # Align to partition boundaries so each file covers whole periods
+                start = start or truncate_datetime(first.replace(tzinfo=None), partition)
+                end = end or next_boundary(truncate_datetime(last.replace(tzinfo=None), partition), partition)
+
+            total = 0
+            for label, lower, upper in partition_ranges(start, end, partition):
+                rows = iter_incident_rows(session, criteria + time_range_criteria(lower, upper), batch_size)
+                directory = os.path.join(output, f"created_{partition}={label}")
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"incidents.{EXTENSIONS[fmt]}")
+                written = write_columnar(rows, path, fmt, columnar_batch_size)
+                if written == 0:
+                    os.remove(path)
+                    if not os.listdir(directory):
+                        os.rmdir(directory)
+                    continue
+                total += written
+                click.echo(f"  {label}: {written} incidents")
+            click.echo(f"Exported {total} incidents to {output}")
+        finally:
+            session.close()
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Recompute the daily stats rollups from the incidents table."""
+        session = SessionLocal()
+        try:
+            keys = rebuild_rollups(session, app.config['EXPORT_BATCH_SIZE'])
+            session.commit()
+            click.echo(f"Rebuilt {keys} rollup rows")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @app.cli.command("ingest")
+    @click.option("--weather-city", "cities", multiple=True, help="Also ingest weather for this city (repeatable).")
+    @click.option("--interval", type=int, default=0, show_default=True,
+                  help="Repeat every N seconds; 0 runs once.")
+    def ingest_command(cities, interval):
+        """Ingest news (and weather) incidents without serving Socket.IO clients.
+
+        Incident events are published to SOCKETIO_MESSAGE_QUEUE, so the socket
+        server processes deliver them to their clients.
+        """
+        while True:
+            created = ingest_news()
+            for city in cities:
+                created += ingest_weather(city)
+            click.echo(f"Ingested {created} incidents")
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    @app.cli.command("deliver-webhooks")
+    @click.option("--workers", type=int, help="Concurrent endpoint batches (default WEBHOOK_WORKERS).")
+    def deliver_webhooks_command(workers):
+        """Deliver the webhook outbox until interrupted (for WEBHOOK_DISPATCH=external)."""
+        if workers:
+            webhook_dispatcher.workers = workers
+        webhook_dispatcher.ensure_started()
+        click.echo(f"Delivering webhooks with {webhook_dispatcher.workers} workers")
+        try:
+            while True:
+                time.sleep(60)
+                stats = webhook_dispatcher.stats()
+                click.echo(f"delivered={stats['delivered']} failed_attempts={stats['failed_attempts']} "
+                           f"dead_lettered={stats['dead_lettered']}")
+        except KeyboardInterrupt:
+            webhook_dispatcher.stop()
+
+    @app.cli.command("process-media")
+    @click.option("--failed", "include_failed", is_flag=True, help="Also retry media whose processing failed.")
+    @click.option("--rebuild", is_flag=True,
+                  help="Regenerate thumbnails and variants for every image (e.g. after changing MEDIA_VARIANT_WIDTHS).")
+    def process_media_command(include_failed, rebuild):
+        """Process pending images now, in this process."""
+        session = SessionLocal()
+        try:
+            statuses = ["failed"] if include_failed else []
+            if rebuild:
+                statuses += ["ready", "failed"]
+            if statuses:
+                session.query(Media).filter(
+                    Media.media_type == "image", Media.processing_status.in_(statuses)
+                ).update({"processing_status": "pending"}, synchronize_session=False)
+                session.commit()
+            ids = [media_id for (media_id,) in session.query(Media.id).filter(
+                Media.processing_status == "pending").order_by(Media.id)]
+        finally:
+            session.close()
+
+        for media_id in ids:
+            media_processor.process(media_id)
+        stats = media_processor.stats()
+        click.echo(f"Processed {stats['processed']} images, {stats['failed']} failed")
+
+    @app.cli.command("migrate-uploads")
+    @click.option("--dry-run", is_flag=True, help="Only report what would change.")
+    def migrate_uploads_command(dry_run):
+        """Move media stored under UUID names to content-addressed names, merging duplicates."""
+        file_handler = FileHandler()
+        session = SessionLocal()
+        converted = duplicates = missing = saved_bytes = 0
+        seen = set()
+        try:
+            records = session.query(Media).filter(Media.content_hash.is_(None)).order_by(Media.id).all()
+            for media in records:
+                if not os.path.isfile(media.file_path):
+                    missing += 1
+                    click.echo(f"media {media.id}: {media.file_path} is missing, skipped")
+                    continue
+                content_hash = file_handler.hash_file(media.file_path)
+                target = file_handler.content_path(media.media_type, content_hash, Path(media.filename).suffix)
+                duplicate = target.exists() or content_hash in seen
+                seen.add(content_hash)
+                converted += 1
+                if duplicate:
+                    duplicates += 1
+                    saved_bytes += os.path.getsize(media.file_path)
+                if dry_run:
+                    continue
+
+                old = {"file_path": media.file_path, "thumbnail_path": media.thumbnail_path,
+                       "variants": dict(media.variants or {}), "filename": media.filename}
+                if not target.exists():
+                    # a second name for the same bytes; the old one goes once the row points here
+                    try:
+                        os.link(media.file_path, target)
+                    except OSError:
+                        shutil.copyfile(media.file_path, target)
+                old_stem, new_stem = Path(old["filename"]).stem, target.stem
+                renames = []
+                if media.thumbnail_path:
+                    new_thumbnail = Path(media.thumbnail_path).with_name(
+                        Path(media.thumbnail_path).name.replace(old_stem, new_stem, 1))
+                    renames.append((media.thumbnail_path, new_thumbnail))
+                    media.thumbnail_path = str(new_thumbnail)
+                if media.variants:
+                    variants = {}
+                    for width, name in media.variants.items():
+                        variants[width] = name.replace(old_stem, new_stem, 1)
+                        renames.append((file_handler.upload_folder / "variants" / name,
+                                        file_handler.upload_folder / "variants" / variants[width]))
+                    media.variants = variants
+                media.filename = target.name
+                media.file_path = str(target)
+                media.content_hash = content_hash
+                session.commit()
+
+                for source, destination in renames:
+                    if Path(source) == Path(destination):
+                        continue
+                    if Path(destination).exists():
+                        file_handler.delete_file(str(source))  # a duplicate already has it
+                    elif Path(source).exists():
+                        os.replace(source, destination)
+                if old["file_path"] != str(target):
+                    file_handler.delete_file(old["file_path"])
+                for resized in (file_handler.upload_folder / "resized").glob(f"{glob.escape(old['filename'])}.*"):
+                    file_handler.delete_file(str(resized))
+            referenced = {Path(path).name for (path,) in session.query(Media.file_path)}
+        finally:
+            session.close()
+
+        orphans = [path for folder in ("images", "videos", "documents")
+                   for path in (file_handler.upload_folder / folder).iterdir()
+                   if path.is_file() and path.name not in referenced]
+        action = "Would convert" if dry_run else "Converted"
+        click.echo(f"{action} {converted} files ({duplicates} duplicates, {saved_bytes / 1024 / 1024:.1f} MB "
+                   f"{'to free' if dry_run else 'freed'}), {missing} missing; "
+                   f"{len(orphans)} files in {file_handler.upload_folder} belong to no media record")
@@ -21,6 +21,104 @@ class Config:
         'document': {'pdf', 'doc', 'docx', 'txt'}
     }
     
+    # Image post-processing (thumbnail, responsive widths, metadata): "queue" runs it
+    # on background workers after the upload is saved, "sync" inside the request
+    MEDIA_PROCESSING = os.getenv("MEDIA_PROCESSING", "queue")
+    MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+    MEDIA_VARIANT_WIDTHS = [int(w) for w in os.getenv("MEDIA_VARIANT_WIDTHS", "640,1280").split(",") if w.strip()]
+    MEDIA_LEASE_SECONDS = float(os.getenv("MEDIA_LEASE_SECONDS", "300"))  # stuck "processing" rows are retried after this
+    MEDIA_SWEEP_SECONDS = float(os.getenv("MEDIA_SWEEP_SECONDS", "60"))  # how often to pick up leftover pending media
+    MEDIA_IMAGE_FORMAT = os.getenv("MEDIA_IMAGE_FORMAT", "webp")  # thumbnails and variants: webp or jpeg (used when Pillow lacks WebP)
+    MEDIA_IMAGE_QUALITY = int(os.getenv("MEDIA_IMAGE_QUALITY", "80"))
+    # /media/images/<filename>?w=&h=: allowed widths/heights and the disk budget for the resized copies
+    MEDIA_RESIZE_SIZES = [int(s) for s in os.getenv("MEDIA_RESIZE_SIZES", "64,160,320,480,640,960,1280,1920").split(",") if s.strip()]
+    MEDIA_RESIZE_CACHE_BYTES = int(os.getenv("MEDIA_RESIZE_CACHE_BYTES", "536870912"))  # 512MB
+    
+    # Bulk incident API: maximum items per request
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+    
+    # Streaming export: rows fetched per server-side cursor batch
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Parquet/Arrow export: rows per record batch (Parquet row group)
+    EXPORT_COLUMNAR_BATCH_SIZE = int(os.getenv("EXPORT_COLUMNAR_BATCH_SIZE", "50000"))
+    
+    # Stats: serve aggregates from an in-memory numpy snapshot instead of SQL
+    ANALYTICS_SNAPSHOT = os.getenv("ANALYTICS_SNAPSHOT", "false").lower() == "true"
+    
+    # Hotspot detection: geohash cell size, sliding window and alert thresholds
+    HOTSPOT_GEOHASH_PRECISION = int(os.getenv("HOTSPOT_GEOHASH_PRECISION", "6"))  # ~1.2km x 0.6km cells
+    HOTSPOT_WINDOW_MINUTES = int(os.getenv("HOTSPOT_WINDOW_MINUTES", "60"))
+    HOTSPOT_BUCKET_MINUTES = int(os.getenv("HOTSPOT_BUCKET_MINUTES", "5"))
+    HOTSPOT_MIN_COUNT = int(os.getenv("HOTSPOT_MIN_COUNT", "3"))
+    HOTSPOT_THRESHOLD = float(os.getenv("HOTSPOT_THRESHOLD", "3"))  # x the baseline rate
+    HOTSPOT_BASELINE_HALF_LIFE_HOURS = float(os.getenv("HOTSPOT_BASELINE_HALF_LIFE_HOURS", "24"))
+    HOTSPOT_MAX_CELLS = int(os.getenv("HOTSPOT_MAX_CELLS", "100000"))
+    
+    # Socket.IO incident events: coalescing window/size and per-client backpressure
+    BROADCAST_WINDOW_MS = int(os.getenv("BROADCAST_WINDOW_MS", "250"))  # 0 sends on every commit
+    BROADCAST_MAX_BATCH = int(os.getenv("BROADCAST_MAX_BATCH", "200"))
+    BROADCAST_CLIENT_MAX_QUEUED = int(os.getenv("BROADCAST_CLIENT_MAX_QUEUED", "100"))  # packets before a client is held back
+    BROADCAST_CLIENT_MAX_BACKLOG = int(os.getenv("BROADCAST_CLIENT_MAX_BACKLOG", "1000"))  # held events before a resync
+    BROADCAST_REPLAY_SIZE = int(os.getenv("BROADCAST_REPLAY_SIZE", "10000"))  # recent events kept for resume
+    
+    # Geofenced alert subscriptions: index grid, cross-worker refresh and limits
+    GEOFENCE_CELL_DEGREES = float(os.getenv("GEOFENCE_CELL_DEGREES", "0.05"))  # ~5.5 km finest grid cells
+    GEOFENCE_REFRESH_SECONDS = float(os.getenv("GEOFENCE_REFRESH_SECONDS", "5"))
+    GEOFENCE_MAX_RADIUS_M = float(os.getenv("GEOFENCE_MAX_RADIUS_M", "50000"))
+    GEOFENCE_MAX_SPAN_DEGREES = float(os.getenv("GEOFENCE_MAX_SPAN_DEGREES", "1"))  # polygon bounding box
+    GEOFENCE_MAX_PER_USER = int(os.getenv("GEOFENCE_MAX_PER_USER", "20"))
+    
+    # Outbound webhooks: "inline" delivers from the web process, "external"
+    # leaves it to `flask deliver-webhooks` workers
+    WEBHOOK_DISPATCH = os.getenv("WEBHOOK_DISPATCH", "inline")
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))  # concurrent endpoint batches
+    WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))  # events per request
+    WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "1"))
+    WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "5"))
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))  # then dead-lettered
+    WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "2"))  # doubles per attempt
+    WEBHOOK_BACKOFF_MAX_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "3600"))
+    WEBHOOK_LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS", "60"))  # claimed rows retry after this
+    WEBHOOK_ENDPOINT_REFRESH_SECONDS = float(os.getenv("WEBHOOK_ENDPOINT_REFRESH_SECONDS", "5"))
+    
+    # Socket.IO serving: async backend (threading, eventlet or gevent) and the
+    # Redis message queue shared by all processes (unset = single process)
+    SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "flask-socketio")
+    EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "inci:incident-events")
+    
     # JWT Settings
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-string")
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "86400"))  # 24 hours
+
+    # Password hashing: bcrypt cost and the process pool it runs in (0 workers = request thread)
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))  # hashes with another cost are redone at login
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))  # queued + running; more get 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))  # seconds
+    PASSWORD_HASH_NICE = int(os.getenv("PASSWORD_HASH_NICE", "10"))  # lower worker priority so requests win the CPU
+
+    # Revoked tokens: shared store (database or redis) behind a per-process Bloom filter
+    REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", "database")
+    REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL", "redis://localhost:6379/0")
+    REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "1"))  # how stale other workers' revocations may be
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))  # drops expired ids from the filter
+
+    # Rate limiting: token buckets per JWT subject or client IP (backend: memory, redis or none).
+    # RATE_LIMITS maps endpoints or blueprints ("stats.*") to "count/seconds"
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # memory backend buckets per process
+    RATE_LIMITS = os.getenv(
+        "RATE_LIMITS",
+        "auth.login=10/60,auth.register=5/60,ingest.*=6/60,incidents.create_incident=60/60,stats.*=300/60",
+    )
+
+    # Response cache settings (backend: memory, redis or none)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "30"))  # seconds
@@ -24,9 +24,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from utils.db import Base
-from models.incident import Incident
-from models.media import Media
-from models.user import User
+import models  # registers every table
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,32 @@
+"""index_incidents_for_stats
+
+Revision ID: 349e8859ceba
+Revises: 43a005781bee
+Create Date: 2026-10-19 10:02:11.530187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '349e8859ceba'
+down_revision: Union[str, Sequence[str], None] = '43a005781bee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index incidents for the grouped stats queries and ETag validators."""
+    op.create_index('ix_incidents_created_at', 'incidents', ['created_at'])
+    op.create_index('ix_incidents_updated_at', 'incidents', ['updated_at'])
+    op.create_index('ix_incidents_status_category', 'incidents', ['status', 'category'])
+
+
+def downgrade() -> None:
+    """Drop the stats indexes."""
+    op.drop_index('ix_incidents_status_category', table_name='incidents')
+    op.drop_index('ix_incidents_updated_at', table_name='incidents')
+    op.drop_index('ix_incidents_created_at', table_name='incidents')
@@ -0,0 +1,43 @@
+"""create_incident_changes
+
+Revision ID: 43a005781bee
+Revises: add_reset_fields
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43a005781bee'
+down_revision: Union[str, Sequence[str], None] = 'add_reset_fields'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the incident change log used by /incidents/changes."""
+    op.create_table('incident_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(length=16), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index('ix_incident_changes_incident_id', 'incident_changes', ['incident_id'])
+
+    # Backfill one upsert per existing incident so a sync from token 0 sees everything
+    op.execute(
+        "INSERT INTO incident_changes (incident_id, operation) "
+        "SELECT id, 'upsert' FROM incidents ORDER BY id"
+    )
+
+
+def downgrade() -> None:
+    """Drop the incident change log."""
+    op.drop_index('ix_incident_changes_incident_id', table_name='incident_changes')
+    op.drop_table('incident_changes')
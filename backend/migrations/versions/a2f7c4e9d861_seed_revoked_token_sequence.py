@@ -0,0 +1,31 @@
+"""seed_revoked_token_sequence
+
+Revision ID: a2f7c4e9d861
+Revises: f8d3b6e1a5c9
+Create Date: 2026-10-20 16:12:53.094286
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2f7c4e9d861'
+down_revision: Union[str, Sequence[str], None] = 'f8d3b6e1a5c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Hand out revoked token ids in commit order too."""
+    op.execute(
+        "INSERT INTO change_sequences (name, value) "
+        "SELECT 'revoked_tokens', COALESCE(MAX(id), 0) FROM revoked_tokens"
+    )
+
+
+def downgrade() -> None:
+    """Forget the revoked token id counter."""
+    op.execute("DELETE FROM change_sequences WHERE name = 'revoked_tokens'")
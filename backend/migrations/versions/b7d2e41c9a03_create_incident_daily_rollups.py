@@ -0,0 +1,46 @@
+"""create_incident_daily_rollups
+
+Revision ID: b7d2e41c9a03
+Revises: 349e8859ceba
+Create Date: 2026-10-19 11:20:37.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e41c9a03'
+down_revision: Union[str, Sequence[str], None] = '349e8859ceba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the daily stats rollups and fill them from the existing incidents."""
+    op.create_table('incident_daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('source', sa.String(length=32), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'category', 'status', 'source')
+    )
+
+    # Days are UTC calendar days of created_at
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "(created_at AT TIME ZONE 'UTC')::date"
+    else:
+        day = "date(created_at)"
+    op.execute(
+        "INSERT INTO incident_daily_rollups (day, category, status, source, count) "
+        f"SELECT {day}, COALESCE(category, ''), status, source, COUNT(*) "
+        f"FROM incidents GROUP BY {day}, COALESCE(category, ''), status, source"
+    )
+
+
+def downgrade() -> None:
+    """Drop the daily stats rollups."""
+    op.drop_table('incident_daily_rollups')
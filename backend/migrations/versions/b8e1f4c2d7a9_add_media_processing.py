@@ -0,0 +1,43 @@
+"""add_media_processing
+
+Revision ID: b8e1f4c2d7a9
+Revises: a6d3e9b1c724
+Create Date: 2026-10-19 19:02:41.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f4c2d7a9'
+down_revision: Union[str, Sequence[str], None] = 'a6d3e9b1c724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add background processing state and its results to media."""
+    # existing media was processed at upload time
+    op.add_column('media', sa.Column('processing_status', sa.String(length=16), nullable=False, server_default='ready'))
+    op.add_column('media', sa.Column('processing_error', sa.String(length=512), nullable=True))
+    op.add_column('media', sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('media', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('media', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('media', sa.Column('variants', sa.JSON(), nullable=True))
+    op.add_column('media', sa.Column('media_metadata', sa.JSON(), nullable=True))
+    op.create_index('ix_media_processing_status', 'media', ['processing_status'])
+
+
+def downgrade() -> None:
+    """Remove media processing columns."""
+    op.drop_index('ix_media_processing_status', table_name='media')
+    op.drop_column('media', 'media_metadata')
+    op.drop_column('media', 'variants')
+    op.drop_column('media', 'height')
+    op.drop_column('media', 'width')
+    op.drop_column('media', 'processed_at')
+    op.drop_column('media', 'processing_error')
+    op.drop_column('media', 'processing_status')
@@ -0,0 +1,31 @@
+"""add_media_content_hash
+
+Revision ID: c4a7e2f9b16d
+Revises: b8e1f4c2d7a9
+Create Date: 2026-10-19 21:14:09.537120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2f9b16d'
+down_revision: Union[str, Sequence[str], None] = 'b8e1f4c2d7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the content hash that content-addressed media files are stored under."""
+    # existing files keep their UUID names until `flask migrate-uploads` converts them
+    op.add_column('media', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_media_content_hash', 'media', ['content_hash'])
+
+
+def downgrade() -> None:
+    """Remove the media content hash."""
+    op.drop_index('ix_media_content_hash', table_name='media')
+    op.drop_column('media', 'content_hash')
@@ -0,0 +1,43 @@
+"""create_incident_status_transitions
+
+Revision ID: d4f81a2b6c57
+Revises: b7d2e41c9a03
+Create Date: 2026-10-19 13:05:52.914306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f81a2b6c57'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e41c9a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the append-only incident status history.
+
+    Earlier status changes were never recorded, so nothing is backfilled.
+    """
+    op.create_table('incident_status_transitions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=64), nullable=True),
+        sa.Column('from_status', sa.String(length=32), nullable=True),
+        sa.Column('to_status', sa.String(length=32), nullable=False),
+        sa.Column('seconds_since_created', sa.Float(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index('ix_incident_status_transitions_incident_id', 'incident_status_transitions', ['incident_id'])
+
+
+def downgrade() -> None:
+    """Drop the incident status history."""
+    op.drop_index('ix_incident_status_transitions_incident_id', table_name='incident_status_transitions')
+    op.drop_table('incident_status_transitions')
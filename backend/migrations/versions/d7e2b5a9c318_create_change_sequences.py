@@ -0,0 +1,38 @@
+"""create_change_sequences
+
+Revision ID: d7e2b5a9c318
+Revises: c4a7e2f9b16d
+Create Date: 2026-10-20 09:41:27.604113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2b5a9c318'
+down_revision: Union[str, Sequence[str], None] = 'c4a7e2f9b16d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the counters that hand out commit-ordered incident change ids."""
+    op.create_table(
+        'change_sequences',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    # continue after the ids already handed out by the autoincrement
+    op.execute(
+        "INSERT INTO change_sequences (name, value) "
+        "SELECT 'incident_changes', COALESCE(MAX(id), 0) FROM incident_changes"
+    )
+
+
+def downgrade() -> None:
+    """Drop the change id counters."""
+    op.drop_table('change_sequences')
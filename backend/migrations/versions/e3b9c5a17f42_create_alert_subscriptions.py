@@ -0,0 +1,68 @@
+"""create_alert_subscriptions
+
+Revision ID: e3b9c5a17f42
+Revises: d4f81a2b6c57
+Create Date: 2026-10-19 15:40:11.402518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9c5a17f42'
+down_revision: Union[str, Sequence[str], None] = 'd4f81a2b6c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create geofenced alert subscriptions and their notification outbox."""
+    op.create_table('alert_subscriptions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('radius_m', sa.Float(), nullable=True),
+        sa.Column('polygon', sa.JSON(), nullable=True),
+        sa.Column('categories', sa.JSON(), nullable=True),
+        sa.Column('min_lat', sa.Float(), nullable=False),
+        sa.Column('min_lon', sa.Float(), nullable=False),
+        sa.Column('max_lat', sa.Float(), nullable=False),
+        sa.Column('max_lon', sa.Float(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alert_subscriptions_user_id', 'alert_subscriptions', ['user_id'])
+    op.create_index('ix_alert_subscriptions_updated_at', 'alert_subscriptions', ['updated_at'])
+
+    op.create_table('alert_notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subscription_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index('ix_alert_notifications_subscription_id', 'alert_notifications', ['subscription_id'])
+    op.create_index('ix_alert_notifications_user_id', 'alert_notifications', ['user_id'])
+    op.create_index('ix_alert_notifications_incident_id', 'alert_notifications', ['incident_id'])
+
+
+def downgrade() -> None:
+    """Drop the alert tables."""
+    op.drop_index('ix_alert_notifications_incident_id', table_name='alert_notifications')
+    op.drop_index('ix_alert_notifications_user_id', table_name='alert_notifications')
+    op.drop_index('ix_alert_notifications_subscription_id', table_name='alert_notifications')
+    op.drop_table('alert_notifications')
+    op.drop_index('ix_alert_subscriptions_updated_at', table_name='alert_subscriptions')
+    op.drop_index('ix_alert_subscriptions_user_id', table_name='alert_subscriptions')
+    op.drop_table('alert_subscriptions')
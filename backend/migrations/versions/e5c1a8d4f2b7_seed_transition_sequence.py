@@ -0,0 +1,31 @@
+"""seed_transition_sequence
+
+Revision ID: e5c1a8d4f2b7
+Revises: d7e2b5a9c318
+Create Date: 2026-10-20 11:02:45.318907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c1a8d4f2b7'
+down_revision: Union[str, Sequence[str], None] = 'd7e2b5a9c318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Hand out status transition ids in commit order too."""
+    op.execute(
+        "INSERT INTO change_sequences (name, value) "
+        "SELECT 'incident_status_transitions', COALESCE(MAX(id), 0) FROM incident_status_transitions"
+    )
+
+
+def downgrade() -> None:
+    """Forget the status transition id counter."""
+    op.execute("DELETE FROM change_sequences WHERE name = 'incident_status_transitions'")
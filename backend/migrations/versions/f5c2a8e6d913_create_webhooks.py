@@ -0,0 +1,64 @@
+"""create_webhooks
+
+Revision ID: f5c2a8e6d913
+Revises: e3b9c5a17f42
+Create Date: 2026-10-19 16:52:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c2a8e6d913'
+down_revision: Union[str, Sequence[str], None] = 'e3b9c5a17f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create webhook endpoints and the delivery outbox."""
+    op.create_table('webhook_endpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('url', sa.String(length=1024), nullable=False),
+        sa.Column('secret', sa.String(length=128), nullable=False),
+        sa.Column('events', sa.JSON(), nullable=True),
+        sa.Column('categories', sa.JSON(), nullable=True),
+        sa.Column('sources', sa.JSON(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('webhook_deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('endpoint_id', sa.Integer(), nullable=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=32), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default=sa.text("'pending'"), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('claim_token', sa.String(length=32), nullable=True),
+        sa.Column('last_error', sa.String(length=512), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index('ix_webhook_deliveries_endpoint_id', 'webhook_deliveries', ['endpoint_id'])
+    op.create_index('ix_webhook_deliveries_claim_token', 'webhook_deliveries', ['claim_token'])
+    op.create_index('ix_webhook_deliveries_due', 'webhook_deliveries', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    """Drop the webhook tables."""
+    op.drop_index('ix_webhook_deliveries_due', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_claim_token', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_endpoint_id', table_name='webhook_deliveries')
+    op.drop_table('webhook_deliveries')
+    op.drop_table('webhook_endpoints')
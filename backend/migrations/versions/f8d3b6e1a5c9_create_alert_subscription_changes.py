@@ -0,0 +1,39 @@
+"""create_alert_subscription_changes
+
+Revision ID: f8d3b6e1a5c9
+Revises: e5c1a8d4f2b7
+Create Date: 2026-10-20 14:26:08.771350
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8d3b6e1a5c9'
+down_revision: Union[str, Sequence[str], None] = 'e5c1a8d4f2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Log subscription writes for the geofence indexes; commit-ordered notification ids."""
+    op.create_table('alert_subscription_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subscription_id', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.execute(
+        "INSERT INTO change_sequences (name, value) "
+        "SELECT 'alert_notifications', COALESCE(MAX(id), 0) FROM alert_notifications"
+    )
+
+
+def downgrade() -> None:
+    """Drop the subscription change log and its counters."""
+    op.execute("DELETE FROM change_sequences WHERE name IN ('alert_notifications', 'alert_subscription_changes')")
+    op.drop_table('alert_subscription_changes')
@@ -1 +1,13 @@
+from .user import User
 from .incident import Incident
+from .media import Media
+from .change_sequence import ChangeSequence
+from .incident_change import IncidentChange
+from .incident_rollup import IncidentDailyRollup
+from .incident_status_transition import IncidentStatusTransition
+from .alert_subscription import AlertSubscription
+from .alert_subscription_change import AlertSubscriptionChange
+from .alert_notification import AlertNotification
+from .webhook_endpoint import WebhookEndpoint
+from .webhook_delivery import WebhookDelivery
+from .revoked_token import RevokedToken
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from utils.db import Base
+
+class AlertNotification(Base):
+    """Outbox of geofence matches, written in the transaction that created the incident.
+
+    Consumers read it in id order and keep the last id they handled; ids
+    are assigned at commit in commit order (see models.change_sequence).
+    """
+    __tablename__ = "alert_notifications"
+
+    id = Column(Integer, primary_key=True)
+    subscription_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    incident_id = Column(Integer, nullable=False, index=True)
+    category = Column(String(64), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # ids are consumer cursors, never reuse them on SQLite
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "subscription_id": self.subscription_id,
+            "incident_id": self.incident_id,
+            "category": self.category,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, JSON, ForeignKey, text
+from sqlalchemy.sql import func
+from utils.db import Base
+
+class AlertSubscription(Base):
+    """An area a user watches for incidents: a circle or a polygon, optionally per category."""
+    __tablename__ = "alert_subscriptions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String(100), nullable=True)
+
+    # circle: center + radius in meters
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    radius_m = Column(Float, nullable=True)
+    # polygon: [[lat, lon], ...] (used instead of the circle when set)
+    polygon = Column(JSON, nullable=True)
+
+    # category names to alert on; NULL means every category
+    categories = Column(JSON, nullable=True)
+
+    # bounding box of the area, what the spatial index is built from
+    min_lat = Column(Float, nullable=False)
+    min_lon = Column(Float, nullable=False)
+    max_lat = Column(Float, nullable=False)
+    max_lon = Column(Float, nullable=False)
+
+    # deleting deactivates, so other workers' indexes see the change
+    is_active = Column(Boolean, nullable=False, server_default=text("true"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
+    def to_dict(self):
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "categories": self.categories,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+        if self.polygon is not None:
+            data["polygon"] = self.polygon
+        else:
+            data.update({"latitude": self.latitude, "longitude": self.longitude, "radius_m": self.radius_m})
+        return data
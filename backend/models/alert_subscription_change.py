@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, DateTime, event
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Session
+from utils.db import Base
+from models.alert_subscription import AlertSubscription
+from models.change_sequence import queue_log_rows
+
+class AlertSubscriptionChange(Base):
+    """Append-only log of subscription writes; geofence indexes follow it by id.
+
+    Ids are assigned at commit in commit order (see models.change_sequence),
+    so an index that has applied id N will never later find a new row below N.
+    """
+    __tablename__ = "alert_subscription_changes"
+
+    id = Column(Integer, primary_key=True)
+    subscription_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # ids are the cursor of every geofence index, never reuse them on SQLite
+    __table_args__ = {"sqlite_autoincrement": True}
+
+@event.listens_for(Session, "after_flush")
+def record_subscription_changes(session, flush_context):
+    """Queue a change row for every subscription created, changed or deactivated in this flush."""
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, AlertSubscription):
+            rows.append({"subscription_id": obj.id})
+    for obj in session.dirty:
+        if isinstance(obj, AlertSubscription) and session.is_modified(obj, include_collections=False):
+            rows.append({"subscription_id": obj.id})
+
+    if rows:
+        queue_log_rows(session, AlertSubscriptionChange.__table__, rows)
@@ -0,0 +1,68 @@
+from sqlalchemy import Column, String, BigInteger, Table, event, select, update, insert, func
+from sqlalchemy.orm import Session
+from utils.db import Base
+
+# Commit-ordered ids for the append-only tables that readers follow with an
+# "id > cursor" watermark. An autoincrement id is taken when the row is
+# inserted, so on PostgreSQL a transaction holding a lower id can commit
+# after a reader has already seen a higher one and moved past it for good.
+# Rows queued with ``queue_log_rows`` are instead inserted right before the
+# commit, with ids reserved from a counter row in change_sequences whose
+# lock is held until the transaction ends: the next writer waits for that
+# commit before it gets its ids, so ids become visible strictly in order.
+# The lock is only held for the insert and the commit itself.
+
+PENDING_KEY = "log_rows"
+
+
+class ChangeSequence(Base):
+    """The last id handed out for each commit-ordered table."""
+    __tablename__ = "change_sequences"
+
+    name = Column(String(64), primary_key=True)  # table name
+    value = Column(BigInteger, nullable=False)
+
+
+def reserve_ids(connection, table: Table, count: int) -> int:
+    """Reserve ``count`` consecutive ids for ``table`` and return the first.
+
+    The counter row stays locked until the transaction ends.
+    """
+    sequences = ChangeSequence.__table__
+    updated = connection.execute(
+        update(sequences).where(sequences.c.name == table.name).values(value=sequences.c.value + count)
+    ).rowcount
+    if not updated:
+        # first use on a database made by create_all: continue after the existing rows
+        start = connection.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+        connection.execute(insert(sequences).values(name=table.name, value=start + count))
+    last = connection.execute(select(sequences.c.value).where(sequences.c.name == table.name)).scalar_one()
+    return last - count + 1
+
+
+def queue_log_rows(session, table: Table, rows):
+    """Insert ``rows`` into ``table`` with commit-ordered ids when ``session`` commits."""
+    session.info.setdefault(PENDING_KEY, {}).setdefault(table.name, (table, []))[1].extend(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def insert_log_rows(session):
+    if not session.info.get(PENDING_KEY) and not (session.new or session.dirty or session.deleted):
+        return
+    session.flush()  # the flush listeners may queue more rows
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    # one lock order for every writer, so two transactions cannot deadlock on the counters
+    for name in sorted(pending):
+        table, rows = pending[name]
+        first = reserve_ids(connection, table, len(rows))
+        connection.execute(table.insert(), [dict(row, id=first + offset) for offset, row in enumerate(rows)])
+
+
+@event.listens_for(Session, "after_transaction_end")
+def discard_log_rows(session, transaction):
+    # rolled back, or closed without committing: the rows go with the transaction
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Float, text, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from utils.db import Base
@@ -25,13 +25,41 @@ class Incident(Base):
     status = Column(String(32), nullable=False, server_default=text("'reported'"))
 
     published_at = Column(DateTime(timezone=True), nullable=True)  # article publish time
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     __table_args__ = (
         # avoid duplicate news by URL (NULL allowed for weather)
         UniqueConstraint('url', name='uq_incidents_url'),
+        # covers the status/category breakdowns of /stats/overview
+        Index('ix_incidents_status_category', 'status', 'category'),
     )
 
+    # fetch server-generated timestamps on flush (the stats rollups need created_at)
+    __mapper_args__ = {"eager_defaults": True}
+
     # relationship
     media = relationship("Media", back_populates="incident", cascade="all, delete-orphan")
+
+    def to_dict(self, include_media=False):
+        """Convert incident to dictionary."""
+        data = {
+            "id": self.id,
+            "source": self.source,
+            "category": self.category,
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "location": self.location,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "status": self.status,
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+        if include_media:
+            data["media"] = [media.to_dict() for media in self.media]
+
+        return data
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, DateTime, event
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Session
+from utils.db import Base
+from models.incident import Incident
+from models.change_sequence import queue_log_rows
+
+class IncidentChange(Base):
+    """Append-only change log; the id is the monotonic change token used for sync.
+
+    Ids are assigned at commit in commit order (see models.change_sequence),
+    so a reader that has seen id N will never later find a new row below N.
+    """
+    __tablename__ = "incident_changes"
+
+    id = Column(Integer, primary_key=True)
+    incident_id = Column(Integer, nullable=False, index=True)
+
+    # upsert (created or updated) or delete
+    operation = Column(String(16), nullable=False)
+
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # never reuse ids on SQLite, tokens must stay monotonic
+    __table_args__ = {"sqlite_autoincrement": True}
+
+@event.listens_for(Session, "after_flush")
+def record_incident_changes(session, flush_context):
+    """Queue a change row for every incident inserted, updated or deleted in this flush."""
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Incident):
+            rows.append({"incident_id": obj.id, "operation": "upsert"})
+    for obj in session.dirty:
+        if isinstance(obj, Incident) and session.is_modified(obj, include_collections=False):
+            rows.append({"incident_id": obj.id, "operation": "upsert"})
+    for obj in session.deleted:
+        if isinstance(obj, Incident):
+            rows.append({"incident_id": obj.id, "operation": "delete"})
+
+    if rows:
+        queue_log_rows(session, IncidentChange.__table__, rows)
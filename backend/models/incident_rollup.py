@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import timezone
+from sqlalchemy import Column, Integer, String, Date, event, inspect, select
+from sqlalchemy.orm import Session
+from utils.db import Base
+from models.incident import Incident
+
+class IncidentDailyRollup(Base):
+    """Incident counts per UTC day of created_at, category, status and source.
+
+    Kept in step with the incidents table by the flush listeners below and
+    rebuilt from scratch with ``flask rebuild-rollups``.
+    """
+    __tablename__ = "incident_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    # NULL categories are stored as '' so the key stays a plain primary key
+    category = Column(String(64), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    source = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+ROLLUP_FIELDS = ("created_at", "category", "status", "source")
+
+def rollup_key(created_at, category, status, source) -> tuple:
+    """Rollup primary key for a set of incident values."""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date(), category or "", status, source
+
+def _rollup_key_of(incident) -> tuple:
+    return rollup_key(*(getattr(incident, field) for field in ROLLUP_FIELDS))
+
+def _committed_rollup_key(incident):
+    """Key for the values loaded from the database, or None if none of them changed."""
+    state = inspect(incident)
+    values = []
+    changed = False
+    for field in ROLLUP_FIELDS:
+        history = state.attrs[field].load_history()
+        if history.deleted:
+            changed = True
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(incident, field))
+    return rollup_key(*values) if changed else None
+
+def apply_rollup_deltas(connection, deltas: Counter):
+    """Add per-key count deltas to the rollup table in a single upsert statement."""
+    rows = [
+        {"day": day, "category": category, "status": status, "source": source, "count": delta}
+        for (day, category, status, source), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+
+    table = IncidentDailyRollup.__table__
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.category, table.c.status, table.c.source],
+            set_={"count": table.c.count + stmt.excluded["count"]}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Other dialects: update in place, insert keys that are not there yet
+    for row in rows:
+        result = connection.execute(
+            table.update().where(
+                table.c.day == row["day"], table.c.category == row["category"],
+                table.c.status == row["status"], table.c.source == row["source"]
+            ).values(count=table.c.count + row["count"])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+@event.listens_for(Session, "before_flush")
+def capture_rollup_removals(session, flush_context, instances):
+    """Record the pre-flush keys of incidents being deleted or moved to another key.
+
+    This has to happen before the flush, while the old values are still
+    available as attribute history.
+    """
+    removals = Counter()
+    moved = []
+    for obj in session.deleted:
+        if isinstance(obj, Incident):
+            removals[_rollup_key_of(obj)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Incident) and obj not in session.deleted:
+            old_key = _committed_rollup_key(obj)
+            if old_key is not None:
+                removals[old_key] -= 1
+                moved.append(obj)
+    session.info["rollup_removals"] = removals
+    session.info["rollup_moved"] = moved
+
+@event.listens_for(Session, "after_flush")
+def record_rollup_deltas(session, flush_context):
+    """Apply the rollup deltas of the incidents inserted, deleted or moved in this flush."""
+    deltas = session.info.pop("rollup_removals", Counter())
+    for obj in session.info.pop("rollup_moved", []):
+        deltas[_rollup_key_of(obj)] += 1
+    for obj in session.new:
+        if isinstance(obj, Incident):
+            deltas[_rollup_key_of(obj)] += 1
+    apply_rollup_deltas(session.connection(), deltas)
+
+def rebuild_rollups(session, batch_size: int = 10000) -> int:
+    """Recompute all rollup rows from the incidents table; returns the number of keys."""
+    counts = Counter()
+    stmt = select(*[getattr(Incident, field) for field in ROLLUP_FIELDS]).execution_options(yield_per=batch_size)
+    for partition in session.execute(stmt).partitions():
+        for row in partition:
+            counts[rollup_key(*row)] += 1
+
+    connection = session.connection()
+    connection.execute(IncidentDailyRollup.__table__.delete())
+    apply_rollup_deltas(connection, counts)
+    return len(counts)
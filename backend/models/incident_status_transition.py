@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, Float, event, inspect
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Session
+from utils.db import Base
+from models.incident import Incident
+from models.change_sequence import queue_log_rows
+
+class IncidentStatusTransition(Base):
+    """Append-only history of incident status changes; the creation status is recorded too.
+
+    Ids are assigned at commit in commit order (see models.change_sequence),
+    so incremental readers can follow them with an "id > last seen" cursor.
+    """
+    __tablename__ = "incident_status_transitions"
+
+    id = Column(Integer, primary_key=True)
+    incident_id = Column(Integer, nullable=False, index=True)
+    category = Column(String(64), nullable=True)
+
+    # NULL for the status an incident was created with
+    from_status = Column(String(32), nullable=True)
+    to_status = Column(String(32), nullable=False)
+
+    # time from the incident's creation to this transition
+    seconds_since_created = Column(Float, nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # ids are the watermark for incremental readers, never reuse them on SQLite
+    __table_args__ = {"sqlite_autoincrement": True}
+
+def _seconds_since(created_at, now: datetime) -> float:
+    if created_at is None:
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return max((now - created_at).total_seconds(), 0.0)
+
+@event.listens_for(Session, "after_flush")
+def record_status_transitions(session, flush_context):
+    """Queue a transition row for every incident created or whose status changed in this flush."""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Incident):
+            rows.append({
+                "incident_id": obj.id, "category": obj.category,
+                "from_status": None, "to_status": obj.status, "seconds_since_created": 0.0,
+            })
+    for obj in session.dirty:
+        if not isinstance(obj, Incident):
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.added or not history.deleted or history.added[0] == history.deleted[0]:
+            continue
+        rows.append({
+            "incident_id": obj.id, "category": obj.category,
+            "from_status": history.deleted[0], "to_status": history.added[0],
+            "seconds_since_created": _seconds_since(obj.created_at, now),
+        })
+
+    if rows:
+        queue_log_rows(session, IncidentStatusTransition.__table__, rows)
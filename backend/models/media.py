@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, text
+import os
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, text, select
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from utils.db import Base
 
+# Shown in place of thumbnails that are still being generated
+PLACEHOLDER_URL = "/media/placeholder.svg"
+
 class Media(Base):
     __tablename__ = "media"
 
@@ -20,8 +24,22 @@ class Media(Base):
     
     # storage information
     file_path = Column(String(1024), nullable=False)  # local path or cloud URL
+    # sha256 of the file, which is stored as <content_hash><ext> and shared by every
+    # record with the same content; the number of such records is its reference count
+    content_hash = Column(String(64), nullable=True, index=True)
     thumbnail_path = Column(String(1024), nullable=True)  # for images/videos
     
+    # background processing: pending -> processing -> ready | failed
+    processing_status = Column(String(16), nullable=False, server_default=text("'ready'"), index=True)
+    processing_error = Column(String(512), nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # filled in by processing
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    variants = Column(JSON, nullable=True)  # {"640": "<stem>_w640.webp", ...} in uploads/variants
+    media_metadata = Column(JSON, nullable=True)  # format, taken_at, camera, gps
+    
     # metadata
     caption = Column(String, nullable=True)
     alt_text = Column(String(512), nullable=True)
@@ -32,3 +50,40 @@ class Media(Base):
 
     # relationship
     incident = relationship("Incident", back_populates="media")
+
+    def to_dict(self):
+        """Convert media record to dictionary."""
+        if self.thumbnail_path:
+            thumbnail_url = f"/media/thumbnails/{os.path.basename(self.thumbnail_path)}"
+        elif self.media_type == 'image' and self.processing_status in ('pending', 'processing'):
+            thumbnail_url = PLACEHOLDER_URL
+        else:
+            thumbnail_url = None
+        return {
+            "id": self.id,
+            "media_type": self.media_type,
+            "filename": self.filename,
+            "original_filename": self.original_filename,
+            "file_size": self.file_size,
+            "mime_type": self.mime_type,
+            "caption": self.caption,
+            "alt_text": self.alt_text,
+            "thumbnail_url": thumbnail_url,
+            "file_url": f"/media/{self.media_type}s/{self.filename}",
+            "processing_status": self.processing_status,
+            "width": self.width,
+            "height": self.height,
+            "variants": [
+                {"width": int(width), "url": f"/media/variants/{name}"}
+                for width, name in sorted((self.variants or {}).items(), key=lambda item: int(item[0]))
+            ],
+            "metadata": self.media_metadata,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+
+def count_references(session, content_hash: str) -> int:
+    """How many media records share the stored file with ``content_hash``."""
+    return session.execute(
+        select(func.count(Media.id)).where(Media.content_hash == content_hash)
+    ).scalar_one()
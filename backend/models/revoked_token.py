@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from utils.db import Base
+
+class RevokedToken(Base):
+    """A JWT revoked before its expiry (logout), kept until it would have expired.
+
+    Workers sync by reading rows with an id above the last one they saw;
+    ids are assigned at commit in commit order (see models.change_sequence).
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # ids are sync cursors, never reuse them on SQLite
+    __table_args__ = {"sqlite_autoincrement": True}
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, text
 from sqlalchemy.sql import func
 from utils.db import Base
-import bcrypt
+from services.passwords import password_hasher
 
 class User(Base):
     __tablename__ = "users"
@@ -27,13 +27,19 @@ class User(Base):
     last_login = Column(DateTime(timezone=True), nullable=True)
 
     def set_password(self, password: str):
-        """Hash and set password."""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash and set password (raises PasswordHasherBusy when hashing is saturated)."""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        """Check if provided password matches the hash."""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """Check if provided password matches the hash.
+
+        A matching hash made with an outdated cost is replaced; the caller's
+        commit saves it.
+        """
+        valid, new_hash = password_hasher.verify(password, self.password_hash)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
 
     def to_dict(self, include_sensitive=False):
         """Convert user to dictionary."""
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from utils.db import Base
+
+class WebhookDelivery(Base):
+    """Outbox of incident events for webhook endpoints.
+
+    Rows are written in the transaction that changed the incident and moved
+    from ``pending`` to ``delivered``, or to ``dead`` once retries run out.
+    """
+    __tablename__ = "webhook_deliveries"
+
+    id = Column(Integer, primary_key=True)
+    endpoint_id = Column(Integer, nullable=False, index=True)
+    incident_id = Column(Integer, nullable=False)
+    event = Column(String(32), nullable=False)  # incident.created, incident.updated, incident.deleted
+    payload = Column(JSON, nullable=True)
+
+    status = Column(String(16), nullable=False, server_default=text("'pending'"))  # pending, delivered, dead
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # set by the worker that is delivering the row; expires with next_attempt_at
+    claim_token = Column(String(32), nullable=True, index=True)
+    last_error = Column(String(512), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # the dispatcher's "what is due" scan
+        Index('ix_webhook_deliveries_due', 'status', 'next_attempt_at'),
+        # delivery ids are idempotency keys for receivers, never reuse them on SQLite
+        {"sqlite_autoincrement": True},
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "endpoint_id": self.endpoint_id,
+            "incident_id": self.incident_id,
+            "event": self.event,
+            "payload": self.payload,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
+        }
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, text
+from sqlalchemy.sql import func
+from utils.db import Base
+
+class WebhookEndpoint(Base):
+    """A downstream URL that receives incident events, optionally filtered."""
+    __tablename__ = "webhook_endpoints"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=True)
+    url = Column(String(1024), nullable=False)
+    # HMAC-SHA256 key for the X-Inci-Signature header
+    secret = Column(String(128), nullable=False)
+
+    # filters; NULL means no filtering on that field
+    events = Column(JSON, nullable=True)  # created, updated, deleted
+    categories = Column(JSON, nullable=True)
+    sources = Column(JSON, nullable=True)
+
+    is_active = Column(Boolean, nullable=False, server_default=text("true"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def to_dict(self, include_secret=False):
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "url": self.url,
+            "events": self.events,
+            "categories": self.categories,
+            "sources": self.sources,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+        if include_secret:
+            data["secret"] = self.secret
+        return data
@@ -0,0 +1,151 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from marshmallow import ValidationError
+from utils.db import SessionLocal
+from utils.geo import circle_bbox, polygon_bbox
+from utils.validation import AlertSubscriptionSchema, validate_request_data
+from models.incident import Incident
+from models.alert_subscription import AlertSubscription
+from models.alert_notification import AlertNotification
+from services.geofence import geofence_index, Geofence
+
+bp = Blueprint("alerts", __name__, url_prefix="/alerts")
+
+def _current_user_id() -> int:
+    return int(get_jwt_identity())
+
+@bp.get("/subscriptions")
+@jwt_required()
+def list_subscriptions():
+    """List the current user's watched areas."""
+    session = SessionLocal()
+    try:
+        subscriptions = session.query(AlertSubscription).filter(
+            AlertSubscription.user_id == _current_user_id(),
+            AlertSubscription.is_active.is_(True)
+        ).order_by(AlertSubscription.id).all()
+        return jsonify({"subscriptions": [s.to_dict() for s in subscriptions]})
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in list_subscriptions: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in list_subscriptions: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.post("/subscriptions")
+@jwt_required()
+def create_subscription():
+    """Watch a circle or polygon for new incidents, optionally only some categories."""
+    session = SessionLocal()
+    try:
+        try:
+            data = validate_request_data(AlertSubscriptionSchema, request.get_json() or {})
+        except ValidationError as e:
+            return jsonify({"error": "Validation failed", "details": e.messages}), 400
+
+        if 'polygon' in data:
+            bbox = polygon_bbox(data['polygon'])
+            max_span = current_app.config['GEOFENCE_MAX_SPAN_DEGREES']
+            if bbox[2] - bbox[0] > max_span or bbox[3] - bbox[1] > max_span:
+                return jsonify({"error": f"Polygon must fit in {max_span} degrees of latitude and longitude"}), 400
+        else:
+            max_radius = current_app.config['GEOFENCE_MAX_RADIUS_M']
+            if data['radius_m'] > max_radius:
+                return jsonify({"error": f"radius_m must be at most {max_radius:g}"}), 400
+            bbox = circle_bbox(data['latitude'], data['longitude'], data['radius_m'])
+
+        user_id = _current_user_id()
+        active = session.query(func.count(AlertSubscription.id)).filter(
+            AlertSubscription.user_id == user_id,
+            AlertSubscription.is_active.is_(True)
+        ).scalar()
+        if active >= current_app.config['GEOFENCE_MAX_PER_USER']:
+            return jsonify({"error": "Too many subscriptions"}), 409
+
+        subscription = AlertSubscription(
+            user_id=user_id,
+            name=data.get('name'),
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            radius_m=data.get('radius_m'),
+            polygon=data.get('polygon'),
+            categories=data.get('categories'),
+            min_lat=bbox[0], min_lon=bbox[1], max_lat=bbox[2], max_lon=bbox[3],
+        )
+        session.add(subscription)
+        session.commit()
+        # other workers pick it up on their next index refresh
+        geofence_index.add(Geofence.from_subscription(subscription))
+        return jsonify({"message": "Subscription created", "subscription": subscription.to_dict()}), 201
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in create_subscription: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in create_subscription: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.delete("/subscriptions/<int:subscription_id>")
+@jwt_required()
+def delete_subscription(subscription_id: int):
+    """Stop watching an area."""
+    session = SessionLocal()
+    try:
+        subscription = session.get(AlertSubscription, subscription_id)
+        if (not subscription or not subscription.is_active
+                or subscription.user_id != _current_user_id()):
+            return jsonify({"error": "Subscription not found"}), 404
+        subscription.is_active = False
+        session.commit()
+        geofence_index.remove(subscription_id)
+        return jsonify({"message": "Subscription deleted"})
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in delete_subscription: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in delete_subscription: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.get("/notifications")
+@jwt_required()
+def list_notifications():
+    """The current user's alerts after ``since`` (a notification id), oldest first."""
+    session = SessionLocal()
+    try:
+        since = request.args.get("since", 0, type=int)
+        limit = min(request.args.get("limit", 100, type=int), 500)
+        rows = session.query(AlertNotification, Incident.title, Incident.latitude, Incident.longitude).outerjoin(
+            Incident, Incident.id == AlertNotification.incident_id
+        ).filter(
+            AlertNotification.user_id == _current_user_id(),
+            AlertNotification.id > since
+        ).order_by(AlertNotification.id).limit(limit).all()
+
+        notifications = []
+        for notification, title, latitude, longitude in rows:
+            data = notification.to_dict()
+            data["incident"] = {"title": title, "latitude": latitude, "longitude": longitude}
+            notifications.append(data)
+        return jsonify({
+            "notifications": notifications,
+            "next_token": notifications[-1]["id"] if notifications else since,
+        })
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in list_notifications: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in list_notifications: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
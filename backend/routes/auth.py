@@ -5,6 +5,8 @@ from marshmallow import ValidationError
 from utils.db import SessionLocal
 from models.user import User
 from utils.validation import UserRegistrationSchema, UserLoginSchema, validate_request_data
+from services.revocation import token_revocations, token_expiry
+from services.passwords import PasswordHasherBusy
 from datetime import datetime, timedelta
 import traceback
 import secrets
@@ -12,8 +14,11 @@ import hashlib
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
-# JWT blacklist (in production, use Redis or database)
-blacklisted_tokens = set()
+def _hashing_busy():
+    # password hashing is saturated: shed the request rather than queue it
+    response = jsonify({"error": "Too many password requests, try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
 
 @bp.post("/register")
 def register():
@@ -38,6 +43,9 @@ def register():
         if existing_user:
             return jsonify({"error": "User already exists with this username or email"}), 409
         
+        # don't hold a pooled connection while the password is hashed
+        session.close()
+        
         # Create new user
         user = User(
             username=validated_data['username'],
@@ -68,6 +76,9 @@ def register():
     except IntegrityError:
         session.rollback()
         return jsonify({"error": "User already exists"}), 409
+    except PasswordHasherBusy:
+        session.rollback()
+        return _hashing_busy()
     except SQLAlchemyError as e:
         session.rollback()
         current_app.logger.error(f"Database error in register: {str(e)}")
@@ -99,13 +110,17 @@ def login():
             (User.email == validated_data['username'])
         ).first()
         
+        # don't hold a pooled connection while the password is checked
+        session.close()
+        
         if not user or not user.check_password(validated_data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
         
         if not user.is_active:
             return jsonify({"error": "Account is deactivated"}), 401
         
-        # Update last login
+        # Update last login (and the hash, if check_password upgraded it)
+        session.add(user)
         user.last_login = datetime.utcnow()
         session.commit()
         
@@ -121,6 +136,9 @@ def login():
             "access_token": access_token
         })
         
+    except PasswordHasherBusy:
+        session.rollback()
+        return _hashing_busy()
     except SQLAlchemyError as e:
         session.rollback()
         current_app.logger.error(f"Database error in login: {str(e)}")
@@ -135,10 +153,10 @@ def login():
 @bp.post("/logout")
 @jwt_required()
 def logout():
-    """Logout user by blacklisting token."""
+    """Logout user by revoking the token until it expires."""
     try:
-        jti = get_jwt()['jti']  # JWT ID
-        blacklisted_tokens.add(jti)
+        token = get_jwt()
+        token_revocations.revoke(token['jti'], token_expiry(token))
         
         return jsonify({"message": "Successfully logged out"}), 200
         
@@ -209,10 +227,9 @@ def update_profile():
     finally:
         session.close()
 
-# JWT token blacklist checker
+# JWT revocation check, run on every authenticated request
 def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload['jti']
-    return jti in blacklisted_tokens
+    return token_revocations.is_revoked(jwt_payload['jti'])
 
 @bp.post("/forgot-password")
 def forgot_password():
@@ -294,8 +311,11 @@ def reset_password():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        # Update password and clear reset token
+        # Update password and clear reset token; the connection goes back
+        # to the pool while the password is hashed
+        session.close()
         user.set_password(new_password)
+        session.add(user)
         session.commit()
         
         # Remove token from temporary storage
@@ -305,6 +325,9 @@ def reset_password():
         
         return jsonify({"message": "Password reset successfully"})
         
+    except PasswordHasherBusy:
+        session.rollback()
+        return _hashing_busy()
     except SQLAlchemyError as e:
         session.rollback()
         current_app.logger.error(f"Database error in reset_password: {str(e)}")
@@ -1,80 +1,85 @@
-from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import select, and_
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from sqlalchemy import select, and_, func
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from marshmallow import ValidationError
 from utils.db import SessionLocal
 from models.incident import Incident
-from models.media import Media
+from models.media import Media, count_references
+from models.incident_change import IncidentChange
 from utils.file_handler import FileHandler
-from utils.validation import IncidentCreateSchema, IncidentUpdateSchema, validate_request_data
+from services.media_processing import media_processor
+from services.export import (iter_incident_rows, ndjson_lines, csv_lines, stream_columnar,
+                             time_range_criteria, pyarrow_available, COLUMNAR_FORMATS)
+from utils.validation import IncidentCreateSchema, IncidentUpdateSchema, validate_request_data, validate_batch
+from utils.etag import compute_etag, normalized_args, incident_fingerprint
+from utils.cache import cached_etag_response, invalidate_incident_caches, incident_tag, INCIDENT_LIST_TAG
+from services.hotspots import record_hotspot
 import traceback
 from datetime import datetime
 
 bp = Blueprint("incidents", __name__, url_prefix="/incidents")
 
+def _incident_filters(args) -> list:
+    """Build the filter criteria shared by the incident list endpoints."""
+    criteria = []
+
+    source = args.get("source")      # e.g., news, weather
+    category = args.get("category")  # e.g., accident, weather
+    search = args.get("q")
+
+    if source:
+        criteria.append(Incident.source == source)
+    if category:
+        criteria.append(Incident.category == category)
+    if search:
+        like = f"%{search}%"
+        criteria.append(
+            (Incident.title.ilike(like)) | (Incident.description.ilike(like))
+        )
+    return criteria
+
 @bp.get("")
 def list_incidents():
     session = SessionLocal()
     try:
-        q = session.query(Incident)
-
-        source = request.args.get("source")      # e.g., news, weather
-        category = request.args.get("category")  # e.g., accident, weather
-        search = request.args.get("q")
+        criteria = _incident_filters(request.args)
         limit = int(request.args.get("limit", 100))
         offset = int(request.args.get("offset", 0))
 
-        if source:
-            q = q.filter(Incident.source == source)
-        if category:
-            q = q.filter(Incident.category == category)
-        if search:
-            like = f"%{search}%"
-            q = q.filter(
-                (Incident.title.ilike(like)) | (Incident.description.ilike(like))
-            )
-
-        q = q.order_by(Incident.published_at.desc().nullslast(),
-                       Incident.created_at.desc()).offset(offset).limit(limit)
-
-        rows = q.all()
-        data = []
-        for r in rows:
-            # Get media files for this incident
-            media_files = []
-            for media in r.media:
-                media_files.append({
-                    "id": media.id,
-                    "media_type": media.media_type,
-                    "filename": media.filename,
-                    "original_filename": media.original_filename,
-                    "file_size": media.file_size,
-                    "mime_type": media.mime_type,
-                    "caption": media.caption,
-                    "alt_text": media.alt_text,
-                    "thumbnail_url": f"/media/thumbnails/{media.filename}" if media.media_type == 'image' else None,
-                    "file_url": f"/media/{media.media_type}s/{media.filename}",
-                    "created_at": media.created_at.isoformat() if media.created_at else None
-                })
-                
-            incident_data = {
-                "id": r.id,
-                "source": r.source,
-                "category": r.category,
-                "title": r.title,
-                "description": r.description,
-                "url": r.url,
-                "location": r.location,
-                "latitude": r.latitude,
-                "longitude": r.longitude,
-                "status": r.status,
-                "published_at": r.published_at.isoformat() if r.published_at else None,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-                "media": media_files
-            }
-            data.append(incident_data)
-        return jsonify(data)
+        def validate():
+            # Cheap validator query; an unchanged poll skips the main query entirely
+            return compute_etag("incidents", normalized_args(),
+                                *incident_fingerprint(session, *criteria))
+
+        def build():
+            q = session.query(Incident).filter(*criteria)
+            q = q.order_by(Incident.published_at.desc().nullslast(),
+                           Incident.created_at.desc()).offset(offset).limit(limit)
+
+            rows = q.all()
+            data = []
+            for r in rows:
+                incident_data = {
+                    "id": r.id,
+                    "source": r.source,
+                    "category": r.category,
+                    "title": r.title,
+                    "description": r.description,
+                    "url": r.url,
+                    "location": r.location,
+                    "latitude": r.latitude,
+                    "longitude": r.longitude,
+                    "status": r.status,
+                    "published_at": r.published_at.isoformat() if r.published_at else None,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                    "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+                    "media": [media.to_dict() for media in r.media]
+                }
+                data.append(incident_data)
+            return data
+
+        return cached_etag_response("incidents:list", [INCIDENT_LIST_TAG], validate, build)
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in list_incidents: {str(e)}")
         return jsonify({"error": "Database error"}), 500
@@ -84,11 +89,131 @@ def list_incidents():
     finally:
         session.close()
 
+@bp.get("/changes")
+def list_incident_changes():
+    """Incremental sync: incidents changed after a change token, plus tombstones.
+
+    Pass the ``next_token`` of the previous response as ``since``. Each incident
+    appears once, in the state it has now; deleted incidents are reported by id.
+    """
+    session = SessionLocal()
+    try:
+        # a malformed token must not silently restart the sync from scratch
+        since = request.args.get("since", type=int)
+        if since is None and "since" in request.args:
+            return jsonify({"error": "since must be an integer change token"}), 400
+        since = since or 0
+        limit = min(request.args.get("limit", 500, type=int), 1000)
+
+        # Latest change per incident after the token; served by the primary key index
+        latest = session.query(
+            IncidentChange.incident_id,
+            func.max(IncidentChange.id).label("seq")
+        ).filter(IncidentChange.id > since).group_by(IncidentChange.incident_id).subquery()
+
+        changes = session.query(IncidentChange).join(
+            latest, IncidentChange.id == latest.c.seq
+        ).order_by(IncidentChange.id).limit(limit + 1).all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        upsert_ids = [c.incident_id for c in changes if c.operation == "upsert"]
+        incidents = {}
+        if upsert_ids:
+            for incident in session.query(Incident).options(selectinload(Incident.media)).filter(
+                    Incident.id.in_(upsert_ids)).all():
+                incidents[incident.id] = incident
+
+        updated = []
+        deleted = []
+        for change in changes:
+            incident = incidents.get(change.incident_id)
+            if change.operation == "upsert" and incident is not None:
+                updated.append(incident.to_dict(include_media=True))
+            else:
+                deleted.append(change.incident_id)
+
+        return jsonify({
+            "incidents": updated,
+            "deleted": deleted,
+            "next_token": changes[-1].id if changes else since,
+            "has_more": has_more
+        })
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in list_incident_changes: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in list_incident_changes: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+EXPORT_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXPORT_EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "parquet": "parquet", "arrow": "arrows"}
+
+@bp.get("/export")
+def export_incidents():
+    """Stream all matching incidents as NDJSON, CSV, Parquet or Arrow IPC.
+
+    Accepts the same filters as the list endpoint plus an optional ``start`` /
+    ``end`` (ISO 8601) window on ``created_at``. Rows are read from a
+    server-side cursor and written as they arrive, so memory stays flat and
+    the first bytes go out immediately regardless of the export size.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"error": f"Invalid format. Use one of: {', '.join(EXPORT_MIMETYPES)}"}), 400
+    if fmt in COLUMNAR_FORMATS and not pyarrow_available():
+        return jsonify({"error": "Columnar export requires pyarrow to be installed"}), 501
+
+    try:
+        start = request.args.get("start")
+        end = request.args.get("end")
+        window = time_range_criteria(
+            datetime.fromisoformat(start) if start else None,
+            datetime.fromisoformat(end) if end else None
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid start/end. Use ISO 8601 timestamps"}), 400
+
+    criteria = _incident_filters(request.args) + window
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    columnar_batch_size = current_app.config['EXPORT_COLUMNAR_BATCH_SIZE']
+
+    def generate():
+        session = SessionLocal()
+        try:
+            rows = iter_incident_rows(session, criteria, batch_size)
+            if fmt in COLUMNAR_FORMATS:
+                yield from stream_columnar(rows, fmt, columnar_batch_size)
+            elif fmt == "ndjson":
+                yield from ndjson_lines(rows)
+            else:
+                yield from csv_lines(rows)
+        except SQLAlchemyError as e:
+            # Headers are already sent; all we can do is stop the stream
+            current_app.logger.error(f"Database error in export_incidents: {str(e)}")
+        finally:
+            session.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=incidents.{EXPORT_EXTENSIONS[fmt]}"}
+    )
+
 @bp.post("")
 def create_incident():
     """Create a new incident with optional media upload."""
     session = SessionLocal()
     file_handler = FileHandler()
+    stored_uploads = []
     
     try:
         # Handle multipart form data
@@ -145,8 +270,9 @@ def create_incident():
                             "error": f"File too large: {media_file.filename}. Maximum size is {current_app.config['MAX_CONTENT_LENGTH'] / 1024 / 1024:.1f}MB"
                         }), 400
                     
-                    # Save file
+                    # Save file (moved into its content-addressed place after the commit)
                     file_info = file_handler.save_file(media_file, media_type)
+                    stored_uploads.append(file_info)
                     
                     # Create media record
                     media = Media(
@@ -157,24 +283,21 @@ def create_incident():
                         file_size=file_info['file_size'],
                         mime_type=file_info['mime_type'],
                         file_path=file_info['file_path'],
-                        thumbnail_path=file_info['thumbnail_path']
+                        content_hash=file_info['content_hash'],
+                        # thumbnail and variants are generated after the commit
+                        processing_status='pending' if media_type == 'image' else 'ready'
                     )
                     session.add(media)
                     media_records.append(media)
                     
                 except Exception as e:
-                    # Cleanup uploaded files on error
-                    for media_record in media_records:
-                        file_handler.delete_media_files(media_record)
-                    
+                    # uploads saved so far are discarded below
                     return jsonify({
                         "error": f"Failed to process media file {media_file.filename}: {str(e)}"
                     }), 400
         
-        # Commit transaction
-        session.commit()
-        
-        # Prepare response
+        # Read the incident while it is loaded; commit() expires it
+        session.flush()
         response_data = {
             "id": incident.id,
             "source": incident.source,
@@ -186,22 +309,29 @@ def create_incident():
             "longitude": incident.longitude,
             "status": incident.status,
             "created_at": incident.created_at.isoformat(),
-            "media": [
-                {
-                    "id": media.id,
-                    "media_type": media.media_type,
-                    "filename": media.filename,
-                    "original_filename": media.original_filename,
-                    "file_size": media.file_size,
-                    "mime_type": media.mime_type,
-                    "thumbnail_url": f"/media/thumbnails/{media.filename}" if media.thumbnail_path else None,
-                    "file_url": f"/media/{media.media_type}s/{media.filename}"
-                }
-                for media in media_records
-            ]
         }
+        created_at = incident.created_at
+
+        # Commit transaction
+        session.commit()
+        for file_info in stored_uploads:
+            file_handler.commit_upload(file_info)
+        invalidate_incident_caches()
+        
+        # Process uploaded images in the background (or right here in sync mode)
+        pending_ids = [media.id for media in media_records if media.processing_status == 'pending']
+        if pending_ids:
+            if current_app.config['MEDIA_PROCESSING'] == 'sync':
+                for media_id in pending_ids:
+                    media_processor.process(media_id)
+            else:
+                media_processor.submit(pending_ids)
         
-        current_app.logger.info(f"Created incident {incident.id} with {len(media_records)} media files")
+        # Prepare response
+        response_data["media"] = [media.to_dict() for media in media_records]
+        
+        record_hotspot(response_data["latitude"], response_data["longitude"], response_data["category"], created_at)
+        current_app.logger.info(f"Created incident {response_data['id']} with {len(media_records)} media files")
         return jsonify(response_data), 201
         
     except ValidationError as e:
@@ -216,6 +346,139 @@ def create_incident():
         current_app.logger.error(f"Unexpected error in create_incident: {str(e)}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
+    finally:
+        # Cleanup uploaded files that were not committed
+        for file_info in stored_uploads:
+            file_handler.discard_upload(file_info)
+        session.close()
+
+def _bulk_items():
+    """Extract the item list of a bulk request, or return an error response."""
+    data = request.get_json(silent=True)
+    items = data.get("incidents") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "Expected a non-empty list of incidents"}), 400)
+
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    if len(items) > max_items:
+        return None, (jsonify({"error": f"Too many incidents in one request. Maximum is {max_items}"}), 413)
+    return items, None
+
+@bp.post("/bulk")
+def bulk_create_incidents():
+    """Create many incidents in one transaction.
+
+    The whole batch is rejected if any item fails validation; errors are
+    reported per item index.
+    """
+    session = SessionLocal()
+    
+    try:
+        items, error = _bulk_items()
+        if error:
+            return error
+
+        validated, errors = validate_batch(IncidentCreateSchema, items)
+        if errors:
+            return jsonify({"error": "Validation failed", "details": errors}), 400
+
+        # One flush issues batched INSERTs for the whole list
+        incidents = [Incident(**data) for data in validated]
+        session.add_all(incidents)
+        session.flush()
+        # read what we need while the rows are loaded; commit() expires them
+        created = [(incident.id, incident.latitude, incident.longitude, incident.category, incident.created_at)
+                   for incident in incidents]
+        session.commit()
+        invalidate_incident_caches()
+
+        ids = [incident_id for incident_id, *_ in created]
+        for _, latitude, longitude, category, created_at in created:
+            record_hotspot(latitude, longitude, category, created_at)
+
+        current_app.logger.info(f"Bulk created {len(incidents)} incidents")
+        return jsonify({
+            "created": len(incidents),
+            "ids": ids
+        }), 201
+        
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in bulk_create_incidents: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in bulk_create_incidents: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.patch("/bulk")
+def bulk_update_incidents():
+    """Update many incidents in one transaction.
+
+    Each item carries the incident ``id`` plus the fields to change. The whole
+    batch is rejected if any item is invalid or refers to a missing incident.
+    """
+    session = SessionLocal()
+    
+    try:
+        items, error = _bulk_items()
+        if error:
+            return error
+
+        errors = {}
+        ids = []
+        for index, item in enumerate(items):
+            incident_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(incident_id, int) or isinstance(incident_id, bool):
+                errors[index] = {"id": ["Missing or invalid incident id."]}
+            ids.append(incident_id)
+
+        updates, validation_errors = validate_batch(
+            IncidentUpdateSchema,
+            [{k: v for k, v in item.items() if k != "id"} if isinstance(item, dict) else item for item in items]
+        )
+        for index, messages in validation_errors.items():
+            errors.setdefault(index, {}).update(messages)
+
+        # Load every target row with a single query
+        incidents = {
+            incident.id: incident
+            for incident in session.query(Incident).filter(
+                Incident.id.in_([i for i in ids if isinstance(i, int)])
+            ).all()
+        }
+        for index, incident_id in enumerate(ids):
+            if index not in errors and incident_id not in incidents:
+                errors[index] = {"id": ["Incident not found."]}
+
+        if errors:
+            return jsonify({"error": "Validation failed", "details": errors}), 400
+
+        for incident_id, data in zip(ids, updates):
+            incident = incidents[incident_id]
+            for field, value in data.items():
+                setattr(incident, field, value)
+
+        # One flush issues batched UPDATEs for the modified rows
+        session.commit()
+        invalidate_incident_caches(*incidents.keys())
+
+        current_app.logger.info(f"Bulk updated {len(incidents)} incidents")
+        return jsonify({
+            "updated": len(incidents),
+            "ids": sorted(incidents.keys())
+        })
+        
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in bulk_update_incidents: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in bulk_update_incidents: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
     finally:
         session.close()
 
@@ -224,47 +487,45 @@ def get_incident(incident_id: int):
     """Get incident details with media information."""
     session = SessionLocal()
     try:
-        # Get incident with media
-        incident = session.query(Incident).filter(Incident.id == incident_id).first()
-        if not incident:
+        def validate():
+            # Validate against the row's updated_at before loading incident and media
+            last_updated = session.query(Incident.updated_at).filter(Incident.id == incident_id).scalar()
+            if last_updated is None:
+                return None
+            return compute_etag("incident", incident_id, last_updated)
+
+        def build():
+            # Get incident with media
+            incident = session.query(Incident).filter(Incident.id == incident_id).first()
+            if not incident:
+                return None
+            
+            # Get associated media
+            media_records = session.query(Media).filter(Media.incident_id == incident_id).all()
+            
+            response_data = {
+                "id": incident.id,
+                "source": incident.source,
+                "category": incident.category,
+                "title": incident.title,
+                "description": incident.description,
+                "url": incident.url,
+                "location": incident.location,
+                "latitude": incident.latitude,
+                "longitude": incident.longitude,
+                "status": incident.status,
+                "published_at": incident.published_at.isoformat() if incident.published_at else None,
+                "created_at": incident.created_at.isoformat() if incident.created_at else None,
+                "updated_at": incident.updated_at.isoformat() if incident.updated_at else None,
+                "media": [media.to_dict() for media in media_records]
+            }
+            return response_data
+
+        response = cached_etag_response("incidents:detail", [incident_tag(incident_id)],
+                                        validate, build, params=[incident_id])
+        if response is None:
             return jsonify({"error": "Incident not found"}), 404
-        
-        # Get associated media
-        media_records = session.query(Media).filter(Media.incident_id == incident_id).all()
-        
-        response_data = {
-            "id": incident.id,
-            "source": incident.source,
-            "category": incident.category,
-            "title": incident.title,
-            "description": incident.description,
-            "url": incident.url,
-            "location": incident.location,
-            "latitude": incident.latitude,
-            "longitude": incident.longitude,
-            "status": incident.status,
-            "published_at": incident.published_at.isoformat() if incident.published_at else None,
-            "created_at": incident.created_at.isoformat() if incident.created_at else None,
-            "updated_at": incident.updated_at.isoformat() if incident.updated_at else None,
-            "media": [
-                {
-                    "id": media.id,
-                    "media_type": media.media_type,
-                    "filename": media.filename,
-                    "original_filename": media.original_filename,
-                    "file_size": media.file_size,
-                    "mime_type": media.mime_type,
-                    "caption": media.caption,
-                    "alt_text": media.alt_text,
-                    "thumbnail_url": f"/media/thumbnails/{media.filename}" if media.thumbnail_path else None,
-                    "file_url": f"/media/{media.media_type}s/{media.filename}",
-                    "created_at": media.created_at.isoformat()
-                }
-                for media in media_records
-            ]
-        }
-        
-        return jsonify(response_data)
+        return response
         
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in get_incident: {str(e)}")
@@ -298,6 +559,7 @@ def update_incident(incident_id: int):
             setattr(incident, field, value)
         
         session.commit()
+        invalidate_incident_caches(incident_id)
         
         # Return updated incident
         return jsonify({
@@ -345,13 +607,14 @@ def delete_incident(incident_id: int):
         # Get associated media for cleanup
         media_records = session.query(Media).filter(Media.incident_id == incident_id).all()
         
-        # Delete media files from filesystem
-        for media in media_records:
-            file_handler.delete_media_files(media)
-        
         # Delete from database (cascade will handle media records)
         session.delete(incident)
         session.commit()
+        invalidate_incident_caches(incident_id)
+        
+        # Delete media files nothing else references from the filesystem
+        for media in media_records:
+            file_handler.delete_media_files(media, lambda content_hash: count_references(session, content_hash))
         
         current_app.logger.info(f"Deleted incident {incident_id} with {len(media_records)} media files")
         return jsonify({"message": "Incident deleted successfully"}), 200
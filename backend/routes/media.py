@@ -1,12 +1,36 @@
-from flask import Blueprint, send_from_directory, abort, current_app
+from flask import Blueprint, send_from_directory, abort, current_app, Response, request, jsonify
 from pathlib import Path
+from services.image_resizer import image_resizer
 import os
 
 bp = Blueprint("media", __name__, url_prefix="/media")
 
+# Neutral image shown while an upload's thumbnail is being generated
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="300" height="300" viewBox="0 0 300 300">'
+    '<rect width="300" height="300" fill="#e5e7eb"/>'
+    '<path d="M90 200l40-50 30 35 20-25 30 40z" fill="#9ca3af"/>'
+    '<circle cx="120" cy="110" r="15" fill="#9ca3af"/></svg>'
+)
+
+RESIZE_FORMATS = ('webp', 'jpeg', 'jpg')
+# a resized copy only changes if the original is replaced, which uploads never do
+RESIZED_MAX_AGE = 7 * 24 * 3600
+
+@bp.route('/placeholder.svg')
+def serve_placeholder():
+    """Serve the placeholder for media that is still being processed."""
+    return Response(PLACEHOLDER_SVG, mimetype='image/svg+xml',
+                    headers={"Cache-Control": "public, max-age=86400"})
+
 @bp.route('/images/<filename>')
 def serve_image(filename):
-    """Serve image files."""
+    """Serve image files; ?w=&h=&fmt= serves a copy resized to fit (see image_resizer)."""
+    resize = request.args.get('w') or request.args.get('h') or request.args.get('fmt')
+    if resize:
+        width, height, error = _resize_arguments()
+        if error:
+            return jsonify({"error": error, "allowed_sizes": sorted(image_resizer.sizes)}), 400
     try:
         upload_folder = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
         images_path = upload_folder / 'images'
@@ -18,11 +42,39 @@ def serve_image(filename):
         if not file_path.exists() or not file_path.is_file():
             abort(404)
         
-        return send_from_directory(str(images_path), filename)
+        if not resize:
+            return send_from_directory(str(images_path), filename)
+        
+        fmt = request.args.get('fmt')
+        if fmt is None:
+            fmt = 'webp' if 'image/webp' in request.accept_mimetypes else 'jpeg'
+        resized_path = image_resizer.resized(file_path, width, height, fmt)
+        response = send_from_directory(str(resized_path.parent), resized_path.name,
+                                       max_age=RESIZED_MAX_AGE)
+        if 'fmt' not in request.args:
+            response.vary.add('Accept')
+        return response
     except Exception as e:
         current_app.logger.error(f"Error serving image {filename}: {str(e)}")
         abort(404)
 
+def _resize_arguments():
+    """(width, height, error) from the w/h/fmt query arguments."""
+    sizes = {}
+    for name in ('w', 'h'):
+        value = request.args.get(name)
+        if value is None:
+            sizes[name] = None
+            continue
+        if not value.isdigit() or not image_resizer.allowed(int(value)):
+            return None, None, f"Unsupported {name}: {value}"
+        sizes[name] = int(value)
+    if sizes['w'] is None and sizes['h'] is None:
+        return None, None, "w or h is required to resize"
+    if request.args.get('fmt', 'webp').lower() not in RESIZE_FORMATS:
+        return None, None, f"Unsupported fmt: {request.args['fmt']} (use {', '.join(RESIZE_FORMATS)})"
+    return sizes['w'], sizes['h'], None
+
 @bp.route('/videos/<filename>')
 def serve_video(filename):
     """Serve video files."""
@@ -79,3 +131,22 @@ def serve_thumbnail(filename):
     except Exception as e:
         current_app.logger.error(f"Error serving thumbnail {filename}: {str(e)}")
         abort(404)
+
+@bp.route('/variants/<filename>')
+def serve_variant(filename):
+    """Serve responsive image variants."""
+    try:
+        upload_folder = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+        variants_path = upload_folder / 'variants'
+        
+        if not variants_path.exists():
+            abort(404)
+        
+        file_path = variants_path / filename
+        if not file_path.exists() or not file_path.is_file():
+            abort(404)
+        
+        return send_from_directory(str(variants_path), filename)
+    except Exception as e:
+        current_app.logger.error(f"Error serving variant {filename}: {str(e)}")
+        abort(404)
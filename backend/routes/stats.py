@@ -1,62 +1,116 @@
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import func, text, and_, or_
+from sqlalchemy import func, text, and_, or_, case
 from sqlalchemy.exc import SQLAlchemyError
 from utils.db import SessionLocal
 from models.incident import Incident
+from models.incident_rollup import IncidentDailyRollup
+from utils.etag import compute_etag, normalized_args, change_token
+from utils.cache import cached_etag_response, INCIDENT_STATS_TAG
+from utils.buckets import date_bucket, as_utc_naive, bucket_range, next_bucket, BUCKET_GRANULARITIES
+from services.analytics import refreshed_snapshot
+from services.hotspots import hotspot_detector
+from services.resolution import resolution_sketches
 from datetime import datetime, timedelta
 import traceback
 
 bp = Blueprint("stats", __name__, url_prefix="/stats")
 
+def _stats_now() -> datetime:
+    """Reference time for relative windows, truncated to the minute.
+
+    Truncation keeps a response stable for a given dataset within the minute,
+    which lets the ETag (that includes this value) act as a strong validator.
+    """
+    return datetime.utcnow().replace(second=0, microsecond=0)
+
+def _stats_etag(session, name: str, now: datetime) -> str:
+    """Validator for a stats endpoint from the change token, parameters and window.
+
+    Every incident write appends to the change log, so its last id moves with
+    any change the stats could reflect without scanning the incidents table.
+    """
+    return compute_etag("stats", name, normalized_args(), now, change_token(session))
+
+def _cached_stats_response(session, name: str, now: datetime, build):
+    """Serve a stats payload through the response cache, keyed by params and window."""
+    return cached_etag_response(
+        f"stats:{name}", [INCIDENT_STATS_TAG],
+        lambda: _stats_etag(session, name, now), build,
+        params=[normalized_args(), now]
+    )
+
+def _rollup_category(category):
+    """Rollups store NULL categories as ''."""
+    return category or None
+
+def _overview_counts(session, week_start: datetime, today: datetime, recent_start: datetime):
+    """(status, category, count) groups, per-day counts of the week and the 24h count, from SQL."""
+    # Breakdowns and total from the (day, category, status, source) rollups;
+    # keys whose incidents were all deleted or moved keep a zero count
+    groups = session.query(
+        IncidentDailyRollup.status,
+        IncidentDailyRollup.category,
+        func.sum(IncidentDailyRollup.count)
+    ).group_by(
+        IncidentDailyRollup.status, IncidentDailyRollup.category
+    ).having(func.sum(IncidentDailyRollup.count) > 0).all()
+    groups = [(status, _rollup_category(category), count) for status, category, count in groups]
+
+    # Weekly trend (last 7 days) from the rollup days
+    daily = session.query(
+        IncidentDailyRollup.day,
+        func.sum(IncidentDailyRollup.count)
+    ).filter(
+        IncidentDailyRollup.day >= week_start.date(), IncidentDailyRollup.day <= today.date()
+    ).group_by(IncidentDailyRollup.day).all()
+    daily_counts = {day.strftime("%Y-%m-%d"): count for day, count in daily}
+
+    # The rolling 24h window does not align with day buckets; count it on
+    # the created_at index instead
+    recent = session.query(func.count(Incident.id)).filter(Incident.created_at >= recent_start).scalar()
+    return groups, daily_counts, recent
+
+def _overview_payload(session, now: datetime) -> dict:
+    """Compute /stats/overview from the analytics snapshot, or the rollups plus one index range count."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today - timedelta(days=6)
+    recent_start = now - timedelta(hours=24)
+
+    snapshot = refreshed_snapshot(session)
+    if snapshot is not None:
+        groups, daily_counts, recent_incidents = snapshot.overview_counts(week_start, 7, recent_start)
+    else:
+        groups, daily_counts, recent_incidents = _overview_counts(session, week_start, today, recent_start)
+
+    total_incidents = 0
+    status_counts = {}
+    category_counts = {}
+    for status, category, count in groups:
+        total_incidents += count
+        status_counts[status] = status_counts.get(status, 0) + count
+        category_counts[category] = category_counts.get(category, 0) + count
+
+    weekly_stats = []
+    for i in range(7):
+        day = (week_start + timedelta(days=i)).strftime("%Y-%m-%d")
+        weekly_stats.append({"date": day, "count": daily_counts.get(day, 0)})
+
+    return {
+        "total_incidents": total_incidents,
+        "recent_incidents_24h": recent_incidents,
+        "status_breakdown": [{"status": k, "count": v} for k, v in status_counts.items()],
+        "category_breakdown": [{"category": k, "count": v} for k, v in category_counts.items()],
+        "weekly_trend": weekly_stats
+    }
+
 @bp.get("/overview")
 def get_overview_stats():
     """Get overview statistics for incidents."""
     session = SessionLocal()
     
     try:
-        # Basic counts
-        total_incidents = session.query(func.count(Incident.id)).scalar()
-        
-        # Status breakdown
-        status_stats = session.query(
-            Incident.status,
-            func.count(Incident.id).label('count')
-        ).group_by(Incident.status).all()
-        
-        # Category breakdown
-        category_stats = session.query(
-            Incident.category,
-            func.count(Incident.id).label('count')
-        ).group_by(Incident.category).all()
-        
-        # Recent incidents (last 24 hours)
-        twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-        recent_incidents = session.query(func.count(Incident.id)).filter(
-            Incident.created_at >= twenty_four_hours_ago
-        ).scalar()
-        
-        # Weekly trend (last 7 days)
-        weekly_stats = []
-        for i in range(7):
-            day_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=i)
-            day_end = day_start + timedelta(days=1)
-            
-            daily_count = session.query(func.count(Incident.id)).filter(
-                and_(Incident.created_at >= day_start, Incident.created_at < day_end)
-            ).scalar()
-            
-            weekly_stats.append({
-                "date": day_start.strftime("%Y-%m-%d"),
-                "count": daily_count
-            })
-        
-        return jsonify({
-            "total_incidents": total_incidents,
-            "recent_incidents_24h": recent_incidents,
-            "status_breakdown": [{"status": s[0], "count": s[1]} for s in status_stats],
-            "category_breakdown": [{"category": c[0], "count": c[1]} for c in category_stats],
-            "weekly_trend": list(reversed(weekly_stats))
-        })
+        now = _stats_now()
+        return _cached_stats_response(session, "overview", now, lambda: _overview_payload(session, now))
         
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in get_overview_stats: {str(e)}")
@@ -67,6 +121,19 @@ def get_overview_stats():
     finally:
         session.close()
 
+def _category_counts(session, start_day) -> list:
+    """(category, total, resolved, open) rows from the rollups since ``start_day``."""
+    total = func.sum(IncidentDailyRollup.count)
+    rows = session.query(
+        IncidentDailyRollup.category,
+        total.label('total_count'),
+        func.sum(case((IncidentDailyRollup.status == 'resolved', IncidentDailyRollup.count), else_=0)).label('resolved_count'),
+        func.sum(case((IncidentDailyRollup.status == 'reported', IncidentDailyRollup.count), else_=0)).label('open_count')
+    ).filter(
+        IncidentDailyRollup.day >= start_day
+    ).group_by(IncidentDailyRollup.category).having(total > 0).all()
+    return [(_rollup_category(category), *counts) for category, *counts in rows]
+
 @bp.get("/category")
 def get_category_stats():
     """Get detailed category statistics."""
@@ -75,32 +142,33 @@ def get_category_stats():
     try:
         # Get time filter
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
+        now = _stats_now()
+        # Rollups are daily, so the window starts at midnight (UTC) of its first day
+        start_day = (now - timedelta(days=days)).date()
         
-        # Category stats with time filter
-        category_stats = session.query(
-            Incident.category,
-            func.count(Incident.id).label('total_count'),
-            func.count(Incident.id).filter(Incident.status == 'resolved').label('resolved_count'),
-            func.count(Incident.id).filter(Incident.status == 'reported').label('open_count')
-        ).filter(
-            Incident.created_at >= start_date
-        ).group_by(Incident.category).all()
+        def build():
+            snapshot = refreshed_snapshot(session)
+            if snapshot is not None:
+                category_stats = snapshot.category_counts(datetime.combine(start_day, datetime.min.time()))
+            else:
+                category_stats = _category_counts(session, start_day)
         
-        result = []
-        for stat in category_stats:
-            result.append({
-                "category": stat[0],
-                "total_count": stat[1],
-                "resolved_count": stat[2],
-                "open_count": stat[3],
-                "resolution_rate": (stat[2] / stat[1] * 100) if stat[1] > 0 else 0
-            })
+            result = []
+            for stat in category_stats:
+                result.append({
+                    "category": stat[0],
+                    "total_count": stat[1],
+                    "resolved_count": stat[2],
+                    "open_count": stat[3],
+                    "resolution_rate": (stat[2] / stat[1] * 100) if stat[1] > 0 else 0
+                })
         
-        return jsonify({
-            "period_days": days,
-            "categories": result
-        })
+            return {
+                "period_days": days,
+                "categories": result
+            }
+
+        return _cached_stats_response(session, "category", now, build)
         
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in get_category_stats: {str(e)}")
@@ -117,26 +185,29 @@ def get_location_stats():
     session = SessionLocal()
     
     try:
-        # Get incidents with location data
-        location_stats = session.query(
-            Incident.location,
-            func.count(Incident.id).label('count'),
-            func.avg(Incident.latitude).label('avg_lat'),
-            func.avg(Incident.longitude).label('avg_lng')
-        ).filter(
-            and_(Incident.location.isnot(None), Incident.location != '')
-        ).group_by(Incident.location).order_by(text('count DESC')).limit(20).all()
+        def build():
+            # Get incidents with location data
+            location_stats = session.query(
+                Incident.location,
+                func.count(Incident.id).label('count'),
+                func.avg(Incident.latitude).label('avg_lat'),
+                func.avg(Incident.longitude).label('avg_lng')
+            ).filter(
+                and_(Incident.location.isnot(None), Incident.location != '')
+            ).group_by(Incident.location).order_by(text('count DESC')).limit(20).all()
         
-        result = []
-        for stat in location_stats:
-            result.append({
-                "location": stat[0],
-                "count": stat[1],
-                "avg_latitude": float(stat[2]) if stat[2] else None,
-                "avg_longitude": float(stat[3]) if stat[3] else None
-            })
+            result = []
+            for stat in location_stats:
+                result.append({
+                    "location": stat[0],
+                    "count": stat[1],
+                    "avg_latitude": float(stat[2]) if stat[2] else None,
+                    "avg_longitude": float(stat[3]) if stat[3] else None
+                })
         
-        return jsonify({"locations": result})
+            return {"locations": result}
+
+        return _cached_stats_response(session, "location", None, build)
         
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in get_location_stats: {str(e)}")
@@ -147,6 +218,94 @@ def get_location_stats():
     finally:
         session.close()
 
+@bp.get("/resolution-time")
+def get_resolution_time_stats():
+    """Get p50/p90/p99 time-to-confirm and time-to-resolve (seconds) per category."""
+    session = SessionLocal()
+    
+    try:
+        category = request.args.get('category')
+        
+        def build():
+            # Only transitions recorded since the last request are read
+            resolution_sketches.refresh(session)
+            return resolution_sketches.summary(category)
+
+        return _cached_stats_response(session, "resolution-time", None, build)
+        
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in get_resolution_time_stats: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in get_resolution_time_stats: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.get("/hotspots")
+def get_hotspots():
+    """Get geohash cells whose recent incident count is well above their baseline."""
+    try:
+        category = request.args.get('category')
+        hotspots = hotspot_detector.active()
+        if category:
+            hotspots = [h for h in hotspots if h["category"] == category]
+
+        # Served from this worker's in-memory detector, not the database
+        response = jsonify({
+            "window_minutes": hotspot_detector.buckets * hotspot_detector.bucket_seconds // 60,
+            "hotspots": hotspots
+        })
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in get_hotspots: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+# period -> (days back, default bucket)
+TIMELINE_PERIODS = {
+    'day': (1, 'hour'),
+    'week': (7, 'day'),
+    'month': (30, 'day'),
+    'year': (365, 'month'),
+}
+BUCKET_LABELS = {
+    'hour': '%Y-%m-%dT%H:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%m-%d',
+    'month': '%Y-%m',
+}
+MAX_TIMELINE_BUCKETS = 1000
+
+def _timeline_counts(session, bucket: str, buckets: list, category=None) -> dict:
+    """Incident counts per bucket start for the given consecutive buckets.
+
+    Served by the analytics snapshot when enabled. Otherwise hourly buckets
+    come from the created_at index and coarser buckets are folded from the
+    daily rollups, so they cost one row per day and key.
+    """
+    snapshot = refreshed_snapshot(session)
+    if snapshot is not None:
+        edges = buckets + [next_bucket(buckets[-1], bucket)]
+        return snapshot.timeline_counts(edges, category)
+
+    start = buckets[0]
+    if bucket == 'hour':
+        column = date_bucket(bucket, Incident.created_at)
+        query = session.query(column, func.count(Incident.id)).filter(Incident.created_at >= start)
+        if category:
+            query = query.filter(Incident.category == category)
+    else:
+        column = date_bucket(bucket, IncidentDailyRollup.day)
+        query = session.query(column, func.sum(IncidentDailyRollup.count)).filter(
+            IncidentDailyRollup.day >= start.date()
+        )
+        if category:
+            query = query.filter(IncidentDailyRollup.category == category)
+
+    return {as_utc_naive(key): int(count) for key, count in query.group_by(column).all() if count}
+
 @bp.get("/timeline")
 def get_timeline_stats():
     """Get timeline statistics for incidents."""
@@ -154,47 +313,36 @@ def get_timeline_stats():
     
     try:
         # Get parameters
-        period = request.args.get('period', 'week')  # week, month, year
+        period = request.args.get('period', 'week')  # day, week, month, year
         category = request.args.get('category')
         
-        # Determine date grouping
-        if period == 'week':
-            date_format = '%Y-%m-%d'
-            days_back = 7
-        elif period == 'month':
-            date_format = '%Y-%m-%d'
-            days_back = 30
-        elif period == 'year':
-            date_format = '%Y-%m'
-            days_back = 365
-        else:
-            return jsonify({"error": "Invalid period. Use 'week', 'month', or 'year'"}), 400
+        if period not in TIMELINE_PERIODS:
+            return jsonify({"error": "Invalid period. Use 'day', 'week', 'month', or 'year'"}), 400
+        days_back, default_bucket = TIMELINE_PERIODS[period]
+        bucket = request.args.get('bucket', default_bucket)
+        if bucket not in BUCKET_GRANULARITIES:
+            return jsonify({"error": "Invalid bucket. Use 'hour', 'day', 'week', or 'month'"}), 400
         
-        start_date = datetime.utcnow() - timedelta(days=days_back)
+        now = _stats_now()
+        # The first bucket is always whole, so the window may start a little earlier
+        buckets = bucket_range(now - timedelta(days=days_back), now, bucket)
+        if len(buckets) > MAX_TIMELINE_BUCKETS:
+            return jsonify({"error": f"Too many buckets; use a coarser bucket for period '{period}'"}), 400
         
-        # Build query
-        query = session.query(
-            func.date_trunc('day', Incident.created_at).label('date'),
-            func.count(Incident.id).label('count')
-        ).filter(Incident.created_at >= start_date)
+        def build():
+            counts = _timeline_counts(session, bucket, buckets, category)
+            date_format = BUCKET_LABELS[bucket]
+            # Zero-fill buckets without incidents
+            result = [{"date": start.strftime(date_format), "count": counts.get(start, 0)} for start in buckets]
         
-        if category:
-            query = query.filter(Incident.category == category)
-        
-        timeline_data = query.group_by(text('date')).order_by(text('date')).all()
-        
-        result = []
-        for data_point in timeline_data:
-            result.append({
-                "date": data_point[0].strftime(date_format),
-                "count": data_point[1]
-            })
-        
-        return jsonify({
-            "period": period,
-            "category": category,
-            "timeline": result
-        })
+            return {
+                "period": period,
+                "bucket": bucket,
+                "category": category,
+                "timeline": result
+            }
+
+        return _cached_stats_response(session, "timeline", now, build)
         
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error in get_timeline_stats: {str(e)}")
@@ -0,0 +1,176 @@
+import secrets
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt
+from sqlalchemy.exc import SQLAlchemyError
+from marshmallow import ValidationError
+from utils.db import SessionLocal
+from utils.validation import WebhookEndpointSchema, validate_request_data
+from models.webhook_endpoint import WebhookEndpoint
+from models.webhook_delivery import WebhookDelivery
+from services.webhooks import endpoint_routes, webhook_dispatcher
+
+bp = Blueprint("webhooks", __name__, url_prefix="/webhooks")
+
+DELIVERY_STATUSES = ("pending", "delivered", "dead")
+
+def _forbidden():
+    return jsonify({"error": "Admin access required"}), 403
+
+def _is_admin() -> bool:
+    return get_jwt().get("role") == "admin"
+
+@bp.get("/endpoints")
+@jwt_required()
+def list_endpoints():
+    """Registered webhook endpoints (without their secrets)."""
+    if not _is_admin():
+        return _forbidden()
+    session = SessionLocal()
+    try:
+        endpoints = session.query(WebhookEndpoint).filter(
+            WebhookEndpoint.is_active.is_(True)
+        ).order_by(WebhookEndpoint.id).all()
+        return jsonify({"endpoints": [endpoint.to_dict() for endpoint in endpoints]})
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in list_endpoints: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in list_endpoints: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.post("/endpoints")
+@jwt_required()
+def create_endpoint():
+    """Register a URL for incident events; the signing secret is only returned here."""
+    if not _is_admin():
+        return _forbidden()
+    session = SessionLocal()
+    try:
+        try:
+            data = validate_request_data(WebhookEndpointSchema, request.get_json() or {})
+        except ValidationError as e:
+            return jsonify({"error": "Validation failed", "details": e.messages}), 400
+
+        endpoint = WebhookEndpoint(
+            name=data.get('name'),
+            url=data['url'],
+            secret=data.get('secret') or secrets.token_hex(32),
+            events=data.get('events'),
+            categories=data.get('categories'),
+            sources=data.get('sources'),
+        )
+        session.add(endpoint)
+        session.commit()
+        # other workers pick it up on their next refresh
+        endpoint_routes.invalidate()
+        return jsonify({"message": "Endpoint created", "endpoint": endpoint.to_dict(include_secret=True)}), 201
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in create_endpoint: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in create_endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.delete("/endpoints/<int:endpoint_id>")
+@jwt_required()
+def delete_endpoint(endpoint_id: int):
+    """Stop sending to an endpoint; its undelivered events are dead-lettered."""
+    if not _is_admin():
+        return _forbidden()
+    session = SessionLocal()
+    try:
+        endpoint = session.get(WebhookEndpoint, endpoint_id)
+        if not endpoint or not endpoint.is_active:
+            return jsonify({"error": "Endpoint not found"}), 404
+        endpoint.is_active = False
+        session.commit()
+        endpoint_routes.invalidate()
+        return jsonify({"message": "Endpoint deleted"})
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in delete_endpoint: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in delete_endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.get("/deliveries")
+@jwt_required()
+def list_deliveries():
+    """Newest deliveries, filtered by ``status`` (e.g. dead) and ``endpoint_id``."""
+    if not _is_admin():
+        return _forbidden()
+    status = request.args.get("status")
+    if status is not None and status not in DELIVERY_STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(DELIVERY_STATUSES)}"}), 400
+    session = SessionLocal()
+    try:
+        query = session.query(WebhookDelivery)
+        if status:
+            query = query.filter(WebhookDelivery.status == status)
+        endpoint_id = request.args.get("endpoint_id", type=int)
+        if endpoint_id is not None:
+            query = query.filter(WebhookDelivery.endpoint_id == endpoint_id)
+        limit = min(request.args.get("limit", 100, type=int), 500)
+        deliveries = query.order_by(WebhookDelivery.id.desc()).limit(limit).all()
+        return jsonify({"deliveries": [delivery.to_dict() for delivery in deliveries]})
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database error in list_deliveries: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in list_deliveries: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
+
+@bp.post("/deliveries/retry")
+@jwt_required()
+def retry_deliveries():
+    """Requeue dead-lettered deliveries: ``{"ids": [...]}`` or ``{"endpoint_id": n}``."""
+    if not _is_admin():
+        return _forbidden()
+    data = request.get_json() or {}
+    ids = data.get("ids")
+    endpoint_id = data.get("endpoint_id")
+    if ids is not None and not (isinstance(ids, list) and all(isinstance(i, int) for i in ids)):
+        return jsonify({"error": "ids must be a list of integers"}), 400
+    if endpoint_id is not None and not isinstance(endpoint_id, int):
+        return jsonify({"error": "endpoint_id must be an integer"}), 400
+    if ids is None and endpoint_id is None:
+        return jsonify({"error": "Give ids or endpoint_id"}), 400
+
+    session = SessionLocal()
+    try:
+        query = session.query(WebhookDelivery).filter(WebhookDelivery.status == "dead")
+        if ids is not None:
+            query = query.filter(WebhookDelivery.id.in_(ids))
+        if endpoint_id is not None:
+            query = query.filter(WebhookDelivery.endpoint_id == endpoint_id)
+        requeued = query.update({
+            "status": "pending", "attempts": 0, "last_error": None, "claim_token": None,
+            "next_attempt_at": datetime.now(timezone.utc),
+        }, synchronize_session=False)
+        session.commit()
+        if requeued:
+            webhook_dispatcher.wake()
+        return jsonify({"requeued": requeued})
+    except SQLAlchemyError as e:
+        session.rollback()
+        current_app.logger.error(f"Database error in retry_deliveries: {str(e)}")
+        return jsonify({"error": "Database error"}), 500
+    except Exception as e:
+        session.rollback()
+        current_app.logger.error(f"Unexpected error in retry_deliveries: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+    finally:
+        session.close()
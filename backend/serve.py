@@ -0,0 +1,30 @@
+"""
+Production entry point for one API/Socket.IO server process.
+
+    SOCKETIO_ASYNC_MODE=eventlet SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/1 PORT=5001 python serve.py
+
+The cooperative backends (eventlet, gevent) must patch the standard library
+before anything else is imported, so this module does that first and only
+then loads the app. Run several processes on different ports behind a load
+balancer with sticky sessions; they share Socket.IO rooms and incident events
+through SOCKETIO_MESSAGE_QUEUE.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from app import app, socketio  # noqa: E402  (must follow monkey patching)
+
+if __name__ == "__main__":
+    socketio.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "5000")),
+                 # the Werkzeug server is only used in threading mode
+                 allow_unsafe_werkzeug=ASYNC_MODE == "threading")
@@ -0,0 +1,343 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from config import Config
+from models.incident import Incident
+from models.incident_change import IncidentChange
+
+logger = logging.getLogger(__name__)
+
+# In-process columnar snapshot of the incident columns used by /stats.
+# numpy is an optional dependency, imported lazily; without it (or with
+# ANALYTICS_SNAPSHOT off) the stats endpoints stay on the SQL path.
+
+EPOCH = datetime(1970, 1, 1)
+US_PER_DAY = 86400 * 1000000
+
+CODED_COLUMNS = ("category", "status", "source")
+SNAPSHOT_COLUMNS = ("id", "created_at", "category", "status", "source", "latitude", "longitude")
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def to_us(value: datetime) -> int:
+    """Microseconds since the epoch for a naive UTC (or aware) datetime."""
+    return (_utc_naive(value) - EPOCH) // timedelta(microseconds=1)
+
+
+class _Codes:
+    """Stable value <-> int code mapping for one label column (None is a value too)."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class IncidentSnapshot:
+    """Columnar copy of the incidents table, refreshed incrementally.
+
+    Rows are kept sorted by id so an incident's position is a binary search
+    away. After the first full load, refreshes follow the change log past
+    the last change token seen: upserted incidents are re-read by id and
+    deleted ones are tombstoned until the next compaction. Change tokens
+    are assigned in commit order, so a long transaction that commits late
+    is still picked up, however old its timestamps.
+    """
+
+    def __init__(self, batch_size: int = 10000):
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        import numpy as np
+
+        with self._lock:
+            self._dtypes = {
+                "id": np.int64,
+                "created_at": np.int64,
+                "category": np.int32,
+                "status": np.int32,
+                "source": np.int32,
+                "latitude": np.float32,
+                "longitude": np.float32,
+                "alive": np.bool_,
+            }
+            self._arrays = {name: np.empty(0, dtype) for name, dtype in self._dtypes.items()}
+            self._codes = {name: _Codes() for name in CODED_COLUMNS}
+            self._size = 0
+            self._tombstones = 0
+            self._loaded = False
+            self._change_id = 0
+            self.refreshes = 0
+            self.rows_applied = 0
+            self.last_refresh_ms = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _column(self, name: str):
+        return self._arrays[name][:self._size]
+
+    def _reserve(self, extra: int):
+        import numpy as np
+
+        needed = self._size + extra
+        capacity = len(self._arrays["id"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name, array in self._arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[name] = grown
+
+    def _apply(self, rows: List):
+        """Upsert a batch of (id, created_at, category, status, source, lat, lon) rows."""
+        import numpy as np
+
+        if not rows:
+            return
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        batch = {
+            "id": ids,
+            "created_at": np.fromiter((to_us(row[1]) for row in rows), dtype=np.int64, count=len(rows)),
+            "latitude": np.array([np.nan if row[5] is None else row[5] for row in rows], dtype=np.float32),
+            "longitude": np.array([np.nan if row[6] is None else row[6] for row in rows], dtype=np.float32),
+            "alive": np.ones(len(rows), dtype=np.bool_),
+        }
+        for offset, name in enumerate(CODED_COLUMNS, start=2):
+            codes = self._codes[name]
+            batch[name] = np.fromiter((codes.code(row[offset]) for row in rows), dtype=np.int32, count=len(rows))
+
+        order = np.argsort(ids, kind="stable")
+        if np.any(np.diff(order) < 0):
+            batch = {name: values[order] for name, values in batch.items()}
+            ids = batch["id"]
+
+        # Overwrite incidents we already hold, append the rest
+        existing = self._column("id")
+        positions = np.searchsorted(existing, ids)
+        found = positions < self._size
+        found[found] = existing[positions[found]] == ids[found]
+        if found.any():
+            revived = np.count_nonzero(~self._column("alive")[positions[found]])
+            self._tombstones -= revived
+            for name, values in batch.items():
+                self._arrays[name][positions[found]] = values[found]
+
+        new = ~found
+        count = int(np.count_nonzero(new))
+        if count:
+            in_order = self._size == 0 or ids[new].min() > existing[-1]
+            self._reserve(count)
+            for name, values in batch.items():
+                self._arrays[name][self._size:self._size + count] = values[new]
+            self._size += count
+            if not in_order or not np.all(np.diff(self._column("id")[-count:]) > 0):
+                self._sort()
+        self.rows_applied += len(rows)
+
+    def _sort(self):
+        order = self._column("id").argsort(kind="stable")
+        for name in self._arrays:
+            self._arrays[name][:self._size] = self._arrays[name][:self._size][order]
+
+    def _delete(self, incident_ids: List[int]):
+        import numpy as np
+
+        if not incident_ids:
+            return
+        ids = np.asarray(incident_ids, dtype=np.int64)
+        existing = self._column("id")
+        positions = np.searchsorted(existing, ids)
+        found = positions < self._size
+        found[found] = existing[positions[found]] == ids[found]
+        positions = np.unique(positions[found])
+        alive = self._column("alive")
+        self._tombstones += int(np.count_nonzero(alive[positions]))
+        alive[positions] = False
+        if self._tombstones > self._size // 2:
+            self._compact()
+
+    def _compact(self):
+        keep = self._column("alive").copy()
+        kept = int(keep.sum())
+        for name in self._arrays:
+            self._arrays[name][:kept] = self._arrays[name][:self._size][keep]
+        self._size = kept
+        self._tombstones = 0
+
+    def refresh(self, session):
+        """Bring the snapshot up to date; a full load on first use, incremental afterwards."""
+        columns = [getattr(Incident, name) for name in SNAPSHOT_COLUMNS]
+        with self._lock:
+            started = time.perf_counter()
+            # Read the change token first: changes after it are picked up next time
+            last_change = session.query(func.max(IncidentChange.id)).scalar() or 0
+
+            if not self.loaded:
+                stmt = select(*columns).order_by(Incident.id).execution_options(yield_per=self.batch_size)
+                for partition in session.execute(stmt).partitions():
+                    self._apply(partition)
+                self._loaded = True
+            elif last_change > self._change_id:
+                # the last operation of each incident decides whether it is re-read or dropped
+                operations = dict(session.query(IncidentChange.incident_id, IncidentChange.operation).filter(
+                    IncidentChange.id > self._change_id,
+                    IncidentChange.id <= last_change
+                ).order_by(IncidentChange.id).all())
+                self._delete([incident_id for incident_id, operation in operations.items() if operation == "delete"])
+                upserted = sorted(incident_id for incident_id, operation in operations.items() if operation != "delete")
+                for i in range(0, len(upserted), self.batch_size):
+                    # an incident deleted since is simply missing here; its delete comes next time
+                    self._apply(session.execute(
+                        select(*columns).where(Incident.id.in_(upserted[i:i + self.batch_size]))
+                    ).all())
+
+            self._change_id = last_change
+            self.refreshes += 1
+            self.last_refresh_ms = (time.perf_counter() - started) * 1000
+
+    # Aggregates. Each mirrors one SQL query in routes/stats.py and returns
+    # the same values, so the endpoints can format either result the same way.
+
+    def _live(self):
+        alive = self._column("alive")
+        return {name: self._column(name)[alive] for name in ("created_at",) + CODED_COLUMNS}
+
+    def _label(self, name: str, code: int):
+        return self._codes[name].values[code]
+
+    def overview_counts(self, week_start: datetime, days: int, recent_start: datetime
+                        ) -> Tuple[List[Tuple], Dict[str, int], int]:
+        """(status, category, count) groups, per-day counts from ``week_start`` and the count since ``recent_start``."""
+        import numpy as np
+
+        with self._lock:
+            live = self._live()
+            n_categories = max(len(self._codes["category"].values), 1)
+            pairs = np.bincount(live["status"].astype(np.int64) * n_categories + live["category"],
+                                minlength=n_categories)
+            groups = [
+                (self._label("status", pair // n_categories), self._label("category", pair % n_categories), int(count))
+                for pair, count in enumerate(pairs) if count
+            ]
+
+            day_index = live["created_at"] // US_PER_DAY - to_us(week_start) // US_PER_DAY
+            in_week = (day_index >= 0) & (day_index < days)
+            per_day = np.bincount(day_index[in_week], minlength=days)
+            daily = {
+                (week_start + timedelta(days=i)).strftime("%Y-%m-%d"): int(count)
+                for i, count in enumerate(per_day) if count
+            }
+
+            recent = int(np.count_nonzero(live["created_at"] >= to_us(recent_start)))
+        return groups, daily, recent
+
+    def category_counts(self, start: datetime, resolved: str = "resolved", reported: str = "reported") -> List[Tuple]:
+        """(category, total, resolved, open) for incidents created at or after ``start``."""
+        import numpy as np
+
+        with self._lock:
+            live = self._live()
+            mask = live["created_at"] >= to_us(start)
+            categories = live["category"][mask]
+            statuses = live["status"][mask]
+            size = len(self._codes["category"].values)
+
+            def count_status(value):
+                code = self._codes["status"].codes.get(value)
+                if code is None:
+                    return np.zeros(size, dtype=np.int64)
+                return np.bincount(categories[statuses == code], minlength=size)
+
+            totals = np.bincount(categories, minlength=size)
+            resolved_counts = count_status(resolved)
+            open_counts = count_status(reported)
+            return [
+                (self._label("category", code), int(totals[code]), int(resolved_counts[code]), int(open_counts[code]))
+                for code in range(size) if totals[code]
+            ]
+
+    def timeline_counts(self, edges: List[datetime], category: Optional[str] = None) -> Dict[datetime, int]:
+        """Counts per bucket, where bucket i spans [edges[i], edges[i + 1])."""
+        import numpy as np
+
+        with self._lock:
+            live = self._live()
+            created = live["created_at"]
+            if category:
+                code = self._codes["category"].codes.get(category)
+                if code is None:
+                    return {}
+                created = created[live["category"] == code]
+            bounds = np.array([to_us(edge) for edge in edges], dtype=np.int64)
+            index = np.searchsorted(bounds, created, side="right") - 1
+            index = index[(index >= 0) & (index < len(edges) - 1)]
+            counts = np.bincount(index, minlength=len(edges) - 1)
+            return {edges[i]: int(count) for i, count in enumerate(counts) if count}
+
+    def stats(self) -> dict:
+        import numpy as np
+
+        with self._lock:
+            row_bytes = sum(np.dtype(dtype).itemsize for dtype in self._dtypes.values())
+            return {
+                "rows": self._size - self._tombstones,
+                "tombstones": self._tombstones,
+                "allocated_bytes": sum(array.nbytes for array in self._arrays.values()),
+                "bytes_per_million_rows": row_bytes * 1000000,
+                "refreshes": self.refreshes,
+                "rows_applied": self.rows_applied,
+                "last_refresh_ms": self.last_refresh_ms,
+                "change_token": self._change_id,
+            }
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_numpy_warned = False
+
+def get_snapshot() -> Optional[IncidentSnapshot]:
+    """The process-wide snapshot, or None when disabled or numpy is missing."""
+    global _snapshot, _numpy_warned
+    if not Config.ANALYTICS_SNAPSHOT:
+        return None
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                if not numpy_available():
+                    if not _numpy_warned:
+                        logger.warning("ANALYTICS_SNAPSHOT is enabled but numpy is not installed; using SQL")
+                        _numpy_warned = True
+                    return None
+                _snapshot = IncidentSnapshot(batch_size=Config.EXPORT_BATCH_SIZE)
+    return _snapshot
+
+def refreshed_snapshot(session) -> Optional[IncidentSnapshot]:
+    """The snapshot brought up to date with the database, or None to use SQL."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        snapshot.refresh(session)
+    return snapshot
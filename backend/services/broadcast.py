@@ -0,0 +1,309 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+from services.realtime import emit_local, room_subscribers, queued_packets
+from utils.tdigest import TDigest, summarize_latency
+
+RESYNC_EVENT = "resync"
+RESUMED_EVENT = "resumed"
+
+
+class ReplayBuffer:
+    """Bounded ring of recently sent events, numbered with a monotonic sequence.
+
+    Sequence numbers are local to this process; ``epoch`` changes on every
+    start, so a cursor from another process or an earlier run is never
+    mistaken for a position in this stream.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.epoch = os.urandom(6).hex()
+        self.seq = 0
+        self._items = deque(maxlen=capacity)
+
+    def append(self, items: List[dict]):
+        """Number ``items`` (sets their "seq") and keep them for replay."""
+        for item in items:
+            self.seq += 1
+            item["seq"] = self.seq
+            self._items.append(item)
+
+    def since(self, seq: int) -> Optional[List[dict]]:
+        """Events after ``seq``, or None when some of them are no longer buffered."""
+        if seq > self.seq:
+            return None
+        oldest = self._items[0]["seq"] if self._items else self.seq + 1
+        if seq < oldest - 1:
+            return None
+        return list(itertools.islice(self._items, len(self._items) - (self.seq - seq), None))
+
+    def position(self) -> dict:
+        return {"epoch": self.epoch, "seq": self.seq}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class BroadcastCoalescer:
+    """Buffers room events and sends them to clients as batches.
+
+    Events are keyed by id; a second event for an id already waiting is merged
+    into the first (``merge`` may return None when the two cancel out). The
+    buffer is flushed once ``window_seconds`` have passed since its first event
+    or when it holds ``max_batch`` events. Clients subscribed to the same
+    rooms share one encoded batch.
+
+    A client whose Engine.IO queue already holds more than ``client_max_queued``
+    packets is held back: its events are merged into a per-client backlog and
+    sent once its queue drains. If the backlog exceeds ``client_max_backlog``
+    it is dropped and the client is sent a ``resync`` event instead.
+
+    With ``replay_size`` > 0 every flushed event gets a sequence number and the
+    last ``replay_size`` events are kept so a reconnecting client can resume.
+    """
+
+    def __init__(self, event: str, merge: Callable[[dict, dict], Optional[dict]],
+                 rooms: Callable[[dict], List[str]], payload: Callable[[dict], dict],
+                 window_seconds: float = 0.25, max_batch: int = 200,
+                 client_max_queued: int = 100, client_max_backlog: int = 1000, replay_size: int = 0,
+                 emit=emit_local, subscribers=room_subscribers, client_queued=queued_packets):
+        self.event = event
+        self.merge = merge
+        self.rooms = rooms
+        self.payload = payload
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.client_max_queued = client_max_queued
+        self.client_max_backlog = client_max_backlog
+        self._emit = emit
+        self._subscribers = subscribers
+        self._client_queued = client_queued
+        self.replay = ReplayBuffer(replay_size) if replay_size > 0 else None
+
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[object, dict]" = OrderedDict()
+        self._first_at = None
+        self._thread = None
+        # sid -> (eio_sid, OrderedDict of held events); only touched while delivering
+        self._backlogs: Dict[str, tuple] = {}
+        # held while sending, so a resume never interleaves with a flush
+        self._deliver_lock = threading.RLock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._cond, self._deliver_lock:
+            self._max_depth = 0
+            self._submitted = 0
+            self._merged = 0
+            self._flushes = 0
+            self._batches = 0
+            self._held = 0
+            self._resyncs = 0
+            self._flush_ms = TDigest()
+            self._wait_ms = TDigest()
+
+    def submit(self, events: Iterable[dict]):
+        """Queue events for the next batch; never blocks on client I/O."""
+        with self._cond:
+            for item in events:
+                self._submitted += 1
+                key = item["id"]
+                if key in self._pending:
+                    self._merged += 1
+                    merged = self.merge(self._pending[key], item)
+                    if merged is None:
+                        del self._pending[key]
+                    else:
+                        self._pending[key] = merged
+                else:
+                    self._pending[key] = item
+            if not self._pending:
+                return
+            opened = self._first_at is None
+            if opened:
+                self._first_at = time.monotonic()
+            self._max_depth = max(self._max_depth, len(self._pending))
+            if self.window_seconds <= 0:
+                batch, queued_at = self._take()
+            else:
+                batch = None
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="broadcast-coalescer", daemon=True)
+                    self._thread.start()
+                if opened or len(self._pending) >= self.max_batch:
+                    # start the window timer, or flush early when the batch is full
+                    self._cond.notify()
+        if batch is not None:
+            self._deliver(batch, queued_at)
+
+    def flush(self):
+        """Send everything waiting now (shutdown, tests and benchmarks)."""
+        with self._cond:
+            batch, queued_at = self._take()
+        self._deliver(batch, queued_at)
+
+    def _take(self):
+        batch = list(self._pending.values())
+        queued_at = self._first_at
+        self._pending = OrderedDict()
+        self._first_at = None
+        return batch, queued_at
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if self._backlogs:
+                        # nothing new, but held-back clients may have drained
+                        self._cond.wait(self.window_seconds)
+                        break
+                    self._cond.wait()
+                if self._pending:
+                    deadline = self._first_at + self.window_seconds
+                    while len(self._pending) < self.max_batch:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                batch, queued_at = self._take()
+            self._deliver(batch, queued_at)
+
+    def _deliver(self, batch: List[dict], queued_at: Optional[float]):
+        with self._deliver_lock:
+            started = time.monotonic()
+            if queued_at is not None:
+                self._wait_ms.add((started - queued_at) * 1000)
+
+            by_room: Dict[str, List[int]] = {}
+            for index, item in enumerate(batch):
+                for room in self.rooms(item):
+                    by_room.setdefault(room, []).append(index)
+            members = self._subscribers(by_room.keys()) if batch else {}
+            if self.replay is not None:
+                self.replay.append(batch)
+
+            # clients with the same rooms receive the same batch, encoded once
+            groups: Dict[frozenset, List[str]] = {}
+            for sid, (eio_sid, rooms) in members.items():
+                if sid not in self._backlogs and self._client_queued(eio_sid) <= self.client_max_queued:
+                    groups.setdefault(frozenset(rooms), []).append(sid)
+                else:
+                    self._hold(sid, eio_sid, [batch[i] for i in _indexes(by_room, rooms)])
+
+            for rooms, sids in groups.items():
+                self._send([batch[i] for i in _indexes(by_room, rooms)], sids)
+            self._drain_backlogs()
+
+            if batch:
+                self._flushes += 1
+                self._flush_ms.add((time.monotonic() - started) * 1000)
+
+    def _send(self, items: List[dict], to):
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            message = {"events": [self.payload(item) for item in chunk]}
+            if self.replay is not None:
+                # the client has now seen everything up to here that matches its rooms
+                last = start + self.max_batch >= len(items)
+                message["epoch"] = self.replay.epoch
+                message["seq"] = self.replay.seq if last else chunk[-1]["seq"]
+            self._emit(self.event, message, room=to)
+            self._batches += 1
+
+    def position(self) -> dict:
+        """Current stream position ({epoch, seq}); empty without a replay buffer."""
+        with self._deliver_lock:
+            return self.replay.position() if self.replay is not None else {}
+
+    def resume(self, sid: str, rooms: List[str], epoch: Optional[str], seq: int,
+               join: Optional[Callable[[], None]] = None) -> bool:
+        """Send ``sid`` the buffered events after ``seq`` that match ``rooms``.
+
+        ``join`` (joining the rooms) runs under the delivery lock, so the client
+        sees the replay before any live batch and no event twice. When the
+        cursor is from another epoch or older than the buffer, a ``resync`` is
+        sent instead and False returned.
+        """
+        with self._deliver_lock:
+            if join is not None:
+                join()
+            missed = None
+            if self.replay is not None and epoch == self.replay.epoch:
+                missed = self.replay.since(seq)
+            if missed is None:
+                self._resyncs += 1
+                self._emit(RESYNC_EVENT, {"reason": "gap", **self.position()}, room=sid)
+                return False
+            wanted = set(rooms)
+            items = [item for item in missed if wanted.intersection(self.rooms(item))]
+            self._send(items, sid)
+            self._emit(RESUMED_EVENT, {"replayed": len(items), **self.position()}, room=sid)
+            return True
+
+    def _hold(self, sid: str, eio_sid: str, items: List[dict]):
+        backlog = self._backlogs.get(sid)
+        if backlog is None:
+            backlog = self._backlogs[sid] = (eio_sid, OrderedDict())
+        held = backlog[1]
+        for item in items:
+            self._held += 1
+            key = item["id"]
+            if key in held:
+                merged = self.merge(held[key], item)
+                if merged is None:
+                    del held[key]
+                else:
+                    if "seq" in item:
+                        merged["seq"] = item["seq"]
+                    held[key] = merged
+            else:
+                held[key] = item
+        if len(held) > self.client_max_backlog:
+            # too far behind to catch up event by event
+            del self._backlogs[sid]
+            self._resyncs += 1
+            self._emit(RESYNC_EVENT, {"reason": "backlog_overflow", **self.position()}, room=sid)
+
+    def _drain_backlogs(self):
+        for sid, (eio_sid, held) in list(self._backlogs.items()):
+            if self._client_queued(eio_sid) <= self.client_max_queued:
+                del self._backlogs[sid]
+                if held:
+                    items = list(held.values())
+                    if self.replay is not None:
+                        # merged events took the sequence number of their latest update
+                        items.sort(key=lambda item: item["seq"])
+                    self._send(items, sid)
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = len(self._pending)
+            oldest = time.monotonic() - self._first_at if self._first_at is not None else 0.0
+            queue = {"queue_depth": depth, "max_queue_depth": self._max_depth,
+                     "oldest_pending_ms": round(oldest * 1000, 1),
+                     "submitted": self._submitted, "merged": self._merged}
+        with self._deliver_lock:
+            return {
+                **queue,
+                "flushes": self._flushes,
+                "batches": self._batches,
+                "flush_ms": summarize_latency(self._flush_ms),
+                "queue_wait_ms": summarize_latency(self._wait_ms),
+                "slow_clients": len(self._backlogs),
+                "held_events": sum(len(held) for _, held in self._backlogs.values()),
+                "held_total": self._held,
+                "resyncs": self._resyncs,
+                "replay": ({**self.replay.position(), "buffered": len(self.replay),
+                            "capacity": self.replay.capacity} if self.replay is not None else None),
+            }
+
+
+def _indexes(by_room: Dict[str, List[int]], rooms) -> List[int]:
+    indexes = set()
+    for room in rooms:
+        indexes.update(by_room.get(room, ()))
+    return sorted(indexes)
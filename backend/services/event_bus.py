@@ -0,0 +1,86 @@
+import json
+import logging
+import threading
+import time
+from typing import Callable, List
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Incident events cross process boundaries through this bus: every process
+# that commits incidents publishes to it, and every process serving Socket.IO
+# clients subscribes and feeds its own broadcaster.
+
+class LocalEventBus:
+    """In-process bus for a single server process (and tests)."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[list], None]] = []
+
+    def publish(self, events: list):
+        for callback in list(self._subscribers):
+            callback(events)
+
+    def subscribe(self, callback: Callable[[list], None], start_background_task=None):
+        self._subscribers.append(callback)
+
+
+class RedisEventBus:
+    """Pub/sub bus over any Redis-compatible client (redis.Redis, fakeredis, ...).
+
+    Events must be JSON serializable. Publishing is fire-and-forget: processes
+    that are not subscribed when a message is sent do not see it.
+    """
+
+    def __init__(self, client, channel: str = "inci:incident-events", retry_seconds: float = 1.0):
+        self.client = client
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for multi-process serving
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, events: list):
+        try:
+            self.client.publish(self.channel, json.dumps(events))
+        except Exception as e:
+            logger.warning(f"Failed to publish {len(events)} events: {e}")
+
+    def subscribe(self, callback: Callable[[list], None], start_background_task=None):
+        """Deliver every message to ``callback`` from a background task."""
+        start = start_background_task or _start_thread
+        start(self._listen, callback)
+
+    def _listen(self, callback):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        callback(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.warning(f"Failed to handle event message: {e}")
+            except Exception as e:
+                # connection lost: messages sent meanwhile are missed
+                logger.warning(f"Event bus connection lost ({e}), reconnecting")
+                time.sleep(self.retry_seconds)
+
+
+def _start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, name="event-bus", daemon=True)
+    thread.start()
+    return thread
+
+def build_event_bus():
+    """Create the bus selected by Config.SOCKETIO_MESSAGE_QUEUE (in-process when unset)."""
+    url = Config.SOCKETIO_MESSAGE_QUEUE
+    if url and not url.startswith(("redis://", "rediss://")):
+        raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE {url!r}: expected a redis:// URL")
+    if url:
+        return RedisEventBus.from_url(url, channel=Config.EVENT_BUS_CHANNEL)
+    return LocalEventBus()
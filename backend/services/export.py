@@ -0,0 +1,256 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import select
+from models.incident import Incident
+
+EXPORT_COLUMNS = [
+    "id", "source", "category", "title", "description", "url", "location",
+    "latitude", "longitude", "status", "published_at", "created_at", "updated_at",
+]
+
+def iter_incident_rows(session, criteria: List = (), batch_size: int = 1000) -> Iterator:
+    """Yield matching incident rows from a server-side cursor in id order.
+
+    Only plain column tuples are fetched (no ORM objects), and ``yield_per``
+    keeps at most ``batch_size`` rows buffered on the client.
+    """
+    stmt = (
+        select(*[getattr(Incident, name) for name in EXPORT_COLUMNS])
+        .where(*criteria)
+        .order_by(Incident.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in session.execute(stmt).partitions():
+        yield from partition
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _chunked(lines: Iterable[str], chunk_rows: int) -> Iterator[str]:
+    """Join serialized rows into larger chunks to keep per-write overhead low."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_rows:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def ndjson_lines(rows: Iterable, chunk_rows: int = 500) -> Iterator[str]:
+    """Serialize rows as newline-delimited JSON, in chunks of ``chunk_rows`` rows."""
+    return _chunked((
+        json.dumps(
+            {name: _json_value(value) for name, value in zip(EXPORT_COLUMNS, row)},
+            separators=(',', ':')
+        ) + "\n"
+        for row in rows
+    ), chunk_rows)
+
+def csv_lines(rows: Iterable, chunk_rows: int = 500) -> Iterator[str]:
+    """Serialize rows as CSV with a header, in chunks of ``chunk_rows`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield render(EXPORT_COLUMNS)
+    yield from _chunked((render([_json_value(value) for value in row]) for row in rows), chunk_rows)
+
+# Columnar export (Parquet / Arrow IPC). pyarrow is an optional dependency,
+# imported lazily so the rest of the API works without it.
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+DICTIONARY_COLUMNS = {"source", "category", "status"}
+TIMESTAMP_COLUMNS = {"published_at", "created_at", "updated_at"}
+PARTITION_GRANULARITIES = ("day", "month", "year")
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def arrow_schema():
+    """Arrow schema for exported incidents: dictionary-encoded labels, UTC timestamps."""
+    import pyarrow as pa
+
+    fields = []
+    for name in EXPORT_COLUMNS:
+        if name == "id":
+            fields.append(pa.field(name, pa.int64(), nullable=False))
+        elif name in ("latitude", "longitude"):
+            fields.append(pa.field(name, pa.float64()))
+        elif name in DICTIONARY_COLUMNS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif name in TIMESTAMP_COLUMNS:
+            fields.append(pa.field(name, pa.timestamp("us", tz="UTC")))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+class _DictionaryEncoder:
+    """Assigns stable codes to column values across batches.
+
+    Each batch's dictionary extends the previous one, so writers can emit
+    dictionary deltas instead of replacing the dictionary per batch (which the
+    Arrow IPC file format does not allow).
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, column):
+        import pyarrow as pa
+
+        indices = []
+        for value in column:
+            if value is None:
+                indices.append(None)
+                continue
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+def iter_record_batches(rows: Iterable, batch_size: int, schema=None) -> Iterator:
+    """Group exported rows into Arrow record batches of ``batch_size`` rows."""
+    import pyarrow as pa
+
+    schema = schema or arrow_schema()
+    encoders = {field.name: _DictionaryEncoder() for field in schema if pa.types.is_dictionary(field.type)}
+
+    def to_batch(chunk):
+        arrays = []
+        for field, values in zip(schema, zip(*chunk)):
+            if field.name in encoders:
+                arrays.append(encoders[field.name].encode(values))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch_size:
+            yield to_batch(chunk)
+            chunk = []
+    if chunk:
+        yield to_batch(chunk)
+
+def _open_columnar_writer(sink, fmt: str, schema, stream: bool = False):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    if stream:
+        return pa.ipc.new_stream(sink, schema, options=options)
+    return pa.ipc.new_file(sink, schema, options=options)
+
+def write_columnar(rows: Iterable, sink, fmt: str, batch_size: int) -> int:
+    """Write rows to a path or file object as Parquet or an Arrow IPC file; returns the row count."""
+    schema = arrow_schema()
+    writer = _open_columnar_writer(sink, fmt, schema)
+    written = 0
+    try:
+        for batch in iter_record_batches(rows, batch_size, schema):
+            writer.write_batch(batch)
+            written += batch.num_rows
+    finally:
+        writer.close()
+    return written
+
+class _DrainableBuffer:
+    """Write-only, append-only file object whose contents are handed out after each batch."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_columnar(rows: Iterable, fmt: str, batch_size: int) -> Iterator[bytes]:
+    """Serialize rows as Parquet or an Arrow IPC stream, yielding bytes after every record batch."""
+    schema = arrow_schema()
+    buffer = _DrainableBuffer()
+    writer = _open_columnar_writer(buffer, fmt, schema, stream=True)
+    try:
+        for batch in iter_record_batches(rows, batch_size, schema):
+            writer.write_batch(batch)
+            data = buffer.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield buffer.drain()
+
+def truncate_datetime(value: datetime, granularity: str) -> datetime:
+    """Start of the day/month/year containing ``value``."""
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity in ("month", "year"):
+        value = value.replace(day=1)
+    if granularity == "year":
+        value = value.replace(month=1)
+    return value
+
+def next_boundary(value: datetime, granularity: str) -> datetime:
+    """Start of the following day/month/year for a truncated ``value``."""
+    if granularity == "day":
+        return value + timedelta(days=1)
+    if granularity == "month":
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value.replace(year=value.year + 1)
+
+def partition_ranges(start: datetime, end: datetime, granularity: str) -> List[Tuple[str, datetime, datetime]]:
+    """Split [start, end) into calendar partitions, returning (label, lower, upper) tuples."""
+    labels = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+    ranges = []
+    lower = truncate_datetime(start, granularity)
+    while lower < end:
+        upper = next_boundary(lower, granularity)
+        ranges.append((lower.strftime(labels[granularity]), max(lower, start), min(upper, end)))
+        lower = upper
+    return ranges
+
+def time_range_criteria(start: Optional[datetime], end: Optional[datetime]) -> list:
+    """created_at filters for a half-open [start, end) export window."""
+    criteria = []
+    if start is not None:
+        criteria.append(Incident.created_at >= start)
+    if end is not None:
+        criteria.append(Incident.created_at < end)
+    return criteria
@@ -0,0 +1,210 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from config import Config
+from models.incident import Incident
+from models.alert_subscription import AlertSubscription
+from models.alert_subscription_change import AlertSubscriptionChange
+from models.alert_notification import AlertNotification
+from models.change_sequence import queue_log_rows
+from utils.geo import haversine_m, point_in_polygon
+
+# each grid level's cells are this many times larger than the previous level's
+LEVEL_FACTOR = 8
+
+
+class Geofence:
+    """In-memory form of an AlertSubscription."""
+
+    __slots__ = ("id", "user_id", "categories", "latitude", "longitude", "radius_m", "polygon", "bbox")
+
+    def __init__(self, id: int, user_id: int, bbox, categories=None, latitude=None, longitude=None,
+                 radius_m=None, polygon=None):
+        self.id = id
+        self.user_id = user_id
+        self.bbox = tuple(bbox)
+        self.categories = frozenset(categories) if categories else None
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_m = radius_m
+        self.polygon = tuple(tuple(vertex) for vertex in polygon) if polygon else None
+
+    @classmethod
+    def from_subscription(cls, row) -> "Geofence":
+        return cls(row.id, row.user_id, (row.min_lat, row.min_lon, row.max_lat, row.max_lon),
+                   row.categories, row.latitude, row.longitude, row.radius_m, row.polygon)
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon):
+            return False
+        if self.polygon is not None:
+            return point_in_polygon(latitude, longitude, self.polygon)
+        return haversine_m(self.latitude, self.longitude, latitude, longitude) <= self.radius_m
+
+
+class GeofenceIndex:
+    """Multi-level grid over geofence bounding boxes.
+
+    A geofence is stored in the finest level where its bounding box covers at
+    most ``max_cells`` cells (fences larger than every level go to a short
+    list that is always checked). A lookup reads one cell per level, so it
+    touches only the fences near the point instead of all of them.
+
+    The index is loaded from the database on first use and then, at most
+    every ``refresh_seconds``, re-reads the subscriptions named in the
+    change log since the last change id it applied. Those ids are assigned
+    in commit order, so a slow transaction that commits late is not skipped.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05, levels: int = 3, max_cells: int = 16,
+                 refresh_seconds: float = 5.0):
+        self.cell_sizes = [cell_degrees * LEVEL_FACTOR ** level for level in range(levels)]
+        self.max_cells = max_cells
+        self.refresh_seconds = refresh_seconds
+        self._grids: List[Dict[tuple, set]] = [{} for _ in self.cell_sizes]
+        self._oversized = set()
+        self._fences: Dict[int, Geofence] = {}
+        # fence id -> (level or None, cells) to undo an insert
+        self._placement: Dict[int, tuple] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._change_id = 0
+        self._refreshed_at = None
+        self.matches = 0
+        self.lookups = 0
+
+    def _cells(self, bbox, size: float) -> List[tuple]:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        rows = range(math.floor(min_lat / size), math.floor(max_lat / size) + 1)
+        cols = range(math.floor(min_lon / size), math.floor(max_lon / size) + 1)
+        if len(rows) * len(cols) > self.max_cells:
+            return None
+        return [(row, col) for row in rows for col in cols]
+
+    def add(self, fence: Geofence):
+        with self._lock:
+            self.remove(fence.id)
+            self._fences[fence.id] = fence
+            for level, size in enumerate(self.cell_sizes):
+                cells = self._cells(fence.bbox, size)
+                if cells is not None:
+                    grid = self._grids[level]
+                    for cell in cells:
+                        grid.setdefault(cell, set()).add(fence.id)
+                    self._placement[fence.id] = (level, cells)
+                    return
+            self._oversized.add(fence.id)
+            self._placement[fence.id] = (None, ())
+
+    def remove(self, fence_id: int):
+        with self._lock:
+            placement = self._placement.pop(fence_id, None)
+            if placement is None:
+                return
+            del self._fences[fence_id]
+            level, cells = placement
+            if level is None:
+                self._oversized.discard(fence_id)
+                return
+            grid = self._grids[level]
+            for cell in cells:
+                members = grid.get(cell)
+                if members is not None:
+                    members.discard(fence_id)
+                    if not members:
+                        del grid[cell]
+
+    def match(self, latitude: float, longitude: float, category: Optional[str]) -> List[Geofence]:
+        """Geofences containing the point whose categories include ``category``."""
+        with self._lock:
+            self.lookups += 1
+            candidates = set(self._oversized)
+            for size, grid in zip(self.cell_sizes, self._grids):
+                members = grid.get((math.floor(latitude / size), math.floor(longitude / size)))
+                if members:
+                    candidates.update(members)
+            matched = []
+            for fence_id in candidates:
+                fence = self._fences[fence_id]
+                if fence.categories is not None and category not in fence.categories:
+                    continue
+                if fence.contains(latitude, longitude):
+                    matched.append(fence)
+            self.matches += len(matched)
+            return matched
+
+    def refresh(self, connection, force: bool = False):
+        """Apply subscriptions created, changed or deactivated since the last refresh."""
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            # Read the change id first: changes after it are picked up next time
+            last_change = connection.execute(select(func.max(AlertSubscriptionChange.id))).scalar() or 0
+            query = select(AlertSubscription.__table__)
+            if not self._loaded:
+                query = query.where(AlertSubscription.is_active.is_(True))
+            elif last_change > self._change_id:
+                query = query.where(AlertSubscription.id.in_(
+                    select(AlertSubscriptionChange.subscription_id).where(
+                        AlertSubscriptionChange.id > self._change_id,
+                        AlertSubscriptionChange.id <= last_change
+                    )
+                ))
+            else:
+                query = None
+            if query is not None:
+                for row in connection.execute(query):
+                    if row.is_active:
+                        self.add(Geofence.from_subscription(row))
+                    else:
+                        self.remove(row.id)
+            self._loaded = True
+            self._change_id = last_change
+            self._refreshed_at = now
+
+    def __len__(self) -> int:
+        return len(self._fences)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscriptions": len(self._fences),
+                "cells": [len(grid) for grid in self._grids],
+                "oversized": len(self._oversized),
+                "lookups": self.lookups,
+                "matches": self.matches,
+            }
+
+
+geofence_index = GeofenceIndex(
+    cell_degrees=Config.GEOFENCE_CELL_DEGREES,
+    refresh_seconds=Config.GEOFENCE_REFRESH_SECONDS,
+)
+
+@event.listens_for(Session, "after_flush")
+def queue_geofence_alerts(session, flush_context):
+    """Write an outbox row for every subscription a newly created incident falls into."""
+    incidents = [
+        obj for obj in session.new
+        if isinstance(obj, Incident) and obj.latitude is not None and obj.longitude is not None
+        and math.isfinite(obj.latitude) and math.isfinite(obj.longitude)
+    ]
+    if not incidents:
+        return
+    connection = session.connection()
+    geofence_index.refresh(connection)
+    rows = []
+    for incident in incidents:
+        for fence in geofence_index.match(incident.latitude, incident.longitude, incident.category):
+            rows.append({
+                "subscription_id": fence.id, "user_id": fence.user_id,
+                "incident_id": incident.id, "category": incident.category,
+            })
+    if rows:
+        # consumers follow notification ids as cursors: assign them in commit order
+        queue_log_rows(session, AlertNotification.__table__, rows)
@@ -0,0 +1,203 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from config import Config
+from utils import geohash
+from services.realtime import emit_event
+
+
+class _CellState:
+    """Sliding-window counts and baseline rate for one (geohash cell, category)."""
+
+    __slots__ = ("ring", "window_count", "bucket", "baseline", "active", "since", "peak")
+
+    def __init__(self, buckets: int, bucket: int):
+        self.ring = [0] * buckets
+        self.window_count = 0
+        # index of the newest bucket (event time // bucket length)
+        self.bucket = bucket
+        # exponentially weighted mean of events per bucket
+        self.baseline = 0.0
+        self.active = False
+        self.since = None
+        self.peak = 0
+
+
+class HotspotDetector:
+    """Streaming detector of geohash cells with an unusual number of incidents.
+
+    Each (cell, category) keeps a ring of per-bucket counts covering the
+    sliding window and an exponentially weighted baseline of events per
+    bucket. A cell is a hotspot while its window count reaches ``min_count``
+    and ``threshold`` times the count its baseline predicts. Advancing the
+    ring touches at most one slot per bucket in the window and the baseline
+    decay over skipped buckets is closed-form, so each event costs O(1).
+    """
+
+    def __init__(self, precision: int = 6, window_seconds: int = 3600, bucket_seconds: int = 300,
+                 min_count: int = 3, threshold: float = 3.0, baseline_half_life_seconds: int = 86400,
+                 baseline_floor: float = 0.05, max_cells: int = 100000,
+                 on_change: Optional[Callable[[str, dict], None]] = None):
+        self.precision = precision
+        self.bucket_seconds = bucket_seconds
+        self.buckets = max(1, window_seconds // bucket_seconds)
+        self.min_count = min_count
+        self.threshold = threshold
+        # per-bucket smoothing factor giving the requested half-life
+        self.alpha = 1 - 0.5 ** (bucket_seconds / baseline_half_life_seconds)
+        self.baseline_floor = baseline_floor
+        self.max_cells = max_cells
+        self.on_change = on_change
+        self._cells = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+        self.events = 0
+
+    def _advance(self, state: _CellState, bucket: int):
+        """Move the window forward to ``bucket``, folding closed buckets into the baseline."""
+        steps = bucket - state.bucket
+        if steps <= 0:
+            return
+        keep = 1 - self.alpha
+        # The newest bucket closes with its count, the skipped ones with zero
+        closed = state.ring[state.bucket % self.buckets]
+        state.baseline = (keep * state.baseline + self.alpha * closed) * keep ** (steps - 1)
+        for i in range(1, min(steps, self.buckets) + 1):
+            slot = (state.bucket + i) % self.buckets
+            state.window_count -= state.ring[slot]
+            state.ring[slot] = 0
+        state.bucket = bucket
+
+    def _expected(self, state: _CellState) -> float:
+        return max(state.baseline, self.baseline_floor) * self.buckets
+
+    def _evaluate(self, key, state: _CellState, now: float) -> Optional[str]:
+        """Update the hotspot flag and return 'hotspot'/'hotspot_cleared' on a change."""
+        hot = (state.window_count >= self.min_count
+               and state.window_count >= self.threshold * self._expected(state))
+        if hot:
+            state.peak = max(state.peak, state.window_count)
+        if hot and not state.active:
+            state.active = True
+            state.since = now
+            state.peak = state.window_count
+            self._active[key] = state
+            return "hotspot"
+        if not hot and state.active:
+            state.active = False
+            self._active.pop(key, None)
+            return "hotspot_cleared"
+        return None
+
+    def _evict(self, bucket: int):
+        """Drop the least recently updated cells once the table is full.
+
+        Live hotspots are passed over while anything else can go; only a
+        table made entirely of live hotspots drops its oldest one.
+        """
+        skipped = 0
+        while len(self._cells) > self.max_cells:
+            key, state = next(iter(self._cells.items()))
+            if state.active and bucket - state.bucket < self.buckets and skipped < len(self._cells):
+                # still live: keep it, it moves to the back and the next oldest is tried
+                self._cells.move_to_end(key)
+                skipped += 1
+                continue
+            self._cells.popitem(last=False)
+            self._active.pop(key, None)
+
+    def record(self, latitude: float, longitude: float, category: Optional[str],
+               timestamp: Optional[float] = None) -> Optional[dict]:
+        """Count one incident; returns the hotspot if this event started one."""
+        now = time.time() if timestamp is None else timestamp
+        bucket = int(now // self.bucket_seconds)
+        key = (geohash.encode(latitude, longitude, self.precision), category)
+
+        with self._lock:
+            self.events += 1
+            state = self._cells.get(key)
+            if state is None:
+                state = self._cells[key] = _CellState(self.buckets, bucket)
+            else:
+                self._cells.move_to_end(key)
+                if bucket <= state.bucket - self.buckets:
+                    return None  # older than the window
+                self._advance(state, bucket)
+            state.ring[bucket % self.buckets] += 1
+            state.window_count += 1
+            change = self._evaluate(key, state, now)
+            self._evict(bucket)
+            payload = self._describe(key, state) if change else None
+
+        if change and self.on_change is not None:
+            self.on_change(change, payload)
+        return payload if change == "hotspot" else None
+
+    def _describe(self, key, state: _CellState) -> dict:
+        cell, category = key
+        min_lat, min_lon, max_lat, max_lon = geohash.decode_bbox(cell)
+        expected = self._expected(state)
+        return {
+            "geohash": cell,
+            "category": category,
+            "latitude": (min_lat + max_lat) / 2,
+            "longitude": (min_lon + max_lon) / 2,
+            "bbox": [min_lat, min_lon, max_lat, max_lon],
+            "count": state.window_count,
+            "peak": state.peak,
+            "expected": round(expected, 3),
+            "ratio": round(state.window_count / expected, 2),
+            "window_minutes": self.buckets * self.bucket_seconds // 60,
+            "since": datetime.fromtimestamp(state.since, timezone.utc).isoformat() if state.since else None,
+        }
+
+    def active(self, now: Optional[float] = None) -> List[dict]:
+        """Current hotspots, hottest first, after expiring counts that left the window."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        cleared = []
+        with self._lock:
+            for key, state in list(self._active.items()):
+                self._advance(state, bucket)
+                if self._evaluate(key, state, now) == "hotspot_cleared":
+                    cleared.append(self._describe(key, state))
+            hotspots = [self._describe(key, state) for key, state in self._active.items()]
+        if self.on_change is not None:
+            for payload in cleared:
+                self.on_change("hotspot_cleared", payload)
+        return sorted(hotspots, key=lambda h: h["ratio"], reverse=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"events": self.events, "cells": len(self._cells), "active": len(self._active)}
+
+
+hotspot_detector = HotspotDetector(
+    precision=Config.HOTSPOT_GEOHASH_PRECISION,
+    window_seconds=Config.HOTSPOT_WINDOW_MINUTES * 60,
+    bucket_seconds=Config.HOTSPOT_BUCKET_MINUTES * 60,
+    min_count=Config.HOTSPOT_MIN_COUNT,
+    threshold=Config.HOTSPOT_THRESHOLD,
+    baseline_half_life_seconds=int(Config.HOTSPOT_BASELINE_HALF_LIFE_HOURS * 3600),
+    max_cells=Config.HOTSPOT_MAX_CELLS,
+    on_change=emit_event,
+)
+
+def record_hotspot(latitude: Optional[float], longitude: Optional[float], category: Optional[str],
+                   created_at: Optional[datetime]) -> Optional[dict]:
+    """Feed a committed incident to the detector; incidents without coordinates are skipped.
+
+    Takes the values rather than the row: callers read them before commit()
+    expires the instance, so recording costs no refresh query.
+    """
+    if latitude is None or longitude is None:
+        return None
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        return None
+    if created_at is not None and created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    timestamp = created_at.timestamp() if created_at is not None else None
+    return hotspot_detector.record(latitude, longitude, category, timestamp)
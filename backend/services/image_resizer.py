@@ -0,0 +1,63 @@
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from config import Config
+from utils.disk_cache import DiskLRUCache
+from utils.imaging import output_format, output_extension, render_fitted
+from utils.tdigest import TDigest, summarize_latency
+
+# Resized copies of uploaded images, made on first request
+# (/media/images/<filename>?w=&h=&fmt=) and kept in a size-bounded disk cache.
+# Widths and heights are limited to MEDIA_RESIZE_SIZES so the number of
+# distinct renders per image stays small; a request for a copy that is
+# already being rendered waits for that render instead of starting another.
+
+# Longest side used when only one of width and height is given
+UNBOUNDED = 1 << 16
+
+
+class ImageResizer:
+    """Renders images to fit in an allowed ``w`` x ``h`` box and caches the files."""
+
+    def __init__(self, sizes, cache: DiskLRUCache, quality: int = 80):
+        self.sizes = frozenset(sizes)
+        self.cache = cache
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._render_ms = TDigest()
+        self.renders = 0
+
+    def allowed(self, size: Optional[int]) -> bool:
+        return size is None or size in self.sizes
+
+    def resized(self, source: Path, width: Optional[int], height: Optional[int], fmt: str) -> Path:
+        """Path of ``source`` fitted in ``width`` x ``height`` as ``fmt`` ('webp' or 'jpeg')."""
+        fmt = output_format(fmt)
+        name = f"{source.name}.{width or 0}x{height or 0}{output_extension(fmt)}"
+        box = (width or UNBOUNDED, height or UNBOUNDED)
+        return self.cache.get_or_create(name, lambda path: self._render(source, path, box, fmt))
+
+    def _render(self, source: Path, destination: Path, box, fmt: str):
+        started = time.perf_counter()
+        render_fitted(source, destination, box, fmt, self.quality)
+        with self._lock:
+            self.renders += 1
+            self._render_ms.add((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            render_ms = summarize_latency(self._render_ms)
+        return {
+            "sizes": sorted(self.sizes),
+            "renders": self.renders,
+            "render_ms": render_ms,
+            "cache": self.cache.stats(),
+        }
+
+
+image_resizer = ImageResizer(
+    sizes=Config.MEDIA_RESIZE_SIZES,
+    cache=DiskLRUCache(Path(Config.UPLOAD_FOLDER) / 'resized', Config.MEDIA_RESIZE_CACHE_BYTES),
+    quality=Config.MEDIA_IMAGE_QUALITY,
+)
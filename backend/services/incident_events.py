@@ -0,0 +1,183 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models.incident import Incident
+from config import Config
+from services.broadcast import BroadcastCoalescer
+from services.event_bus import build_event_bus
+
+# Real-time incident events. Every committed create/update/delete of an
+# incident (API, bulk endpoints or ingest) is turned into a compact diff and
+# sent to the Socket.IO rooms matching its category, source and status.
+# Events travel over the event bus to every process serving clients, where
+# they are coalesced and delivered as ``incident_batch`` messages.
+
+BATCH_EVENT = "incident_batch"
+EVENT_FIELDS = ("source", "category", "title", "description", "url", "location",
+                "latitude", "longitude", "status", "published_at", "created_at")
+ROOM_FIELDS = ("category", "source", "status")
+ALL_INCIDENTS_ROOM = "incidents"
+
+def room_name(field: str, value) -> str:
+    return f"{field}:{value if value is not None else ''}"
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _routing(values: Dict) -> Dict[str, set]:
+    return {field: {values.get(field)} for field in ROOM_FIELDS}
+
+def _created_event(incident) -> dict:
+    data = {}
+    for field in EVENT_FIELDS:
+        value = getattr(incident, field)
+        if value is not None:
+            data[field] = _json_value(value)
+    return {"op": "created", "id": incident.id, "data": data,
+            "rooms": _routing({field: getattr(incident, field) for field in ROOM_FIELDS})}
+
+def _updated_event(incident) -> Optional[dict]:
+    state = inspect(incident)
+    changes = {}
+    rooms = _routing({field: getattr(incident, field) for field in ROOM_FIELDS})
+    for field in EVENT_FIELDS:
+        history = state.attrs[field].history
+        if not history.added:
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0]
+        if old == new:
+            continue
+        changes[field] = _json_value(new)
+        # clients watching the old value learn that the incident left their room
+        if field in rooms:
+            rooms[field].add(old)
+    if not changes:
+        return None
+    return {"op": "updated", "id": incident.id, "changes": changes, "rooms": rooms}
+
+def _deleted_event(incident) -> dict:
+    return {"op": "deleted", "id": incident.id,
+            "rooms": _routing({field: getattr(incident, field) for field in ROOM_FIELDS})}
+
+def merge_events(first: dict, second: dict) -> Optional[dict]:
+    """Combine two events for the same incident into one (None if they cancel out)."""
+    rooms = {field: first["rooms"][field] | second["rooms"][field] for field in ROOM_FIELDS}
+    if second["op"] == "deleted":
+        if first["op"] == "created":
+            return None
+        return {**second, "rooms": rooms}
+    if first["op"] == "created":
+        return {**first, "data": {**first["data"], **second.get("changes", {})}, "rooms": rooms}
+    if first["op"] == "deleted":
+        # id reused after a delete (SQLite): the newer event wins
+        return {**second, "rooms": rooms}
+    return {**first, "changes": {**first["changes"], **second.get("changes", {})}, "rooms": rooms}
+
+def event_rooms(incident_event: dict) -> List[str]:
+    rooms = [ALL_INCIDENTS_ROOM]
+    for field, values in incident_event["rooms"].items():
+        rooms.extend(room_name(field, value) for value in values)
+    return rooms
+
+def event_payload(incident_event: dict) -> dict:
+    """The part of an event that is sent to clients."""
+    return {key: value for key, value in incident_event.items() if key != "rooms"}
+
+incident_broadcaster = BroadcastCoalescer(
+    BATCH_EVENT, merge=merge_events, rooms=event_rooms, payload=event_payload,
+    window_seconds=Config.BROADCAST_WINDOW_MS / 1000,
+    max_batch=Config.BROADCAST_MAX_BATCH,
+    client_max_queued=Config.BROADCAST_CLIENT_MAX_QUEUED,
+    client_max_backlog=Config.BROADCAST_CLIENT_MAX_BACKLOG,
+    replay_size=Config.BROADCAST_REPLAY_SIZE,
+)
+
+incident_event_bus = build_event_bus()
+_relay_lock = threading.Lock()
+_relay_started = False
+
+def _to_wire(incident_event: dict) -> dict:
+    return {**incident_event, "rooms": {field: list(values) for field, values in incident_event["rooms"].items()}}
+
+def _from_wire(incident_event: dict) -> dict:
+    return {**incident_event, "rooms": {field: set(values) for field, values in incident_event["rooms"].items()}}
+
+def publish_incident_events(events: List[dict]):
+    incident_event_bus.publish([_to_wire(incident_event) for incident_event in events])
+
+def start_incident_relay(start_background_task=None):
+    """Deliver bus events to this process's clients; called once a process serves sockets.
+
+    Processes that only write incidents (ingest workers, CLI commands) never
+    call this, so they publish without hosting any Socket.IO state.
+    """
+    global _relay_started
+    with _relay_lock:
+        if _relay_started:
+            return
+        _relay_started = True
+    incident_event_bus.subscribe(
+        lambda events: incident_broadcaster.submit([_from_wire(incident_event) for incident_event in events]),
+        start_background_task,
+    )
+
+@event.listens_for(Session, "before_flush")
+def capture_deleted_incidents(session, flush_context, instances):
+    # Deleted rows can no longer be loaded once the flush has run
+    session.info["incident_deletes"] = [
+        _deleted_event(obj) for obj in session.deleted if isinstance(obj, Incident)
+    ]
+
+def flush_events(session, flush_context) -> List[dict]:
+    """Diffs for the incidents written by the current flush.
+
+    Meant for after_flush listeners; computed once per flush and shared, since
+    attribute history is only available until the flush finishes.
+    """
+    cached = session.info.get("incident_flush_events")
+    if cached is not None and cached[0] is flush_context:
+        return cached[1]
+    captured = []
+    for obj in session.new:
+        if isinstance(obj, Incident):
+            captured.append(_created_event(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Incident) and obj not in session.deleted:
+            updated = _updated_event(obj)
+            if updated is not None:
+                captured.append(updated)
+    captured.extend(session.info.get("incident_deletes", []))
+    session.info["incident_flush_events"] = (flush_context, captured)
+    return captured
+
+@event.listens_for(Session, "after_flush")
+def collect_incident_events(session, flush_context):
+    """Queue a diff for every incident written in this flush; sent only after commit."""
+    pending = session.info.setdefault("incident_events", {})
+    for incident_event in flush_events(session, flush_context):
+        key = incident_event["id"]
+        if key in pending:
+            merged = merge_events(pending[key], incident_event)
+            if merged is None:
+                del pending[key]
+            else:
+                pending[key] = merged
+        else:
+            pending[key] = incident_event
+
+@event.listens_for(Session, "after_commit")
+def send_incident_events(session):
+    session.info.pop("incident_deletes", None)
+    session.info.pop("incident_flush_events", None)
+    events = session.info.pop("incident_events", None)
+    if events:
+        publish_incident_events(list(events.values()))
+
+@event.listens_for(Session, "after_rollback")
+def discard_incident_events(session):
+    session.info.pop("incident_events", None)
+    session.info.pop("incident_deletes", None)
+    session.info.pop("incident_flush_events", None)
@@ -2,6 +2,11 @@ from typing import List, Dict
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from utils.db import SessionLocal
+from utils.cache import invalidate_incident_caches
+from services.hotspots import record_hotspot
+import services.incident_events  # noqa: F401  (publishes incident events on commit)
+import services.geofence  # noqa: F401  (queues geofence alerts for new incidents)
+import services.webhooks  # noqa: F401  (queues webhook deliveries for incident events)
 from models.incident import Incident
 from services.scrapers.news_scraper import scrape_all_news
 from services.scrapers.weather_scraper import fetch_current_weather
@@ -22,6 +27,12 @@ def _insert_incident(session, payload: Dict):
         status="reported",
     )
     session.add(inc)
+    return inc
+
+def _hotspot_fields(session, inc: Incident) -> tuple:
+    """What the hotspot detector needs, read before commit() expires the row."""
+    session.flush()
+    return inc.latitude, inc.longitude, inc.category, inc.created_at
 
 def ingest_news() -> int:
     """Scrape TOI+CNN, categorize, write into DB. Returns count inserted."""
@@ -41,9 +52,11 @@ def ingest_news() -> int:
                     continue
 
             try:
-                _insert_incident(session, it)
+                inc = _insert_incident(session, it)
+                hotspot = _hotspot_fields(session, inc)
                 session.commit()
                 created += 1
+                record_hotspot(*hotspot)
             except IntegrityError:
                 session.rollback()
                 # duplicate by unique constraint; ignore
@@ -51,14 +64,19 @@ def ingest_news() -> int:
         return created
     finally:
         session.close()
+        if created:
+            invalidate_incident_caches()
 
 def ingest_weather(city: str) -> int:
     session = SessionLocal()
     try:
         it = fetch_current_weather(city)
         it["category"] = "weather"
-        _insert_incident(session, it)
+        inc = _insert_incident(session, it)
+        hotspot = _hotspot_fields(session, inc)
         session.commit()
+        invalidate_incident_caches()
+        record_hotspot(*hotspot)
         return 1
     finally:
         session.close()
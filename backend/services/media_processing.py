@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable
+from sqlalchemy import select, update, or_, and_
+from config import Config
+from utils.db import SessionLocal
+from utils.cache import invalidate_incident_caches
+from utils.file_handler import FileHandler
+from utils.tdigest import TDigest, summarize_latency
+from models.media import Media
+from models.incident import Incident
+from models.incident_change import IncidentChange
+from models.change_sequence import queue_log_rows
+from services.realtime import emit_event
+
+# Image post-processing off the request path. Uploads are saved and committed
+# with processing_status "pending" and the API answers with placeholder URLs;
+# a pool of worker threads (Pillow releases the GIL while decoding and
+# resizing) then claims each row, writes the thumbnail, the responsive width
+# variants and the metadata, and marks it ready or failed. Rows left behind
+# by a restart are picked up again by a periodic sweep; a row stuck in
+# "processing" longer than the lease is assumed abandoned. A duplicate of an
+# image that is already processed (same content_hash) reuses its files.
+
+logger = logging.getLogger(__name__)
+
+
+class MediaProcessor:
+    """Claims pending media rows and processes them on a thread pool."""
+
+    def __init__(self, workers: int = 2, lease_seconds: float = 300.0, sweep_seconds: float = 60.0,
+                 session_factory=SessionLocal.session_factory):
+        # a session of its own, not the thread's scoped one: in sync mode this
+        # runs inside a request that still has its session open
+        self.session_factory = session_factory
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.sweep_seconds = sweep_seconds
+        self._pool = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._queued = 0
+        self._process_ms = TDigest()
+        self._lag_ms = TDigest()
+        self.processed = 0
+        self.reused = 0
+        self.failed = 0
+
+    def ensure_started(self):
+        """Start the worker pool and the sweeper once per process."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="media-worker")
+            self._thread = threading.Thread(target=self._run, name="media-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sweeping and wait for the media in progress."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            self._thread = self._pool = None
+
+    def submit(self, media_ids: Iterable[int]):
+        """Queue committed pending media for processing."""
+        self.ensure_started()
+        for media_id in media_ids:
+            with self._lock:
+                self._queued += 1
+            self._pool.submit(self._work, media_id)
+
+    def _work(self, media_id: int):
+        with self._lock:
+            self._queued -= 1
+        try:
+            self.process(media_id)
+        except Exception as e:
+            logger.error(f"Media processing error for media {media_id}: {e}")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Media sweep error: {e}")
+            self._stopping.wait(self.sweep_seconds)
+
+    def sweep(self) -> int:
+        """Queue pending media nobody is working on (e.g. after a restart)."""
+        with self._lock:
+            if self._queued:
+                return 0  # still working through what was submitted
+        session = self.session_factory()
+        try:
+            ids = session.execute(
+                select(Media.id).where(self._claimable(datetime.now(timezone.utc))).order_by(Media.id).limit(500)
+            ).scalars().all()
+        finally:
+            session.close()
+        if ids:
+            self.submit(ids)
+        return len(ids)
+
+    def _claimable(self, now: datetime):
+        stale = now - timedelta(seconds=self.lease_seconds)
+        return or_(Media.processing_status == "pending",
+                   and_(Media.processing_status == "processing", Media.updated_at < stale))
+
+    def process(self, media_id: int) -> bool:
+        """Process one media row if it is still claimable; False when another worker has it."""
+        now = datetime.now(timezone.utc)
+        session = self.session_factory()
+        try:
+            claimed = session.execute(
+                update(Media).where(Media.id == media_id, self._claimable(now))
+                .values(processing_status="processing", updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+            if not claimed:
+                return False
+
+            media = session.get(Media, media_id)
+            if self._upload_in_flight(media, now):
+                # the row commits before the upload is moved into place: leave it to a later sweep
+                media.processing_status = "pending"
+                session.commit()
+                return False
+            stale = []
+            reused = False
+            started = time.perf_counter()
+            try:
+                result = self._processed_copy(session, media)
+                if result is None:
+                    result = FileHandler().process_image(Path(media.file_path), media.filename)
+                else:
+                    reused = True
+            except Exception as e:
+                logger.warning(f"Could not process media {media_id} ({media.filename}): {e}")
+                media.processing_status = "failed"
+                media.processing_error = str(e)[:512]
+            else:
+                stale = self._superseded_files(media, result)
+                media.thumbnail_path = result['thumbnail_path']
+                media.variants = result['variants']
+                media.width = result['width']
+                media.height = result['height']
+                media.media_metadata = result['metadata']
+                media.processing_status = "ready"
+                media.processing_error = None
+            finished = datetime.now(timezone.utc)
+            media.processed_at = finished
+            status, incident_id, created_at = media.processing_status, media.incident_id, media.created_at
+            payload = {"incident_id": incident_id, "media": media.to_dict()}
+            # the incident's representation changed: move its validators on
+            # without going through the ORM, which would publish an incident event,
+            # and log a change so delta-sync clients re-read its media
+            session.execute(Incident.__table__.update().where(Incident.__table__.c.id == incident_id)
+                            .values(updated_at=finished))
+            queue_log_rows(session, IncidentChange.__table__, [{"incident_id": incident_id, "operation": "upsert"}])
+            session.commit()
+        finally:
+            session.close()
+
+        for path in stale:
+            FileHandler().delete_file(path)
+        invalidate_incident_caches(incident_id)
+        emit_event("media_processed", payload)
+        with self._lock:
+            if reused:
+                self.reused += 1
+            if status == "ready":
+                self.processed += 1
+            else:
+                self.failed += 1
+            self._process_ms.add((time.perf_counter() - started) * 1000)
+            if created_at is not None:
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                self._lag_ms.add(max((finished - created_at).total_seconds(), 0) * 1000)
+        return True
+
+    def _upload_in_flight(self, media: Media, now: datetime) -> bool:
+        # a file still missing after the lease is really gone, and the image fails below
+        if os.path.exists(media.file_path) or media.created_at is None:
+            return False
+        created_at = media.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return now - created_at < timedelta(seconds=self.lease_seconds)
+
+    @staticmethod
+    def _processed_copy(session, media: Media):
+        # identical content was uploaded before: its thumbnail and variants are ours too
+        if not media.content_hash:
+            return None
+        twin = session.execute(
+            select(Media).where(Media.content_hash == media.content_hash, Media.id != media.id,
+                                Media.processing_status == "ready", Media.thumbnail_path.isnot(None)).limit(1)
+        ).scalar()
+        if twin is None or not os.path.exists(twin.thumbnail_path):
+            return None
+        return {
+            'thumbnail_path': twin.thumbnail_path,
+            'variants': twin.variants or {},
+            'width': twin.width,
+            'height': twin.height,
+            'metadata': twin.media_metadata,
+        }
+
+    @staticmethod
+    def _superseded_files(media: Media, result: dict) -> list:
+        # a rebuild may change names (e.g. JPEG -> WebP) or drop widths
+        handler = FileHandler()
+        old = {str(handler.upload_folder / 'variants' / name) for name in (media.variants or {}).values()}
+        if media.thumbnail_path:
+            old.add(media.thumbnail_path)
+        new = {str(handler.upload_folder / 'variants' / name) for name in result['variants'].values()}
+        new.add(result['thumbnail_path'])
+        return sorted(old - new)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "workers": self.workers,
+                "queued": self._queued,
+                "processed": self.processed,
+                "reused": self.reused,
+                "failed": self.failed,
+                "process_ms": summarize_latency(self._process_ms),
+                "ready_lag_ms": summarize_latency(self._lag_ms),
+            }
+
+
+media_processor = MediaProcessor(
+    workers=Config.MEDIA_WORKERS,
+    lease_seconds=Config.MEDIA_LEASE_SECONDS,
+    sweep_seconds=Config.MEDIA_SWEEP_SECONDS,
+)
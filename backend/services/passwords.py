@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional, Tuple
+import bcrypt
+from config import Config
+from utils.tdigest import TDigest, summarize_latency
+
+# Password hashing. bcrypt is deliberately slow, so hashes and checks run in
+# a small pool of worker processes at lowered priority instead of on the
+# request thread: a burst of logins queues up there rather than starving
+# every other endpoint. The number of hashes queued or running is capped;
+# past the cap callers get PasswordHasherBusy at once (the routes answer
+# 503) instead of waiting behind the backlog. A successful check of a hash
+# made with a different cost than PASSWORD_HASH_ROUNDS returns a rehash.
+
+
+class PasswordHasherBusy(Exception):
+    """The hashing pool is saturated (or too slow); retry later."""
+
+
+def hash_cost(password_hash: str) -> Optional[int]:
+    """The bcrypt cost of ``password_hash`` ($2b$12$... -> 12)."""
+    parts = password_hash.split("$")
+    return int(parts[2]) if len(parts) > 3 and parts[2].isdigit() else None
+
+def _hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _check_password(password: str, password_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    # verify and, if the cost is outdated, rehash in the same round trip
+    if not bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8")):
+        return False, None
+    if hash_cost(password_hash) == rounds:
+        return True, None
+    return True, _hash_password(password, rounds)
+
+def _init_worker(nice: int):
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+class PasswordHasher:
+    """bcrypt in a bounded process pool.
+
+    ``workers`` processes (started on first use) run the hashes, and at
+    most ``max_pending`` may be queued or running at once. With ``workers``
+    0 hashing runs on the calling thread (bcrypt releases the GIL), still
+    capped at ``max_pending`` concurrent hashes.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 16,
+                 timeout: float = 10.0, nice: int = 10):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.nice = nice
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._ms = TDigest()
+        self.hashes = 0
+        self.checks = 0
+        self.rehashes = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def hash(self, password: str) -> str:
+        """A new bcrypt hash of ``password`` at the configured cost."""
+        self.hashes += 1
+        return self._run(_hash_password, password, self.rounds)
+
+    def verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """(matches, replacement hash or None); a replacement is returned for outdated costs."""
+        self.checks += 1
+        valid, new_hash = self._run(_check_password, password, password_hash, self.rounds)
+        if new_hash:
+            self.rehashes += 1
+        return valid, new_hash
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._pending += 1
+        started = time.perf_counter()
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._done(started)
+
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._done(started)
+            raise
+        # the slot is freed when the worker finishes, even if we stop waiting
+        future.add_done_callback(lambda _: self._done(started))
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            self.timeouts += 1
+            raise PasswordHasherBusy()
+
+    def _done(self, started: float):
+        with self._lock:
+            self._pending -= 1
+            self._ms.add((time.perf_counter() - started) * 1000)
+        self._slots.release()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn rather than fork: the web process is multithreaded
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.nice,),
+                    )
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+            latency = summarize_latency(self._ms)
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "hashes": self.hashes,
+            "checks": self.checks,
+            "rehashes": self.rehashes,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "hash_ms": latency,
+        }
+
+
+password_hasher = PasswordHasher(
+    rounds=Config.PASSWORD_HASH_ROUNDS,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    timeout=Config.PASSWORD_HASH_TIMEOUT,
+    nice=Config.PASSWORD_HASH_NICE,
+)
@@ -0,0 +1,63 @@
+import logging
+from typing import Dict, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The Socket.IO server lives in app.py, which imports the blueprints; services
+# reach it through this module so they do not import app.py back.
+_socketio = None
+
+def init_realtime(socketio):
+    """Register the Socket.IO server used by emit_event."""
+    global _socketio
+    _socketio = socketio
+
+def emit_event(event: str, data, room=None):
+    """Emit to connected clients (or one room); a no-op until a server is registered."""
+    if _socketio is None:
+        return
+    try:
+        _socketio.emit(event, data, to=room)
+    except Exception as e:
+        logger.warning(f"Failed to emit {event}: {e}")
+
+def emit_local(event: str, data, room=None):
+    """Emit to clients of this process only, bypassing the message queue."""
+    if _socketio is None:
+        return
+    try:
+        _socketio.emit(event, data, to=room, ignore_queue=True)
+    except Exception as e:
+        logger.warning(f"Failed to emit {event}: {e}")
+
+def room_subscribers(rooms) -> Dict[str, Tuple[str, Set[str]]]:
+    """sid -> (Engine.IO sid, which of ``rooms`` it joined) for clients in any of ``rooms``."""
+    if _socketio is None:
+        return {}
+    namespace_rooms = _socketio.server.manager.rooms.get("/", {})
+    members = {}
+    for room in rooms:
+        participants = namespace_rooms.get(room)
+        if not participants:
+            continue
+        while True:
+            try:
+                snapshot = list(participants.items())
+                break
+            except RuntimeError:
+                # a client joined or left while we were copying
+                continue
+        for sid, eio_sid in snapshot:
+            entry = members.get(sid)
+            if entry is None:
+                members[sid] = (eio_sid, {room})
+            else:
+                entry[1].add(room)
+    return members
+
+def queued_packets(eio_sid: str) -> int:
+    """Packets waiting in a client's Engine.IO send queue (0 once it is gone)."""
+    if _socketio is None:
+        return 0
+    socket = _socketio.server.eio.sockets.get(eio_sid)
+    return socket.queue.qsize() if socket is not None else 0
@@ -0,0 +1,77 @@
+import threading
+from typing import Dict, Optional
+from models.incident_status_transition import IncidentStatusTransition
+from utils.tdigest import TDigest
+
+# target status -> reported metric
+RESOLUTION_METRICS = {
+    "confirmed": "time_to_confirm",
+    "resolved": "time_to_resolve",
+}
+RESOLUTION_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class ResolutionTimeSketches:
+    """Per-category t-digests of the time incidents take to reach each target status.
+
+    Fed incrementally from the append-only transitions table: every refresh
+    reads only the transitions after the last id it has seen, so a request
+    never rescans the history.
+    """
+
+    def __init__(self, compression: float = 200.0, batch_size: int = 10000):
+        self.compression = compression
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._sketches: Dict[tuple, TDigest] = {}
+        self._last_id = 0
+
+    def _sketch(self, metric: str, category) -> TDigest:
+        key = (metric, category)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = TDigest(self.compression)
+        return sketch
+
+    def refresh(self, session):
+        with self._lock:
+            while True:
+                rows = session.query(
+                    IncidentStatusTransition.id,
+                    IncidentStatusTransition.category,
+                    IncidentStatusTransition.to_status,
+                    IncidentStatusTransition.seconds_since_created
+                ).filter(
+                    IncidentStatusTransition.id > self._last_id,
+                    IncidentStatusTransition.to_status.in_(RESOLUTION_METRICS)
+                ).order_by(IncidentStatusTransition.id).limit(self.batch_size).all()
+                for transition_id, category, status, seconds in rows:
+                    self._sketch(RESOLUTION_METRICS[status], category).add(seconds)
+                    self._last_id = transition_id
+                if len(rows) < self.batch_size:
+                    break
+
+    def summary(self, category: Optional[str] = None) -> dict:
+        """{category: {metric: {count, p50, p90, p99}}} in seconds; None groups all categories."""
+        with self._lock:
+            result = {}
+            totals = {}
+            for (metric, sketch_category), sketch in self._sketches.items():
+                if category is not None and sketch_category != category:
+                    continue
+                result.setdefault(sketch_category, {})[metric] = _describe(sketch)
+                total = totals.get(metric)
+                if total is None:
+                    total = totals[metric] = TDigest(self.compression)
+                total.merge(sketch)
+            return {"overall": {metric: _describe(sketch) for metric, sketch in totals.items()},
+                    "categories": result}
+
+
+def _describe(sketch: TDigest) -> dict:
+    summary = {"count": int(sketch.count)}
+    for q in RESOLUTION_QUANTILES:
+        summary[f"p{int(q * 100)}"] = round(sketch.quantile(q), 1)
+    return summary
+
+resolution_sketches = ResolutionTimeSketches()
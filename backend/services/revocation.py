@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from config import Config
+from utils.bloom import BloomFilter
+from utils.db import SessionLocal
+from models.revoked_token import RevokedToken
+from models.change_sequence import queue_log_rows
+
+# Revoked JWTs (logout). Entries live in a shared store (the database or
+# Redis) until the token would have expired anyway. Each process keeps a
+# Bloom filter of the revoked ids in front of the store, so checking a token
+# that was never revoked (nearly every request) does no I/O; only filter
+# hits are confirmed against the store. New revocations from other workers
+# are pulled into the filter incrementally every REVOCATION_SYNC_SECONDS.
+
+logger = logging.getLogger(__name__)
+
+def token_expiry(claims: dict) -> datetime:
+    """When a decoded JWT expires (tokens without ``exp`` count as JWT_ACCESS_TOKEN_EXPIRES from now)."""
+    if claims.get("exp"):
+        return datetime.fromtimestamp(claims["exp"], timezone.utc)
+    return datetime.now(timezone.utc) + timedelta(seconds=Config.JWT_ACCESS_TOKEN_EXPIRES)
+
+
+class DatabaseRevocationStore:
+    """Revocations in the revoked_tokens table; row ids, assigned in commit order, are the sync cursor."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def add(self, jti: str, expires_at: datetime):
+        session = self.session_factory()
+        try:
+            # inserted at commit with the next commit-ordered id, see models.change_sequence
+            queue_log_rows(session, RevokedToken.__table__, [{"jti": jti, "expires_at": expires_at}])
+            session.commit()
+        except IntegrityError:
+            session.rollback()  # already revoked
+        finally:
+            session.close()
+
+    def is_revoked(self, jti: str) -> bool:
+        session = self.session_factory()
+        try:
+            return session.execute(
+                select(RevokedToken.id).where(
+                    RevokedToken.jti == jti, RevokedToken.expires_at > datetime.now(timezone.utc)
+                )
+            ).first() is not None
+        finally:
+            session.close()
+
+    def changes(self, cursor) -> Optional[Tuple[int, List[str]]]:
+        """(new cursor, unexpired ids revoked after ``cursor``); ``cursor`` None loads everything."""
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                .where(RevokedToken.id > (cursor or 0)).order_by(RevokedToken.id)
+            ).all()
+        finally:
+            session.close()
+        now = datetime.now(timezone.utc)
+        jtis = [jti for _, jti, expires_at in rows if _aware(expires_at) > now]
+        return (rows[-1].id if rows else cursor or 0), jtis
+
+    def purge(self) -> int:
+        """Delete entries whose tokens have expired."""
+        session = self.session_factory()
+        try:
+            removed = session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+            ).rowcount
+            session.commit()
+            return removed
+        finally:
+            session.close()
+
+
+class RedisRevocationStore:
+    """Revocations as Redis keys that expire with their token, plus a capped stream for sync."""
+
+    def __init__(self, client, prefix: str = "inci:revoked:", log_max_length: int = 100000):
+        self.client = client
+        self.prefix = prefix
+        self.log_key = prefix + "log"
+        self.log_max_length = log_max_length
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for the shared backend
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def add(self, jti: str, expires_at: datetime):
+        expires = int(expires_at.timestamp())
+        if expires <= time.time():
+            return
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + jti, 1, exat=expires)
+        pipe.xadd(self.log_key, {"jti": jti, "exp": expires}, maxlen=self.log_max_length, approximate=True)
+        pipe.execute()
+
+    def is_revoked(self, jti: str) -> bool:
+        return bool(self.client.exists(self.prefix + jti))
+
+    def changes(self, cursor) -> Optional[Tuple[str, List[str]]]:
+        """Like DatabaseRevocationStore.changes; None when the log was trimmed past ``cursor``."""
+        if cursor is None:
+            newest = self.client.xrevrange(self.log_key, count=1)
+            position = _text(newest[0][0]) if newest else "0-0"
+            skip = len(self.prefix)
+            jtis = [_text(key)[skip:] for key in self.client.scan_iter(match=self.prefix + "*", count=1000)
+                    if _text(key) != self.log_key]
+            return position, jtis
+
+        oldest = self.client.xrange(self.log_key, count=1)
+        if (oldest and _stream_id(_text(oldest[0][0])) > _stream_id(cursor)
+                and self.client.xlen(self.log_key) >= self.log_max_length):
+            return None  # entries after the cursor may have been trimmed
+        entries = self.client.xrange(self.log_key, min=f"({cursor}", max="+")
+        now = time.time()
+        jtis = []
+        for entry_id, fields in entries:
+            fields = {_text(key): _text(value) for key, value in fields.items()}
+            if int(fields["exp"]) > now:
+                jtis.append(fields["jti"])
+        return (_text(entries[-1][0]) if entries else cursor), jtis
+
+    def purge(self) -> int:
+        return 0  # keys expire on their own and the log is capped
+
+
+class TokenRevocationList:
+    """A shared revocation store with a per-process Bloom filter in front.
+
+    ``is_revoked`` answers False straight from the filter for ids that were
+    never revoked; a filter hit is confirmed against the store, which also
+    turns false positives and expired entries into False. The filter is
+    updated from the store's change log at most every ``sync_seconds`` and
+    rebuilt from scratch every ``rebuild_seconds`` (or when it fills up) to
+    shed expired ids, since a Bloom filter cannot delete.
+    """
+
+    def __init__(self, store, capacity: int = 100000, error_rate: float = 0.001,
+                 sync_seconds: float = 1.0, rebuild_seconds: float = 3600.0):
+        self.store = store
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self._bloom: Optional[BloomFilter] = None
+        self._cursor = None
+        self._next_sync = 0.0
+        self._rebuild_at = 0.0
+        self._sync_lock = threading.Lock()
+        self.checks = 0
+        self.store_lookups = 0
+        self.false_positives = 0
+        self.syncs = 0
+        self.rebuilds = 0
+
+    def revoke(self, jti: str, expires_at: datetime):
+        self.store.add(jti, expires_at)
+        # visible in this process at once; other processes see it on their next sync
+        bloom = self._bloom
+        if bloom is not None:
+            bloom.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._maybe_sync()
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.store_lookups += 1
+        revoked = self.store.is_revoked(jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        loaded = self._bloom is not None
+        # requests arriving during a sync keep using the current filter
+        if not self._sync_lock.acquire(blocking=not loaded):
+            return
+        try:
+            if now < self._next_sync:
+                return
+            try:
+                if not loaded or now >= self._rebuild_at or self._bloom.count >= self._bloom.capacity:
+                    self._rebuild(now)
+                else:
+                    changes = self.store.changes(self._cursor)
+                    if changes is None:
+                        self._rebuild(now)
+                    else:
+                        self._cursor, jtis = changes
+                        for jti in jtis:
+                            self._bloom.add(jti)
+                        self.syncs += 1
+            except Exception as e:
+                if not loaded:
+                    raise
+                # keep serving from the current filter; filter hits still go to the store
+                logger.warning(f"Token revocation sync failed: {e}")
+            self._next_sync = now + self.sync_seconds
+        finally:
+            self._sync_lock.release()
+
+    def _rebuild(self, now: float):
+        self.store.purge()
+        cursor, jtis = self.store.changes(None)
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom, self._cursor = bloom, cursor
+        self._rebuild_at = now + self.rebuild_seconds
+        self.rebuilds += 1
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "backend": type(self.store).__name__,
+            "checks": self.checks,
+            "store_lookups": self.store_lookups,
+            "false_positives": self.false_positives,
+            "syncs": self.syncs,
+            "rebuilds": self.rebuilds,
+            "filter": ({"items": bloom.count, "capacity": bloom.capacity, "bytes": bloom.nbytes(),
+                        "hashes": bloom.hashes} if bloom is not None else None),
+        }
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    millis, _, seq = value.partition("-")
+    return int(millis), int(seq or 0)
+
+def build_revocation_store():
+    """Create the store selected by Config.REVOCATION_BACKEND."""
+    if Config.REVOCATION_BACKEND == "redis":
+        return RedisRevocationStore.from_url(Config.REVOCATION_REDIS_URL)
+    return DatabaseRevocationStore()
+
+token_revocations = TokenRevocationList(
+    build_revocation_store(),
+    capacity=Config.REVOCATION_BLOOM_CAPACITY,
+    error_rate=Config.REVOCATION_BLOOM_ERROR_RATE,
+    sync_seconds=Config.REVOCATION_SYNC_SECONDS,
+    rebuild_seconds=Config.REVOCATION_REBUILD_SECONDS,
+)
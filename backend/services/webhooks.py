@@ -0,0 +1,407 @@
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import requests
+from sqlalchemy import event, select, update, func
+from sqlalchemy.orm import Session
+from config import Config
+from utils.db import SessionLocal
+from utils.tdigest import TDigest, summarize_latency
+from models.webhook_endpoint import WebhookEndpoint
+from models.webhook_delivery import WebhookDelivery
+from services.incident_events import flush_events
+
+# Outbound webhooks. Every incident event that matches an active endpoint's
+# filters is written to the webhook_deliveries outbox by the flush that
+# changed the incident, so it commits or rolls back with it. A dispatcher
+# (in the web process or a `flask deliver-webhooks` worker) posts the
+# outbox to each endpoint in signed batches, retrying failures with
+# exponential backoff until they are delivered or dead-lettered.
+
+SIGNATURE_HEADER = "X-Inci-Signature"
+TIMESTAMP_HEADER = "X-Inci-Timestamp"
+USER_AGENT = "Inci-Alert-Webhooks/1.0"
+EVENT_TYPES = ("created", "updated", "deleted")
+
+logger = logging.getLogger(__name__)
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature header value: HMAC-SHA256 over "<timestamp>.<body>"."""
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str,
+                     tolerance_seconds: float = 300) -> bool:
+    """Receiver-side check of a delivery's signature and timestamp (rejects replays)."""
+    try:
+        age = abs(time.time() - int(timestamp))
+    except (TypeError, ValueError):
+        return False
+    return age <= tolerance_seconds and hmac.compare_digest(sign(secret, timestamp, body), signature or "")
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class EndpointRoute:
+    """An active endpoint's filters, matched against incident events."""
+
+    __slots__ = ("id", "events", "categories", "sources")
+
+    def __init__(self, id: int, events=None, categories=None, sources=None):
+        self.id = id
+        self.events = frozenset(events) if events else None
+        self.categories = frozenset(categories) if categories else None
+        self.sources = frozenset(sources) if sources else None
+
+    def matches(self, incident_event: dict) -> bool:
+        if self.events is not None and incident_event["op"] not in self.events:
+            return False
+        rooms = incident_event["rooms"]
+        # an update matches on the old or the new value, so receivers see incidents leave their filter
+        if self.categories is not None and not self.categories & rooms["category"]:
+            return False
+        if self.sources is not None and not self.sources & rooms["source"]:
+            return False
+        return True
+
+
+class EndpointRoutes:
+    """Active endpoints, reloaded at most every ``refresh_seconds``.
+
+    Endpoints are few and rarely change, so the whole list is reloaded; a
+    process that changes an endpoint calls ``invalidate`` to see it at once.
+    """
+
+    def __init__(self, refresh_seconds: float = 5.0):
+        self.refresh_seconds = refresh_seconds
+        self._routes: List[EndpointRoute] = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def get(self, connection) -> List[EndpointRoute]:
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is None or now - self._loaded_at >= self.refresh_seconds:
+                rows = connection.execute(
+                    select(WebhookEndpoint.id, WebhookEndpoint.events, WebhookEndpoint.categories,
+                           WebhookEndpoint.sources).where(WebhookEndpoint.is_active.is_(True))
+                )
+                self._routes = [EndpointRoute(*row) for row in rows]
+                self._loaded_at = now
+            return self._routes
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+class WebhookDispatcher:
+    """Delivers the webhook outbox with a pool of worker threads.
+
+    A scheduler thread looks for endpoints with due deliveries and hands each
+    one to a worker, which claims up to ``batch_size`` of its rows, posts them
+    as one signed request and repeats until the endpoint has nothing due. An
+    endpoint is only worked on by one thread per process; claims carry a
+    lease, so several processes can share the outbox and rows held by a
+    process that died are retried once the lease runs out.
+
+    A failed request pushes every row in it back by ``backoff_seconds *
+    2 ** (attempts - 1)`` (with jitter, capped at ``backoff_max_seconds``) and
+    pauses the endpoint in this process for as long; rows that reach
+    ``max_attempts`` become ``dead`` and stay until retried through the API.
+    """
+
+    def __init__(self, workers: int = 4, batch_size: int = 50, poll_seconds: float = 1.0,
+                 timeout: float = 5.0, max_attempts: int = 8, backoff_seconds: float = 2.0,
+                 backoff_max_seconds: float = 3600.0, lease_seconds: float = 60.0,
+                 session_factory=SessionLocal):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.lease = timedelta(seconds=max(lease_seconds, timeout * 2))
+        self.session_factory = session_factory
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pool = None
+        self._busy = set()  # endpoint ids with a worker on them
+        self._paused = {}  # endpoint id -> monotonic time it may be retried after a failure
+        self._local = threading.local()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._lock:
+            self._requests = 0
+            self._delivered = 0
+            self._failed = 0
+            self._dead = 0
+            self._request_ms = TDigest()
+            self._lag_ms = TDigest()
+
+    def ensure_started(self):
+        """Start the scheduler and worker threads once per process."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="webhook-worker")
+            self._thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop scheduling and wait for the batches in flight."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            self._thread = self._pool = None
+
+    def wake(self):
+        """New rows were committed: look for due deliveries now instead of at the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self._schedule()
+            except Exception as e:
+                logger.warning(f"Webhook scheduling failed: {e}")
+            self._wake.wait(self.poll_seconds)
+
+    def _schedule(self):
+        session = self.session_factory()
+        try:
+            due = session.execute(
+                select(WebhookDelivery.endpoint_id).where(
+                    WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= _now()
+                ).group_by(WebhookDelivery.endpoint_id).order_by(func.min(WebhookDelivery.id))
+            ).scalars().all()
+        finally:
+            session.close()
+
+        now = time.monotonic()
+        for endpoint_id in due:
+            with self._lock:
+                if len(self._busy) >= self.workers:
+                    return  # a finishing worker wakes the scheduler
+                if endpoint_id in self._busy or self._paused.get(endpoint_id, 0) > now:
+                    continue
+                self._paused.pop(endpoint_id, None)
+                self._busy.add(endpoint_id)
+            self._pool.submit(self._work, endpoint_id)
+
+    def _work(self, endpoint_id: int):
+        try:
+            while not self._stopping.is_set():
+                if not self.deliver_batch(endpoint_id):
+                    break
+        except Exception as e:
+            logger.warning(f"Webhook delivery to endpoint {endpoint_id} failed: {e}")
+        finally:
+            with self._lock:
+                self._busy.discard(endpoint_id)
+            self.wake()
+
+    def deliver_batch(self, endpoint_id: int) -> bool:
+        """Claim and post one batch for an endpoint; True if it was delivered."""
+        session = self.session_factory()
+        try:
+            token, rows = self._claim(session, endpoint_id)
+            if not rows:
+                return False
+            endpoint = session.get(WebhookEndpoint, endpoint_id)
+            if endpoint is None or not endpoint.is_active:
+                self._finish(session, token, rows, "Endpoint was deleted", dead=True)
+                return False
+
+            body = json.dumps({"deliveries": [_message(row) for row in rows]},
+                              separators=(",", ":")).encode()
+            error = self._post(endpoint, body)
+            self._finish(session, token, rows, error)
+            if error is not None:
+                delay = self._backoff(min(row.attempts for row in rows))
+                with self._lock:
+                    self._paused[endpoint_id] = time.monotonic() + delay
+            return error is None
+        finally:
+            session.close()
+
+    def _claim(self, session, endpoint_id: int):
+        now = _now()
+        token = uuid.uuid4().hex
+        due = (WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)
+        batch = select(WebhookDelivery.id).where(
+            WebhookDelivery.endpoint_id == endpoint_id, *due
+        ).order_by(WebhookDelivery.id).limit(self.batch_size)
+        # the outer conditions are re-checked on the locked rows, so two claimers never share a row
+        session.execute(
+            update(WebhookDelivery).where(WebhookDelivery.id.in_(batch), *due)
+            .values(claim_token=token, next_attempt_at=now + self.lease)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        rows = session.query(WebhookDelivery).filter(
+            WebhookDelivery.claim_token == token
+        ).order_by(WebhookDelivery.id).all()
+        return token, rows
+
+    def _post(self, endpoint: WebhookEndpoint, body: bytes) -> Optional[str]:
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: sign(endpoint.secret, timestamp, body),
+        }
+        http = getattr(self._local, "http", None)
+        if http is None:
+            # one keep-alive session per worker thread
+            http = self._local.http = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = http.post(endpoint.url, data=body, headers=headers, timeout=self.timeout)
+            error = None if 200 <= response.status_code < 300 else f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._requests += 1
+            self._request_ms.add((time.perf_counter() - started) * 1000)
+        return error
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** max(attempts - 1, 0))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _finish(self, session, token: str, rows: List[WebhookDelivery], error: Optional[str], dead: bool = False):
+        now = _now()
+        # only touch rows still claimed by this batch: one whose lease ran out belongs to its new claimer
+        mine = WebhookDelivery.claim_token == token
+        delivered = failed = died = 0
+        if error is None:
+            delivered = session.execute(
+                update(WebhookDelivery).where(mine).values(
+                    status="delivered", delivered_at=now, attempts=WebhookDelivery.attempts + 1,
+                    claim_token=None, last_error=None,
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+        else:
+            by_attempts = {}
+            for row in rows:
+                by_attempts.setdefault(row.attempts + 1, []).append(row.id)
+            for attempts, ids in by_attempts.items():
+                values = {"attempts": attempts, "claim_token": None, "last_error": error[:512]}
+                if dead or attempts >= self.max_attempts:
+                    values["status"] = "dead"
+                else:
+                    values["next_attempt_at"] = now + timedelta(seconds=self._backoff(attempts))
+                count = session.execute(
+                    update(WebhookDelivery).where(WebhookDelivery.id.in_(ids), mine).values(**values)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if "status" in values:
+                    died += count
+                else:
+                    failed += count
+        session.commit()
+        with self._lock:
+            self._delivered += delivered
+            self._failed += failed
+            self._dead += died
+            if delivered:
+                for row in rows:
+                    created_at = row.created_at if row.created_at.tzinfo else row.created_at.replace(tzinfo=timezone.utc)
+                    self._lag_ms.add(max((now - created_at).total_seconds(), 0) * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "requests": self._requests,
+                "delivered": self._delivered,
+                "failed_attempts": self._failed,
+                "dead_lettered": self._dead,
+                "endpoints_in_flight": len(self._busy),
+                "endpoints_paused": sum(1 for until in self._paused.values() if until > time.monotonic()),
+                "request_ms": summarize_latency(self._request_ms),
+                "delivery_lag_ms": summarize_latency(self._lag_ms),
+            }
+
+
+def _message(row: WebhookDelivery) -> dict:
+    return {
+        "id": row.id,
+        "event": row.event,
+        "incident_id": row.incident_id,
+        "data": row.payload,
+        "attempt": row.attempts + 1,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+endpoint_routes = EndpointRoutes(refresh_seconds=Config.WEBHOOK_ENDPOINT_REFRESH_SECONDS)
+
+webhook_dispatcher = WebhookDispatcher(
+    workers=Config.WEBHOOK_WORKERS,
+    batch_size=Config.WEBHOOK_BATCH_SIZE,
+    poll_seconds=Config.WEBHOOK_POLL_SECONDS,
+    timeout=Config.WEBHOOK_TIMEOUT_SECONDS,
+    max_attempts=Config.WEBHOOK_MAX_ATTEMPTS,
+    backoff_seconds=Config.WEBHOOK_BACKOFF_SECONDS,
+    backoff_max_seconds=Config.WEBHOOK_BACKOFF_MAX_SECONDS,
+    lease_seconds=Config.WEBHOOK_LEASE_SECONDS,
+)
+
+@event.listens_for(Session, "after_flush")
+def queue_webhook_deliveries(session, flush_context):
+    """Write an outbox row per incident event and matching endpoint, inside the incident's transaction."""
+    incident_events = flush_events(session, flush_context)
+    if not incident_events:
+        return
+    connection = session.connection()
+    routes = endpoint_routes.get(connection)
+    if not routes:
+        return
+    now = _now()
+    rows = []
+    for incident_event in incident_events:
+        payload = incident_event.get("data", incident_event.get("changes"))
+        for route in routes:
+            if route.matches(incident_event):
+                rows.append({
+                    "endpoint_id": route.id, "incident_id": incident_event["id"],
+                    "event": f"incident.{incident_event['op']}", "payload": payload,
+                    "next_attempt_at": now, "created_at": now,
+                })
+    if rows:
+        connection.execute(WebhookDelivery.__table__.insert(), rows)
+        session.info["webhook_deliveries"] = True
+
+@event.listens_for(Session, "after_commit")
+def wake_webhook_dispatcher(session):
+    if session.info.pop("webhook_deliveries", None):
+        webhook_dispatcher.wake()
+
+@event.listens_for(Session, "after_rollback")
+def discard_webhook_wakeup(session):
+    session.info.pop("webhook_deliveries", None)
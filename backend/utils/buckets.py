@@ -0,0 +1,102 @@
+from datetime import datetime, date, timedelta, timezone
+from typing import List
+from sqlalchemy import Date, DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+BUCKET_GRANULARITIES = ("hour", "day", "week", "month")
+
+class date_bucket(FunctionElement):
+    """Start of the hour/day/week/month containing a timestamp or date column.
+
+    Weeks start on Monday and buckets are taken in UTC. Compiles to the
+    dialect's native truncation: ``date_trunc`` on PostgreSQL,
+    ``datetime()``/``strftime()`` on SQLite.
+    """
+    type = DateTime()
+    name = "date_bucket"
+    inherit_cache = True
+    # granularity is part of the SQL, so it must be part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("granularity", InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, granularity: str, expr):
+        if granularity not in BUCKET_GRANULARITIES:
+            raise ValueError(f"Unsupported bucket granularity: {granularity}")
+        self.granularity = granularity
+        super().__init__(expr)
+
+@compiles(date_bucket)
+def _compile_date_bucket(element, compiler, **kw):
+    expr = compiler.process(list(element.clauses)[0], **kw)
+    return f"date_trunc('{element.granularity}', {expr})"
+
+@compiles(date_bucket, "postgresql")
+def _compile_date_bucket_postgresql(element, compiler, **kw):
+    column = list(element.clauses)[0]
+    expr = compiler.process(column, **kw)
+    # Truncate in UTC rather than the session time zone; plain dates would
+    # otherwise be promoted to timestamptz
+    if isinstance(column.type, DateTime) and column.type.timezone:
+        expr = f"({expr} AT TIME ZONE 'UTC')"
+    elif isinstance(column.type, Date):
+        expr = f"CAST({expr} AS TIMESTAMP)"
+    return f"date_trunc('{element.granularity}', {expr})"
+
+# SQLite keeps timestamps as ISO strings; these return 'YYYY-MM-DD HH:MM:SS'
+# so the DateTime result type parses them back into datetimes
+_SQLITE_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {})",
+    "day": "datetime({}, 'start of day')",
+    # 'weekday 0' moves forward to Sunday (or stays on it), then back to Monday
+    "week": "datetime({}, 'weekday 0', '-6 days', 'start of day')",
+    "month": "datetime({}, 'start of month')",
+}
+
+@compiles(date_bucket, "sqlite")
+def _compile_date_bucket_sqlite(element, compiler, **kw):
+    expr = compiler.process(list(element.clauses)[0], **kw)
+    return _SQLITE_BUCKETS[element.granularity].format(expr)
+
+def as_utc_naive(value) -> datetime:
+    """Normalize a bucket value returned by the database to a naive UTC datetime."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    """Python counterpart of :class:`date_bucket`."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return value
+    value = value.replace(hour=0)
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+def next_bucket(value: datetime, granularity: str) -> datetime:
+    """Start of the bucket following the bucket that starts at ``value``."""
+    if granularity == "hour":
+        return value + timedelta(hours=1)
+    if granularity == "day":
+        return value + timedelta(days=1)
+    if granularity == "week":
+        return value + timedelta(weeks=1)
+    return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+
+def bucket_range(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Starts of every bucket overlapping [start, end], used to zero-fill results."""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from utils.etag import normalized_args, is_not_modified, not_modified_response, etag_json_response
+
+logger = logging.getLogger(__name__)
+
+# Invalidation tags shared by the incident read endpoints and the write paths
+INCIDENT_LIST_TAG = "incident-list"
+INCIDENT_STATS_TAG = "incident-stats"
+
+def incident_tag(incident_id: int) -> str:
+    return f"incident:{incident_id}"
+
+
+class NullBackend:
+    """Backend that stores nothing; every lookup is a miss."""
+
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value, ttl: int):
+        pass
+
+    def get_version(self, tag: str) -> int:
+        return 0
+
+    def bump_version(self, tag: str) -> int:
+        return 0
+
+    def clear(self):
+        pass
+
+
+class LRUBackend:
+    """In-process LRU backend with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Tag versions live outside the LRU so they are never evicted
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, tag: str) -> int:
+        with self._lock:
+            return self._versions.get(tag, 0)
+
+    def bump_version(self, tag: str) -> int:
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+            return self._versions[tag]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend:
+    """Shared backend for any Redis-compatible client (redis.Redis, fakeredis, ...)."""
+
+    def __init__(self, client, prefix: str = "inci:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for the shared backend
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: int):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def get_version(self, tag: str) -> int:
+        raw = self.client.get(f"{self.prefix}tag:{tag}")
+        return int(raw) if raw is not None else 0
+
+    def bump_version(self, tag: str) -> int:
+        return int(self.client.incr(f"{self.prefix}tag:{tag}"))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class _Flight:
+    """A computation in progress that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """Tagged read-through cache with single-flight recompute.
+
+    Entries are stored under a key that embeds the current version of each of
+    their tags, so invalidating a tag is a single counter bump: entries written
+    under the old version simply become unreachable and age out.
+    """
+
+    def __init__(self, backend, default_ttl: int = 30):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = {
+                "hits": 0,
+                "misses": 0,
+                "computes": 0,
+                "coalesced": 0,
+                "invalidations": 0,
+                "errors": 0,
+                "lookup_seconds": 0.0,
+                "compute_seconds": 0.0,
+            }
+
+    def _record(self, **deltas):
+        with self._metrics_lock:
+            for name, delta in deltas.items():
+                self._metrics[name] += delta
+
+    def make_key(self, namespace: str, params, tags) -> str:
+        """Build a cache key from the namespace, normalized params and tag versions."""
+        versions = [f"{tag}@{self.backend.get_version(tag)}" for tag in sorted(tags)]
+        digest = hashlib.sha1(
+            json.dumps(params, default=str, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        ).hexdigest()
+        return f"{namespace}:{digest}:{','.join(versions)}"
+
+    def _lookup(self, key: str):
+        started = time.perf_counter()
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed for {key}: {e}")
+            self._record(errors=1)
+            value = None
+        self._record(lookup_seconds=time.perf_counter() - started)
+        return value
+
+    def get(self, namespace: str, params, tags):
+        """Return the cached value or None; counts as a hit or miss."""
+        try:
+            key = self.make_key(namespace, params, tags)
+        except Exception as e:
+            logger.warning(f"Cache key lookup failed for {namespace}: {e}")
+            self._record(errors=1, misses=1)
+            return None
+        value = self._lookup(key)
+        if value is not None:
+            self._record(hits=1)
+        else:
+            self._record(misses=1)
+        return value
+
+    def get_or_compute(self, namespace: str, params, tags, compute, ttl: int = None,
+                       record_lookup: bool = True):
+        """Return the cached value, computing and storing it on a miss.
+
+        Concurrent misses on the same key are collapsed: one caller computes,
+        the others wait for its result instead of hitting the database.
+        Pass ``record_lookup=False`` when the caller already counted this
+        request through :meth:`get`.
+        """
+        try:
+            key = self.make_key(namespace, params, tags)
+        except Exception as e:
+            logger.warning(f"Cache key lookup failed for {namespace}: {e}")
+            self._record(errors=1)
+            return compute()
+
+        value = self._lookup(key)
+        if value is not None:
+            if record_lookup:
+                self._record(hits=1)
+            return value
+        if record_lookup:
+            self._record(misses=1)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._record(coalesced=1)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._record(computes=1)
+        started = time.perf_counter()
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                try:
+                    self.backend.set(key, flight.value, ttl or self.default_ttl)
+                except Exception as e:
+                    logger.warning(f"Cache store failed for {key}: {e}")
+                    self._record(errors=1)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._record(compute_seconds=time.perf_counter() - started)
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, *tags):
+        """Invalidate every entry carrying any of the given tags."""
+        for tag in tags:
+            try:
+                self.backend.bump_version(tag)
+                self._record(invalidations=1)
+            except Exception as e:
+                logger.warning(f"Cache invalidation failed for {tag}: {e}")
+                self._record(errors=1)
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        lookups = m["hits"] + m["misses"]
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": m["hits"],
+            "misses": m["misses"],
+            "computes": m["computes"],
+            "coalesced": m["coalesced"],
+            "invalidations": m["invalidations"],
+            "errors": m["errors"],
+            "hit_rate": m["hits"] / lookups if lookups else 0.0,
+            "avg_lookup_ms": m["lookup_seconds"] / lookups * 1000 if lookups else 0.0,
+            "avg_compute_ms": m["compute_seconds"] / m["computes"] * 1000 if m["computes"] else 0.0,
+        }
+
+
+def build_cache_backend():
+    """Create the cache backend selected by Config.CACHE_BACKEND."""
+    if Config.CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(Config.CACHE_REDIS_URL)
+    if Config.CACHE_BACKEND == "none":
+        return NullBackend()
+    return LRUBackend(max_entries=Config.CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(build_cache_backend(), default_ttl=Config.CACHE_DEFAULT_TTL)
+
+def invalidate_incident_caches(*incident_ids):
+    """Drop cached list/stats responses and the detail responses of the given incidents."""
+    response_cache.invalidate(INCIDENT_LIST_TAG, INCIDENT_STATS_TAG,
+                              *(incident_tag(i) for i in incident_ids))
+
+def cached_etag_response(namespace: str, tags, validate, build, params=None, ttl: int = None):
+    """Serve a JSON read endpoint through the response cache with ETag support.
+
+    ``validate`` returns the current ETag (or None when the resource does not
+    exist) and is only called on a cache miss, so a conditional request can
+    still be answered with 304 before ``build`` runs the main query.
+    Returns None when ``validate`` or ``build`` report a missing resource.
+    """
+    params = normalized_args() if params is None else params
+    entry = response_cache.get(namespace, params, tags)
+    if entry is None:
+        etag = validate()
+        if etag is None:
+            return None
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        def compute():
+            # a resource deleted after validate() must not be cached as a null body
+            body = build()
+            return None if body is None else {"etag": etag, "body": body}
+
+        entry = response_cache.get_or_compute(namespace, params, tags, compute, ttl, record_lookup=False)
+        if entry is None:
+            return None
+    if is_not_modified(entry["etag"]):
+        return not_modified_response(entry["etag"])
+    return etag_json_response(entry["body"], entry["etag"])
@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Size-bounded cache of generated files in one directory. Entries are kept in
+# least-recently-used order in memory (rebuilt from modification times when
+# the process starts) and the oldest are deleted once the directory holds more
+# than ``max_bytes``. Concurrent requests for a file that is not there yet
+# share a single creation: the first caller renders, the others wait for it.
+# Files are written under a temporary name and renamed into place, so readers
+# in this or any other process never see a partial file; each process keeps
+# its own accounting of what it has seen, so with several processes the bound
+# is per process rather than global.
+
+STALE_TEMPORARY_SECONDS = 3600
+
+
+class _Flight:
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class DiskLRUCache:
+    """Files in ``directory`` up to ``max_bytes`` in total, least recently used evicted first."""
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # name -> size in bytes, least recently used first
+        self._bytes = 0
+        self._inflight = {}  # name -> _Flight
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def get_or_create(self, name: str, create: Callable[[Path], None]) -> Path:
+        """The path of ``name``, calling ``create(temporary_path)`` to write it on a miss."""
+        self._load()
+        path = self.directory / name
+        with self._lock:
+            if name in self._entries:
+                if path.exists():
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return path
+                # removed behind our back: evicted by another process, or the original was deleted
+                self._bytes -= self._entries.pop(name)
+            flight = self._inflight.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[name] = _Flight()
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return path
+
+        try:
+            if not path.exists():  # another process may have rendered it already
+                temporary = self.directory / f".{name}.{uuid.uuid4().hex}.tmp"
+                try:
+                    create(temporary)
+                    os.replace(temporary, path)
+                finally:
+                    temporary.unlink(missing_ok=True)
+            size = path.stat().st_size
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[name]
+            flight.done.set()
+
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = size
+                self._bytes += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        # called with the lock held; the newest entry always stays
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                (self.directory / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not evict cached file {name}: {e}")
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.directory):
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    if stat.st_mtime < time.time() - STALE_TEMPORARY_SECONDS:
+                        # left behind by a render that died with its process
+                        Path(entry.path).unlink(missing_ok=True)
+                    continue
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+            for _, name, size in sorted(files):
+                self._entries[name] = size
+                self._bytes += size
+            self._evict()
+            self._loaded = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "collapsed": self.collapsed,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from flask import request, jsonify, make_response
+from sqlalchemy import func
+from models.incident import Incident
+from models.incident_change import IncidentChange
+
+def compute_etag(*parts) -> str:
+    """Derive a strong validator from the given parts."""
+    raw = json.dumps(parts, default=str, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def normalized_args() -> list:
+    """Return the request query parameters in a stable, order-independent form."""
+    return sorted(request.args.items(multi=True))
+
+def incident_fingerprint(session, *criteria) -> tuple:
+    """Cheap (row count, max(updated_at), last change token) fingerprint of the matching incidents.
+
+    The change token covers writes that land within the resolution of updated_at.
+    """
+    # Separate scalar subqueries let max() use the updated_at index on its own
+    count = session.query(func.count(Incident.id)).filter(*criteria).scalar_subquery()
+    last_updated = session.query(func.max(Incident.updated_at)).filter(*criteria).scalar_subquery()
+    last_change = session.query(func.max(IncidentChange.id)).scalar_subquery()
+    count, last_updated, change_token = session.query(count, last_updated, last_change).one()
+    return count, last_updated, change_token
+
+def change_token(session):
+    """Last incident change token: moves on with every committed incident write.
+
+    A primary-key max(), so one index probe however large the tables grow.
+    """
+    return session.query(func.max(IncidentChange.id)).scalar()
+
+def is_not_modified(etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag."""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified_response(etag: str):
+    """Build an empty 304 response carrying the current validator."""
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def etag_json_response(payload, etag: str):
+    """Serialize a payload and attach its validator."""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -1,10 +1,17 @@
 import os
+import glob
 import uuid
+import hashlib
 import mimetypes
+from datetime import datetime
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ExifTags
 from werkzeug.utils import secure_filename
 from config import Config
+from utils.imaging import load_scaled, oriented_size, output_format, required_scale, save_image
+
+THUMBNAIL_SIZE = (300, 300)
+HASH_CHUNK_SIZE = 1024 * 1024
 
 class FileHandler:
     def __init__(self):
@@ -16,6 +23,8 @@ class FileHandler:
         (self.upload_folder / 'videos').mkdir(exist_ok=True)
         (self.upload_folder / 'documents').mkdir(exist_ok=True)
         (self.upload_folder / 'thumbnails').mkdir(exist_ok=True)
+        (self.upload_folder / 'variants').mkdir(exist_ok=True)
+        (self.upload_folder / 'tmp').mkdir(exist_ok=True)
 
     def allowed_file(self, filename: str) -> tuple[bool, str]:
         """Check if file extension is allowed and return media type."""
@@ -40,69 +49,155 @@ class FileHandler:
         return f"{uuid.uuid4().hex}{ext}"
 
     def save_file(self, file, media_type: str) -> dict:
-        """Save uploaded file and return file information."""
+        """Hash an upload while writing it to a temporary file and return file information.
+
+        Files are content-addressed: the upload is stored as
+        ``<sha256><ext>`` (or under the name the same content already has),
+        so identical uploads share one file. It stays in ``temp_path`` until
+        :meth:`commit_upload` moves it into place, which the caller does once
+        the media record is committed; :meth:`discard_upload` drops it
+        instead. Images are not processed here; see :meth:`process_image`.
+        """
+        # Validate file
+        is_allowed, detected_type = self.allowed_file(file.filename)
+        if not is_allowed:
+            raise ValueError(f"File type not allowed: {file.filename}")
+        
+        original_filename = secure_filename(file.filename)
+        temp_path = self.upload_folder / 'tmp' / f"{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        file_size = 0
         try:
-            # Validate file
-            is_allowed, detected_type = self.allowed_file(file.filename)
-            if not is_allowed:
-                raise ValueError(f"File type not allowed: {file.filename}")
-            
-            # Generate secure filename
-            original_filename = secure_filename(file.filename)
-            new_filename = self.generate_filename(original_filename)
-            
-            # Determine subfolder based on media type
-            subfolder = f"{media_type}s" if media_type in ['image', 'video', 'document'] else 'documents'
-            file_path = self.upload_folder / subfolder / new_filename
-            
-            # Save file
-            file.save(str(file_path))
-            
-            # Get file info
-            file_size = os.path.getsize(file_path)
-            mime_type = mimetypes.guess_type(str(file_path))[0]
-            
-            # Generate thumbnail for images
-            thumbnail_path = None
-            if media_type == 'image':
-                thumbnail_path = self.generate_thumbnail(file_path, new_filename)
-            
-            return {
-                'filename': new_filename,
-                'original_filename': original_filename,
-                'file_path': str(file_path),
-                'file_size': file_size,
-                'mime_type': mime_type,
-                'media_type': media_type,
-                'thumbnail_path': thumbnail_path
-            }
-            
-        except Exception as e:
-            # Clean up if file was partially saved
-            if 'file_path' in locals() and os.path.exists(file_path):
-                os.remove(file_path)
-            raise e
+            with open(temp_path, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(HASH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if not self.validate_file_size(file_size):
+                        raise ValueError(f"File too large: {file.filename}")
+                    digest.update(chunk)
+                    out.write(chunk)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        
+        content_hash = digest.hexdigest()
+        file_path = self.content_path(media_type, content_hash, Path(original_filename).suffix)
+        return {
+            'filename': file_path.name,
+            'original_filename': original_filename,
+            'file_path': str(file_path),
+            'temp_path': str(temp_path),
+            'content_hash': content_hash,
+            'file_size': file_size,
+            'mime_type': mimetypes.guess_type(file_path.name)[0],
+            'media_type': media_type
+        }
+
+    def content_path(self, media_type: str, content_hash: str, ext: str) -> Path:
+        """Where content with ``content_hash`` is stored: an existing copy, else ``<hash><ext>``."""
+        # Determine subfolder based on media type
+        subfolder = f"{media_type}s" if media_type in ['image', 'video', 'document'] else 'documents'
+        folder = self.upload_folder / subfolder
+        existing = next(folder.glob(f"{content_hash}.*"), None)
+        return existing or folder / f"{content_hash}{ext.lower()}"
 
-    def generate_thumbnail(self, image_path: Path, filename: str) -> str:
-        """Generate thumbnail for image files."""
+    def commit_upload(self, file_info: dict):
+        """Move a saved upload into its content-addressed place (after its record is committed).
+
+        The rename also happens when the content is already stored: the
+        bytes are identical, and it restores the file should a concurrent
+        delete of the last other reference have removed it.
+        """
         try:
-            thumbnail_filename = f"thumb_{filename}"
-            thumbnail_path = self.upload_folder / 'thumbnails' / thumbnail_filename
-            
-            with Image.open(image_path) as img:
-                # Convert to RGB if necessary (for JPEG)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Create thumbnail
-                img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                img.save(thumbnail_path, 'JPEG', quality=85)
-                
-            return str(thumbnail_path)
-            
-        except Exception as e:
-            print(f"Error generating thumbnail: {e}")
-            return None
+            os.replace(file_info['temp_path'], file_info['file_path'])
+        except FileNotFoundError:
+            pass  # already committed
+
+    def discard_upload(self, file_info: dict):
+        """Remove a saved upload that will not be committed (a no-op once committed)."""
+        Path(file_info['temp_path']).unlink(missing_ok=True)
+
+    def hash_file(self, file_path) -> str:
+        """sha256 of a stored file, read in chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as source:
+            while True:
+                chunk = source.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    return digest.hexdigest()
+                digest.update(chunk)
+
+    def process_image(self, image_path: Path, filename: str) -> dict:
+        """Generate the thumbnail and responsive width variants of a stored image.
+
+        Returns the thumbnail path, the variants ({width: filename}), the
+        image dimensions (as displayed) and its metadata. Variants are never
+        upscaled. JPEGs are decoded only at the resolution the outputs need;
+        outputs follow the EXIF orientation and MEDIA_IMAGE_FORMAT.
+        """
+        stem = Path(filename).stem
+        fmt = output_format(Config.MEDIA_IMAGE_FORMAT)
+        quality = Config.MEDIA_IMAGE_QUALITY
+        with Image.open(image_path) as original:
+            metadata = self.extract_metadata(original)
+            width, height = oriented_size(original)
+            widths = sorted(set(Config.MEDIA_VARIANT_WIDTHS), reverse=True)
+            img = load_scaled(original, required_scale((width, height), widths, THUMBNAIL_SIZE))
+
+            # Widest first, each one resized from the previous (smaller) image
+            variants = {}
+            source = img
+            for target in widths:
+                if target >= width:
+                    continue
+                source = source.resize((target, max(1, round(height * target / width))),
+                                       Image.Resampling.LANCZOS)
+                variant_path = save_image(source, self.upload_folder / 'variants' / f"{stem}_w{target}",
+                                          fmt, quality)
+                variants[str(target)] = variant_path.name
+
+            thumbnail = source.copy()
+            thumbnail.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+            thumbnail_path = save_image(thumbnail, self.upload_folder / 'thumbnails' / f"thumb_{stem}",
+                                        fmt, quality)
+
+        return {
+            'thumbnail_path': str(thumbnail_path),
+            'variants': variants,
+            'width': width,
+            'height': height,
+            'metadata': metadata,
+        }
+
+    def extract_metadata(self, img: Image.Image) -> dict:
+        """Format plus the EXIF fields worth showing: capture time, camera and GPS position."""
+        metadata = {'format': img.format}
+        exif = img.getexif()
+        if not exif:
+            return metadata
+        details = exif.get_ifd(ExifTags.IFD.Exif)
+        taken_at = details.get(ExifTags.Base.DateTimeOriginal) or exif.get(ExifTags.Base.DateTime)
+        if taken_at:
+            try:
+                metadata['taken_at'] = datetime.strptime(str(taken_at).strip(), '%Y:%m:%d %H:%M:%S').isoformat()
+            except ValueError:
+                pass
+        camera = ' '.join(str(exif[tag]).strip() for tag in (ExifTags.Base.Make, ExifTags.Base.Model)
+                          if exif.get(tag))
+        if camera:
+            metadata['camera'] = camera
+        if exif.get(ExifTags.Base.Orientation):
+            metadata['orientation'] = int(exif[ExifTags.Base.Orientation])
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        try:
+            latitude = _gps_degrees(gps[ExifTags.GPS.GPSLatitude], gps.get(ExifTags.GPS.GPSLatitudeRef))
+            longitude = _gps_degrees(gps[ExifTags.GPS.GPSLongitude], gps.get(ExifTags.GPS.GPSLongitudeRef))
+            metadata['gps'] = {'latitude': round(latitude, 6), 'longitude': round(longitude, 6)}
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            pass
+        return metadata
 
     def delete_file(self, file_path: str) -> bool:
         """Delete a file from the filesystem."""
@@ -115,20 +210,54 @@ class FileHandler:
             print(f"Error deleting file {file_path}: {e}")
             return False
 
-    def delete_media_files(self, media_record) -> bool:
-        """Delete all files associated with a media record."""
+    def delete_media_files(self, media_record, references=None) -> bool:
+        """Delete all files associated with a media record.
+
+        Content-addressed files are shared: pass ``references``, a callable
+        returning how many records still use a content hash, and the files
+        are only deleted once that is zero (call it after the record itself
+        is deleted and committed). The file is moved aside before the final
+        check and put back if an upload of the same content was committed in
+        the meantime.
+        """
         try:
             success = True
+            content_hash = getattr(media_record, 'content_hash', None)
             
             # Delete main file
-            if media_record.file_path:
+            if content_hash and references is not None:
+                if references(content_hash):
+                    return True
+                if media_record.file_path and os.path.exists(media_record.file_path):
+                    doomed = self.upload_folder / 'tmp' / f"{content_hash}.{uuid.uuid4().hex}.deleting"
+                    os.replace(media_record.file_path, doomed)
+                    if references(content_hash):
+                        os.replace(doomed, media_record.file_path)
+                        return True
+                    success &= self.delete_file(str(doomed))
+            elif media_record.file_path:
                 success &= self.delete_file(media_record.file_path)
             
             # Delete thumbnail
             if media_record.thumbnail_path:
                 success &= self.delete_file(media_record.thumbnail_path)
             
+            # Delete responsive variants
+            for variant_name in (media_record.variants or {}).values():
+                success &= self.delete_file(str(self.upload_folder / 'variants' / variant_name))
+            
+            # Delete copies resized on request (<filename>.<w>x<h>.<ext>)
+            for resized in (self.upload_folder / 'resized').glob(f"{glob.escape(media_record.filename)}.*"):
+                success &= self.delete_file(str(resized))
+            
             return success
         except Exception as e:
             print(f"Error deleting media files: {e}")
             return False
+
+
+def _gps_degrees(value, ref) -> float:
+    """EXIF (degrees, minutes, seconds) rationals to signed decimal degrees."""
+    degrees, minutes, seconds = (float(part) for part in value)
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ('S', 'W') else result
@@ -0,0 +1,40 @@
+import math
+from typing import Sequence, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def circle_bbox(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle; slightly generous near the poles."""
+    d_lat = radius_m / METERS_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(min(abs(latitude) + d_lat, 90.0))), 1e-6)
+    d_lon = min(radius_m / (METERS_PER_DEGREE_LAT * cos_lat), 180.0)
+    return (max(latitude - d_lat, -90.0), max(longitude - d_lon, -180.0),
+            min(latitude + d_lat, 90.0), min(longitude + d_lon, 180.0))
+
+def polygon_bbox(vertices: Sequence[Sequence[float]]) -> Tuple[float, float, float, float]:
+    lats = [vertex[0] for vertex in vertices]
+    lons = [vertex[1] for vertex in vertices]
+    return min(lats), min(lons), max(lats), max(lons)
+
+def point_in_polygon(latitude: float, longitude: float, vertices: Sequence[Sequence[float]]) -> bool:
+    """Ray casting on [lat, lon] vertices (planar; polygons must not cross the antimeridian)."""
+    inside = False
+    j = len(vertices) - 1
+    for i in range(len(vertices)):
+        lat_i, lon_i = vertices[i]
+        lat_j, lon_j = vertices[j]
+        if (lat_i > latitude) != (lat_j > latitude):
+            crossing = lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if longitude < crossing:
+                inside = not inside
+        j = i
+    return inside
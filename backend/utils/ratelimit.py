@@ -0,0 +1,225 @@
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional
+from flask import request, jsonify
+from flask_jwt_extended import decode_token
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Token-bucket rate limiting for expensive endpoints. RATE_LIMITS maps Flask
+# endpoints ("auth.login") or whole blueprints ("stats.*") to "count/seconds":
+# every identity -- the JWT subject, or the client IP for anonymous requests --
+# gets a bucket of ``count`` tokens per rule, refilled at count/seconds, and a
+# request that finds its bucket empty is answered 429 with Retry-After.
+# Requests to endpoints without a rule cost one dict lookup.
+
+
+class RateLimit:
+    """``count`` requests per ``seconds``, in bursts of up to ``count``."""
+
+    __slots__ = ("name", "capacity", "rate")
+
+    def __init__(self, name: str, count: int, seconds: float):
+        if count < 1 or seconds <= 0:
+            raise ValueError(f"Invalid rate limit for {name}: {count}/{seconds}")
+        self.name = name
+        self.capacity = float(count)
+        self.rate = count / seconds  # tokens per second
+
+    def __repr__(self):
+        return f"{self.name}={self.capacity:g}/{self.capacity / self.rate:g}"
+
+
+def parse_rate_limits(spec: str) -> Dict[str, RateLimit]:
+    """Parse ``"auth.login=10/60,stats.*=300/60"`` into {pattern: RateLimit}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        pattern, _, value = item.partition("=")
+        count, _, seconds = value.partition("/")
+        pattern = pattern.strip()
+        limits[pattern] = RateLimit(pattern, int(count), float(seconds or 1))
+    return limits
+
+
+class MemoryBackend:
+    """Buckets in a per-process dict; past ``max_keys`` refilled buckets are dropped."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> [tokens, monotonic stamp, RateLimit]
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        """Take a token: 0 when allowed, otherwise the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [limit.capacity, now, limit]
+            else:
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / limit.rate
+
+    def _prune(self, now: float):
+        # a bucket that has refilled is the same as no bucket at all
+        for key, (tokens, stamp, limit) in list(self._buckets.items()):
+            if tokens + (now - stamp) * limit.rate >= limit.capacity:
+                del self._buckets[key]
+        # still full of active clients: forget the oldest
+        excess = len(self._buckets) - self.max_keys * 9 // 10
+        for key in list(self._buckets)[:max(excess, 0)]:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# One round trip per check; the clock is the server's, so every process agrees
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = capacity
+if bucket[1] then
+    tokens = math.min(capacity, tonumber(bucket[1]) + math.max(0, now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every process, as Redis hashes that expire once refilled."""
+
+    def __init__(self, client, prefix: str = "inci:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for the shared backend
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[limit.capacity, limit.rate]))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class RateLimiter:
+    """Applies the configured limits from a ``before_request`` hook."""
+
+    def __init__(self, backend, limits: Dict[str, RateLimit], max_subjects: int = 10000):
+        self.backend = backend
+        self.limits = limits
+        self.max_subjects = max_subjects
+        self._by_endpoint = {}  # endpoint -> RateLimit or None
+        self._subjects = {}  # raw JWT -> (subject, expires)
+        self._subjects_lock = threading.Lock()
+        self.checks = 0
+        self.limited = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and bool(self.limits)
+
+    def limit_for(self, endpoint: Optional[str]) -> Optional[RateLimit]:
+        try:
+            return self._by_endpoint[endpoint]
+        except KeyError:
+            limit = None
+            if endpoint:
+                limit = self.limits.get(endpoint) or self.limits.get(endpoint.rpartition(".")[0] + ".*")
+            self._by_endpoint[endpoint] = limit
+            return limit
+
+    def before_request(self):
+        req = request._get_current_object()  # one proxy lookup instead of several
+        limit = self.limit_for(req.endpoint)
+        if limit is None or req.method == "OPTIONS":
+            return None
+        self.checks += 1
+        try:
+            wait = self.backend.take(f"{limit.name}:{self.identity(req)}", limit)
+        except Exception as e:
+            # fail open: an unreachable backend must not take the API down with it
+            self.errors += 1
+            logger.warning(f"Rate limit check failed for {limit.name}: {e}")
+            return None
+        if wait <= 0:
+            return None
+        self.limited += 1
+        retry_after = max(1, math.ceil(wait))
+        response = jsonify({"error": "Too many requests", "retry_after": retry_after})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    def identity(self, req) -> str:
+        """The JWT subject when the request carries a valid token, else the client IP."""
+        header = req.environ.get("HTTP_AUTHORIZATION", "")
+        if header.startswith("Bearer "):
+            subject = self._subject(header[7:])
+            if subject is not None:
+                return f"user:{subject}"
+        return f"ip:{req.remote_addr}"
+
+    def _subject(self, token: str) -> Optional[str]:
+        # verifying a JWT costs tens of microseconds; remember the ones seen recently
+        cached = self._subjects.get(token)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+        try:
+            claims = decode_token(token)
+        except Exception:
+            return None  # limited by IP; the endpoint itself rejects the token
+        subject = str(claims["sub"])
+        with self._subjects_lock:
+            if len(self._subjects) >= self.max_subjects:
+                for stale in list(self._subjects)[:self.max_subjects // 10]:
+                    del self._subjects[stale]
+            self._subjects[token] = (subject, claims.get("exp", math.inf))
+        return subject
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "limits": [repr(limit) for limit in self.limits.values()],
+            "checks": self.checks,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+def build_rate_limit_backend():
+    """Create the backend selected by Config.RATE_LIMIT_BACKEND (None disables limiting)."""
+    if Config.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend.from_url(Config.RATE_LIMIT_REDIS_URL)
+    if Config.RATE_LIMIT_BACKEND == "none":
+        return None
+    return MemoryBackend(max_keys=Config.RATE_LIMIT_MAX_KEYS)
+
+rate_limiter = RateLimiter(build_rate_limit_backend(), parse_rate_limits(Config.RATE_LIMITS))
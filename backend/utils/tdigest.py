@@ -0,0 +1,105 @@
+import math
+from typing import List, Tuple
+
+
+class TDigest:
+    """Merging t-digest: a mergeable quantile sketch of bounded size.
+
+    Values are buffered and periodically merged into at most ~``compression``
+    centroids, kept small near the tails so p99-style quantiles stay accurate.
+    Memory is O(compression) regardless of how many values were added.
+    """
+
+    def __init__(self, compression: float = 200.0, buffer_size: int = 500):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one."""
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        # k1 scale function: centroids get smaller towards q=0 and q=1
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in items)
+
+        merged = []
+        mean, weight = items[0]
+        before = 0.0
+        k_lower = self._k(0.0)
+        for next_mean, next_weight in items[1:]:
+            q = (before + weight + next_weight) / total
+            if self._k(q) - k_lower <= 1:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                before += weight
+                k_lower = self._k(before / total)
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile ``q`` (0..1); NaN when empty."""
+        self._compress()
+        if not self._centroids:
+            return math.nan
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+        target = q * self.count
+        if target <= self._centroids[0][1] / 2:
+            # between the minimum and the first centroid's center
+            first_mean, first_weight = self._centroids[0]
+            return self.min + (first_mean - self.min) * (target / (first_weight / 2)) if first_weight else self.min
+
+        cumulative = 0.0
+        for (mean, weight), (next_mean, next_weight) in zip(self._centroids, self._centroids[1:]):
+            center = cumulative + weight / 2
+            next_center = cumulative + weight + next_weight / 2
+            if target <= next_center:
+                fraction = (target - center) / (next_center - center)
+                return mean + (next_mean - mean) * fraction
+            cumulative += weight
+
+        # between the last centroid's center and the maximum
+        last_mean, last_weight = self._centroids[-1]
+        center = self.count - last_weight / 2
+        fraction = (target - center) / (last_weight / 2) if last_weight else 1.0
+        return last_mean + (self.max - last_mean) * min(fraction, 1.0)
+
+    def __len__(self) -> int:
+        self._compress()
+        return len(self._centroids)
+
+
+def summarize_latency(sketch: TDigest) -> dict:
+    """p50/p99/max of a sketch of durations for a ``stats()`` payload; None while empty."""
+    if not sketch.count:
+        return {"p50": None, "p99": None, "max": None}
+    return {"p50": round(sketch.quantile(0.5), 3), "p99": round(sketch.quantile(0.99), 3),
+            "max": round(sketch.max, 3)}
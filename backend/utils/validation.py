@@ -1,5 +1,5 @@
-from marshmallow import Schema, fields, validate, ValidationError
-from typing import Dict, Any
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from typing import Dict, Any, List, Tuple
 import re
 
 class IncidentCreateSchema(Schema):
@@ -40,6 +40,45 @@ class UserLoginSchema(Schema):
     username = fields.Str(required=True)  # Can be username or email
     password = fields.Str(required=True)
 
+class AlertSubscriptionSchema(Schema):
+    """A circle (latitude, longitude, radius_m) or a polygon of [lat, lon] vertices."""
+    name = fields.Str(validate=validate.Length(max=100))
+    latitude = fields.Float(validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(validate=validate.Range(min=-180, max=180))
+    radius_m = fields.Float(validate=validate.Range(min=10))
+    polygon = fields.List(fields.List(fields.Float(), validate=validate.Length(equal=2)),
+                          validate=validate.Length(min=3, max=100))
+    categories = fields.List(fields.Str(validate=validate.OneOf([
+        'fire', 'accident', 'medical', 'crime', 'weather', 'natural_disaster',
+        'infrastructure', 'security', 'hazmat', 'other'
+    ])), validate=validate.Length(min=1, max=10))
+
+    @validates_schema
+    def validate_area(self, data, **kwargs):
+        circle = [key for key in ('latitude', 'longitude', 'radius_m') if key in data]
+        if 'polygon' in data:
+            if circle:
+                raise ValidationError("Give either a polygon or latitude/longitude/radius_m, not both")
+            for lat, lon in data['polygon']:
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    raise ValidationError("Polygon vertices must be valid [lat, lon] pairs", 'polygon')
+        elif len(circle) != 3:
+            raise ValidationError("Give latitude, longitude and radius_m, or a polygon")
+
+class WebhookEndpointSchema(Schema):
+    name = fields.Str(validate=validate.Length(max=100))
+    url = fields.Url(required=True, schemes={'http', 'https'}, require_tld=False,
+                     validate=validate.Length(max=1024))
+    secret = fields.Str(validate=validate.Length(min=16, max=128))  # generated when omitted
+    events = fields.List(fields.Str(validate=validate.OneOf(['created', 'updated', 'deleted'])),
+                         validate=validate.Length(min=1, max=3))
+    categories = fields.List(fields.Str(validate=validate.OneOf([
+        'fire', 'accident', 'medical', 'crime', 'weather', 'natural_disaster',
+        'infrastructure', 'security', 'hazmat', 'other'
+    ])), validate=validate.Length(min=1, max=10))
+    sources = fields.List(fields.Str(validate=validate.Length(min=1, max=32)),
+                          validate=validate.Length(min=1, max=20))
+
 def validate_request_data(schema_class: Schema, data: Dict[str, Any]) -> Dict[str, Any]:
     """Validate request data against a marshmallow schema."""
     schema = schema_class()
@@ -47,3 +86,18 @@ def validate_request_data(schema_class: Schema, data: Dict[str, Any]) -> Dict[st
         return schema.load(data)
     except ValidationError as err:
         raise ValidationError(err.messages)
+
+def validate_batch(schema_class: Schema, items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[int, Any]]:
+    """Validate a list of items, collecting errors per item index."""
+    schema = schema_class()
+    valid = []
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {"_schema": ["Invalid input type."]}
+            continue
+        try:
+            valid.append(schema.load(item))
+        except ValidationError as err:
+            errors[index] = err.messages
+    return valid, errors